@@ -1,4 +0,0 @@
-from . import database
-
-if __name__ == "__main__":
-    database._init_db()
@@ -1,14 +1,33 @@
 import typer
 
+from dl_cli.daemon import app as daemon_app
+from dl_cli.dedupe import app as dedupe_app
+from dl_cli.export import app as export_app
+from dl_cli.report import app as report_app
 from dl_cli.root_manager import app
+from dl_cli.scan_sessions import app as sessions_app
+from dl_cli.search import app as content_app
+from dl_cli.snapshots import app as snapshots_app
 
 
 cli = typer.Typer(
     name="utils",
     help="Utility commands for managing the application.",
 )
+cli.add_typer(app, name="root")
+cli.add_typer(dedupe_app, name="dedupe")
+cli.add_typer(content_app, name="content")
+cli.add_typer(report_app, name="report")
+cli.add_typer(export_app, name="export")
+cli.add_typer(sessions_app, name="sessions")
+cli.add_typer(snapshots_app, name="snapshots")
+cli.add_typer(daemon_app, name="daemon")
 
 
 def entrypoint():
     """Main entry point for the CLI."""
     cli()
+
+
+if __name__ == "__main__":
+    entrypoint()
@@ -0,0 +1,134 @@
+# dl_cli/client.py
+"""The ``dl-cli`` entry point: run a command in the daemon, or in-process.
+
+When a daemon (see ``dl_cli.daemon``) listens on ``DAEMON_SOCKET`` for the
+same database, the command line is sent to it along with this process's
+stdin, stdout and stderr, so the command reads and writes them directly,
+and its exit code is passed back. Otherwise the CLI is imported and run
+here as usual. Only ``os``, ``socket`` and ``sys`` are imported before
+that choice, so handing a command to the daemon costs little more than
+starting Python.
+
+A command travels as NUL-separated fields, ``run``, the database path,
+the working directory, the terminal width (or nothing) and then the
+arguments, with the three descriptors attached. The daemon answers
+``exit <code>`` once the command's output is flushed, or ``declined``,
+also while it is busy with another command, and the command then runs
+here instead of waiting.
+Closing the connection before the reply cancels the command, which is
+what Ctrl+C does here.
+
+The streams only go to a daemon of the same user: the socket must be
+this user's and closed to everyone else, and where the OS reports it
+(``SO_PEERCRED``), the process listening must run as this user too.
+"""
+import os
+import socket
+import stat
+import sys
+
+from dl_cli.config import DAEMON_SOCKET, DB_PATH
+
+
+def peer_uid(connection: socket.socket) -> int | None:
+    """The user id of the process at the other end, or None if unknown."""
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    import struct
+
+    # struct ucred: pid, uid, gid
+    creds = connection.getsockopt(
+        socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+    )
+    return struct.unpack("3i", creds)[1]
+
+
+def _private(socket_path: str) -> bool:
+    """Whether ``socket_path`` is a socket of this user's that no one else can use."""
+    try:
+        st = os.stat(socket_path)
+    except OSError:
+        return False
+    return (
+        stat.S_ISSOCK(st.st_mode)
+        and st.st_uid == os.getuid()
+        and not st.st_mode & 0o077
+    )
+
+
+def _forward(argv: list[str], socket_path: str = DAEMON_SOCKET) -> int | None:
+    """Run ``argv`` in the daemon and return its exit code.
+
+    Returns None, having run nothing, when there is no daemon to use: no
+    socket, nobody listening, a socket or daemon of another user, or a
+    daemon serving another database or busy with another command.
+    """
+    if not hasattr(socket, "send_fds") or not _private(socket_path):
+        return None
+    try:
+        # Help and tables are laid out for this terminal, not the daemon's
+        columns = str(os.get_terminal_size(sys.stdout.fileno()).columns)
+    except (OSError, ValueError):
+        columns = ""
+    fields = ["run", os.path.abspath(DB_PATH), os.getcwd(), columns, *argv]
+    try:
+        request = b"\0".join(os.fsencode(field) for field in fields)
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    except (OSError, ValueError):
+        return None
+    with connection:
+        try:
+            connection.connect(socket_path)
+            if peer_uid(connection) not in (None, os.getuid()):
+                print(
+                    f"dl-cli: {socket_path} is served by another user; running here.",
+                    file=sys.stderr,
+                )
+                return None
+            socket.send_fds(
+                connection,
+                [request],
+                [sys.stdin.fileno(), sys.stdout.fileno(), sys.stderr.fileno()],
+            )
+            connection.shutdown(socket.SHUT_WR)
+        except (OSError, ValueError):
+            # Not sent, so nothing ran: no daemon, or no usable std streams
+            return None
+        chunks = []
+        try:
+            while chunk := connection.recv(4096):
+                chunks.append(chunk)
+        except OSError:
+            pass
+        except KeyboardInterrupt:
+            # Hanging up tells the daemon to stop the command
+            connection.close()
+            # As Click reports an interrupted command run in-process
+            print("\nAborted!", file=sys.stderr)
+            return 1
+    reply = b"".join(chunks).split()
+    if reply == [b"declined"]:
+        return None
+    if len(reply) != 2 or reply[0] != b"exit" or not reply[1].isdigit():
+        # The command may have run: do not run it again here
+        print("dl-cli: lost the connection to the daemon.", file=sys.stderr)
+        return 1
+    return int(reply[1])
+
+
+def main() -> None:
+    """Entry point for the ``dl-cli`` script."""
+    argv = sys.argv[1:]
+    # Daemon commands manage the daemon itself, so they always run here
+    if argv[:1] != ["daemon"]:
+        code = _forward(argv)
+        if code is not None:
+            sys.exit(code)
+
+    from dl_cli.cli import entrypoint
+
+    entrypoint()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,79 @@
+import os
+
 DB_PATH = "../../filescanner.app.db"
 SETTINGS_FILE = "../../appsettings.json"
+
+# Rows per transaction when bulk-loading scan results into root_files
+INGEST_BATCH_SIZE = 5000
+
+# Seconds between scan checkpoints (see dl_cli.scan_sessions). Each one
+# copies the walker's pending-directory stack and writes one small row.
+SCAN_CHECKPOINT_INTERVAL = 5.0
+
+# SQLite tuning applied to every new connection; DB_PROFILE picks one
+DB_PROFILES = {
+    # SQLite's own defaults: rollback journal, synchronous=FULL
+    "default": {},
+    # WAL lets CLI reads proceed while a scan writes, and NORMAL only
+    # fsyncs at checkpoints instead of on every commit
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,  # negative means KiB: ~64 MB
+        "mmap_size": 268435456,  # 256 MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,  # ms to wait on a locked database
+    },
+}
+DB_PROFILE = "performance"
+
+# Connections kept open by the engine's pool
+DB_POOL_SIZE = 5
+
+# Applied on top of DB_PROFILE while bulk-loading (see database.bulk_connection).
+# synchronous is deliberately left to the profile: with OFF, an OS crash
+# or power loss mid-write can corrupt the database file, not just lose
+# the last batches, and scan checkpoints and snapshots written in bulk
+# mode must survive one. Under WAL, NORMAL already skips the per-commit
+# fsync, so OFF would gain little.
+DB_BULK_PRAGMAS = {
+    "cache_size": -256000,  # ~256 MB
+}
+# Whether scan ingestion uses the bulk pragmas
+INGEST_BULK_LOAD = True
+
+# Duplicate detection (see dl_cli.dedupe)
+HASH_ALGORITHM = "blake2b"
+# Bytes read from each end of a file for the partial hash
+HASH_BLOCK_SIZE = 64 * 1024
+# Threads hashing files at once; hashlib and file reads release the GIL
+HASH_WORKERS = min(8, os.cpu_count() or 1)
+
+# Full-text content index (see dl_cli.search)
+# Files at or above this size are not indexed, matching the scanner's limit
+CONTENT_MAX_SIZE = 10 * 1024 * 1024
+# Files read and written per transaction; rows carry whole file bodies
+CONTENT_BATCH_SIZE = 500
+# Threads reading files at once
+CONTENT_WORKERS = min(8, os.cpu_count() or 1)
+# Leading bytes checked for NUL to tell binary files apart
+CONTENT_SNIFF_SIZE = 8192
+
+# Rows fetched and written at a time by dl_cli.export; one Parquet row group each
+EXPORT_CHUNK_SIZE = 50000
+
+# Snapshots kept per root (see dl_cli.snapshots); each completed full scan
+# takes one. 0 turns snapshots off.
+SNAPSHOT_RETENTION = 5
+# Rows fetched at a time from each side of a snapshot diff
+SNAPSHOT_DIFF_CHUNK_SIZE = 10000
+
+# Unix socket of the optional command daemon (see dl_cli.daemon). The
+# dl-cli entry point hands commands to a daemon listening here, if any.
+# Without a per-user runtime directory it lives in a private (0700)
+# directory under /tmp that the daemon creates and checks is ours.
+DAEMON_SOCKET = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR")
+    or f"/tmp/dl-cli-{os.getuid() if hasattr(os, 'getuid') else 0}",
+    "dl-cli.sock",
+)
@@ -0,0 +1,54 @@
+# dl_cli/conversion.py
+"""Bulk conversion of DB rows into schemas.
+
+``validate_rows`` validates a whole batch in one call through a cached
+``TypeAdapter(list[schema])``, reading ORM objects or Core rows by
+attribute. ``construct_rows`` is the fast path for rows that come straight
+from our own tables and are already the right types: it builds instances
+with ``model_construct`` and skips validation altogether.
+"""
+from functools import cache
+from collections.abc import Iterable
+from typing import TypeVar
+
+from pydantic import BaseModel, TypeAdapter
+
+Schema = TypeVar("Schema", bound=BaseModel)
+
+
+@cache
+def _list_adapter(schema: type[Schema]) -> TypeAdapter:
+    return TypeAdapter(list[schema])
+
+
+def validate_rows(schema: type[Schema], rows: Iterable) -> list[Schema]:
+    """Validate ORM objects, Core rows or mappings into ``schema`` instances."""
+    return _list_adapter(schema).validate_python(list(rows), from_attributes=True)
+
+
+def construct_rows(schema: type[Schema], rows: Iterable) -> list[Schema]:
+    """Build ``schema`` instances from trusted Core rows without validating.
+
+    Nothing is checked or coerced, so values must already have the right
+    types. Rows that select exactly the schema's fields get their instance
+    state set directly, which is what ``model_construct`` does minus its
+    per-field loop; any other row goes through ``model_construct``.
+    ``tests/test_conversion.py`` checks that the two give the same
+    instance state as ``model_validate`` for every schema used here.
+    """
+    fields = frozenset(schema.model_fields)
+    new = schema.__new__
+    set_attr = object.__setattr__
+    out = []
+    for row in rows:
+        values = dict(row._mapping)
+        if values.keys() != fields:
+            out.append(schema.model_construct(**values))
+            continue
+        instance = new(schema)
+        set_attr(instance, "__dict__", values)
+        set_attr(instance, "__pydantic_fields_set__", fields)
+        set_attr(instance, "__pydantic_extra__", None)
+        set_attr(instance, "__pydantic_private__", None)
+        out.append(instance)
+    return out
@@ -0,0 +1,413 @@
+# dl_cli/daemon.py
+"""An optional long-running process that serves CLI commands.
+
+A single ``dl-cli`` call spends most of its time before the command runs:
+starting Python, importing SQLAlchemy and pydantic, opening the engine
+and checking the schema. ``dl-cli daemon start`` pays that once and then
+listens on a Unix socket. The ``dl-cli`` entry point (``dl_cli.client``)
+sends each command line there with its stdin, stdout and stderr, and the
+daemon runs the command against those streams in the caller's working
+directory, with the engine, the parsed CLI and ``RootDbManager``'s root
+lookups already warm.
+
+Each command runs in a child process forked from the warm daemon, so it
+starts with everything loaded, and the daemon can stop it: when the
+caller hangs up (the client does on Ctrl+C) the child is interrupted,
+and killed if it does not stop within ``CANCEL_GRACE`` seconds.
+The daemon runs one command at a time, so SQLite still sees a single
+writer from it, but keeps answering while that command runs: ``status``
+and ``stop`` right away, and other commands with ``declined``, which
+makes their client run them itself rather than wait behind a long one.
+Cached root lookups are dropped whenever ``PRAGMA data_version`` shows
+that anything committed to the database since the previous command.
+"""
+from __future__ import annotations
+
+import json
+import os
+import stat
+import sys
+import time
+from typing import TYPE_CHECKING
+
+import typer
+from dl_cli.client import peer_uid
+from dl_cli.config import DAEMON_SOCKET
+
+# socket is only needed once a daemon runs or is asked something, so it
+# stays out of every other command's startup
+if TYPE_CHECKING:
+    import socket
+
+# Seconds a cancelled command gets to stop after SIGINT before SIGKILL
+CANCEL_GRACE = 5.0
+
+
+def _request(op: str, socket_path: str = DAEMON_SOCKET) -> dict:
+    """Send a control request to the daemon and return its reply.
+
+    Raises ``OSError`` if no daemon is listening on ``socket_path``.
+    """
+    import socket
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        connection.sendall(op.encode())
+        connection.shutdown(socket.SHUT_WR)
+        chunks = []
+        while chunk := connection.recv(4096):
+            chunks.append(chunk)
+    return json.loads(b"".join(chunks))
+
+
+class _Child:
+    """A command running in a forked child, and the caller waiting on it."""
+
+    __slots__ = ("argv", "connection", "deadline", "done", "pid")
+
+    def __init__(self, pid: int, done: int, connection: socket.socket, argv):
+        self.pid = pid
+        # Readable (at EOF) once the child has exited
+        self.done = done
+        self.connection = connection
+        self.argv = argv
+        # When to kill the child, once it has been interrupted
+        self.deadline = None
+
+
+class CommandDaemon:
+    """Serves ``dl-cli`` commands sent over a Unix socket, one at a time."""
+
+    def __init__(self, socket_path: str = DAEMON_SOCKET):
+        self.socket_path = socket_path
+        self.db_path = None
+        self.requests = 0
+        self.started = None
+        self._stopping = False
+        self._listener = None
+        self._child = None
+        self._command = None
+        self._watch = None
+        self._data_version = None
+
+    def _bind(self) -> socket.socket:
+        """Listen on the socket, replacing one left by a daemon that died.
+
+        The socket's directory is created (mode 0700) if missing, and must
+        belong to this user with no one else able to write to it, so no one
+        else can replace the socket. Raises ``ValueError`` if it does not,
+        or if a daemon is already listening there.
+        """
+        import socket
+
+        directory = os.path.dirname(os.path.abspath(self.socket_path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        st = os.lstat(directory)
+        if (
+            not stat.S_ISDIR(st.st_mode)
+            or st.st_uid != os.getuid()
+            or st.st_mode & 0o022
+        ):
+            raise ValueError(
+                f"{directory} must be a directory of yours that no one else can write to."
+            )
+        if os.path.exists(self.socket_path):
+            try:
+                _request("status", self.socket_path)
+            except (OSError, ValueError):
+                os.unlink(self.socket_path)
+            else:
+                raise ValueError(f"A daemon is already listening on {self.socket_path}.")
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Only this user may connect: commands run with the daemon's rights
+        umask = os.umask(0o177)
+        try:
+            listener.bind(self.socket_path)
+        finally:
+            os.umask(umask)
+        listener.listen(16)
+        return listener
+
+    def _warm(self) -> None:
+        """Open the database and load what every command would otherwise load."""
+        import typer.main
+        from dl_cli import database, root_manager
+        from dl_cli.cli import cli
+
+        # Commands run in their caller's directory; keep the database fixed
+        database.use_database(os.path.abspath(database.DB_PATH))
+        self.db_path = database.DB_PATH
+        engine = database.get_engine()
+        self._command = typer.main.get_command(cli)
+        # A connection of its own, so commits by any other connection,
+        # pooled ones included, show up as a new data_version
+        self._watch = engine.raw_connection()
+        self._data_version = self._version()
+        root_manager.cache_roots()
+        root_manager.RootDbManager.list_roots()
+
+    def _version(self) -> int:
+        cursor = self._watch.cursor()
+        try:
+            return cursor.execute("PRAGMA data_version").fetchone()[0]
+        finally:
+            cursor.close()
+
+    def serve_forever(self, on_ready=None) -> None:
+        """Serve commands until a ``stop`` request or an interrupt.
+
+        ``on_ready(daemon)`` is called once the database is open and the
+        socket accepts commands. After ``stop`` the command still running
+        is allowed to finish. The socket is removed on the way out, and a
+        command running then is interrupted.
+        """
+        import select
+        import signal
+
+        listener = self._listener = self._bind()
+        try:
+            with listener:
+                self._warm()
+                self.started = time.time()
+                if on_ready:
+                    on_ready(self)
+                while not self._stopping or self._child is not None:
+                    poller = select.poll()
+                    poller.register(listener, select.POLLIN)
+                    child = self._child
+                    timeout = None
+                    if child is not None:
+                        poller.register(child.done, select.POLLIN)
+                        if child.deadline is None:
+                            # Event mask 0: only a full hang-up, not the request's EOF
+                            poller.register(child.connection, 0)
+                        else:
+                            timeout = max(child.deadline - time.monotonic(), 0) * 1000
+                    events = dict(poller.poll(timeout))
+                    if child is not None:
+                        if child.done in events:
+                            self._reap()
+                        elif child.deadline is None:
+                            if child.connection.fileno() in events:
+                                # The caller hung up: stop the command
+                                os.kill(child.pid, signal.SIGINT)
+                                child.deadline = time.monotonic() + CANCEL_GRACE
+                        elif time.monotonic() >= child.deadline:
+                            # Still running CANCEL_GRACE seconds after SIGINT
+                            os.kill(child.pid, signal.SIGKILL)
+                            self._reap()
+                    if listener.fileno() in events:
+                        connection, _ = listener.accept()
+                        if not self._handle(connection):
+                            connection.close()
+        finally:
+            if self._child is not None:
+                os.kill(self._child.pid, signal.SIGINT)
+                os.close(self._child.done)
+                self._child.connection.close()
+            if self._watch is not None:
+                self._watch.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def _handle(self, connection: socket.socket) -> bool:
+        """Answer one request; see ``dl_cli.client`` for the ``run`` format.
+
+        ``status`` and ``stop`` requests are the bare word and get a JSON
+        reply. Returns True if a command started, in which case the
+        connection stays open for its ``exit`` reply (see ``_reap``).
+        """
+        import socket
+
+        # The socket is ours alone, but check who is calling all the same
+        if peer_uid(connection) not in (None, os.getuid()):
+            return False
+        fds = []
+        try:
+            message, fds, _, _ = socket.recv_fds(connection, 65536, 3)
+            chunks = [message]
+            while chunk := connection.recv(65536):
+                chunks.append(chunk)
+            message = b"".join(chunks)
+            op, *fields = [os.fsdecode(field) for field in message.split(b"\0")]
+            if (
+                op == "run" and len(fds) == 3 and fields[0] == self.db_path
+                and self._child is None and not self._stopping
+            ):
+                _, cwd, columns, *argv = fields
+                self._spawn(connection, argv, cwd, fds, columns)
+                return True
+            elif op == "status":
+                reply = json.dumps({
+                    "pid": os.getpid(),
+                    "db": self.db_path,
+                    "requests": self.requests,
+                    "uptime": time.time() - self.started,
+                    "running": self._child.argv if self._child else None,
+                })
+            elif op == "stop":
+                self._stopping = True
+                reply = json.dumps({
+                    "pid": os.getpid(),
+                    "running": self._child.argv if self._child else None,
+                })
+            else:
+                # Another database, no streams, or busy with a command (or
+                # stopping): the client runs it itself
+                reply = "declined"
+        except Exception:
+            # A malformed request or a caller that hung up: drop it
+            return False
+        finally:
+            for fd in fds:
+                os.close(fd)
+        try:
+            connection.sendall(reply.encode())
+        except OSError:
+            pass
+        return False
+
+    def _spawn(self, connection: socket.socket, argv, cwd, fds, columns="") -> None:
+        """Start one command line in a child process.
+
+        ``serve_forever`` keeps serving meanwhile, and reaps the child when
+        it exits or when its caller hangs up and it has to be interrupted.
+        """
+        from dl_cli import database, root_manager
+
+        version = self._version()
+        if version != self._data_version:
+            root_manager.forget_roots()
+            self._data_version = version
+
+        done, done_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                os.close(done)
+                self._listener.close()
+                # Pooled SQLite connections must not be shared across fork
+                database.get_engine().dispose(close=False)
+                code = self._run(argv, cwd, *fds, columns)
+            finally:
+                os._exit(code)
+        os.close(done_w)
+        self._child = _Child(pid, done, connection, argv)
+
+    def _reap(self) -> None:
+        """Wait for the exited (or killed) child and send its exit code."""
+        child, self._child = self._child, None
+        os.close(child.done)
+        _, status = os.waitpid(child.pid, 0)
+        self.requests += 1
+        code = os.waitstatus_to_exitcode(status)
+        # Killed by a signal: report it the way a shell would
+        code = code if code >= 0 else 128 - code
+        with child.connection:
+            try:
+                child.connection.sendall(f"exit {code}".encode())
+            except OSError:
+                pass
+
+    def _run(self, argv, cwd, stdin_fd, stdout_fd, stderr_fd, columns="") -> int:
+        """Run one command line on the caller's streams; returns its exit code.
+
+        Runs in the child process, which exits afterwards, so the streams,
+        working directory and environment it changes are left as they are.
+        """
+        import traceback
+
+        # Line-buffered only for terminals, so piped output stays fast
+        streams = (
+            os.fdopen(stdin_fd, "r"),
+            os.fdopen(stdout_fd, "w", buffering=1 if os.isatty(stdout_fd) else -1),
+            os.fdopen(stderr_fd, "w", buffering=1),
+        )
+        sys.stdin, sys.stdout, sys.stderr = streams
+        try:
+            if columns:
+                os.environ["COLUMNS"] = columns
+            os.chdir(cwd)
+            self._command.main(args=argv, prog_name="dl-cli", standalone_mode=True)
+            code = 0
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                code = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+                code = 1
+        except Exception:
+            traceback.print_exc()
+            code = 1
+        finally:
+            for stream in streams:
+                try:
+                    stream.close()
+                except OSError:
+                    # The caller went away; its output has nowhere to go
+                    pass
+        return code
+
+
+# Typer CLI application for the daemon
+app = typer.Typer(
+    name="Daemon",
+    help="serve commands from one long-running process, so each call skips startup.",
+)
+
+_SOCKET = typer.Option(DAEMON_SOCKET, "--socket", help="Unix socket to listen on.")
+
+
+@app.command(
+    help="Run the daemon in the foreground until stopped. It runs one command "
+    "at a time; commands sent while it is busy run in their own process instead."
+)
+def start(socket_path: str = _SOCKET):
+    """Run the daemon in the foreground until stopped."""
+    def ready(daemon):
+        typer.echo(
+            f"Serving {daemon.db_path} on {daemon.socket_path}. Press Ctrl+C to stop."
+        )
+
+    try:
+        CommandDaemon(socket_path).serve_forever(on_ready=ready)
+    except (ValueError, OSError) as e:
+        typer.echo(f"Error starting daemon: {e}", err=True)
+        raise typer.Exit(code=1)
+    except KeyboardInterrupt:
+        pass
+    typer.echo("Stopped.")
+
+
+@app.command(help="Stop a running daemon.")
+def stop(socket_path: str = _SOCKET):
+    """Stop a running daemon."""
+    try:
+        reply = _request("stop", socket_path)
+    except (OSError, ValueError):
+        typer.echo(f"No daemon is listening on {socket_path}.", err=True)
+        raise typer.Exit(code=1)
+    if reply.get("running"):
+        typer.echo(
+            f"The daemon (pid {reply['pid']}) stops once "
+            f"'dl-cli {' '.join(reply['running'])}' finishes."
+        )
+    else:
+        typer.echo(f"Stopped the daemon (pid {reply['pid']}).")
+
+
+@app.command(help="Show whether a daemon is running and what it serves.")
+def status(socket_path: str = _SOCKET):
+    """Show whether a daemon is running and what it serves."""
+    try:
+        reply = _request("status", socket_path)
+    except (OSError, ValueError):
+        typer.echo(f"No daemon is listening on {socket_path}.")
+        raise typer.Exit(code=1)
+    typer.echo(
+        f"Daemon pid {reply['pid']} serving {reply['db']} on {socket_path}: "
+        f"{reply['requests']} commands in {reply['uptime']:.0f}s"
+    )
+    if reply.get("running"):
+        typer.echo(f"Running: dl-cli {' '.join(reply['running'])}")
@@ -1,27 +1,392 @@
 # dl_cli/database.py
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from dl_cli.models import Base
-from dl_cli.config import DB_PATH
+from dl_cli.config import (
+    DB_BULK_PRAGMAS,
+    DB_PATH,
+    DB_POOL_SIZE,
+    DB_PROFILE,
+    DB_PROFILES,
+)
 from contextlib import contextmanager
+import threading
 
-# Create the engine
-engine = create_engine(f"sqlite:///{DB_PATH}")
+if DB_PROFILE not in DB_PROFILES:
+    raise ValueError(
+        f"Unknown DB_PROFILE '{DB_PROFILE}'. Choose one of: {', '.join(DB_PROFILES)}."
+    )
 
-# Create a configured "Session" class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Bump whenever tables or indexes change; init_db skips all schema work
+# for databases already stamped with this version
+SCHEMA_VERSION = 10
 
+_engine = None
+_session_factory = None
+_engine_lock = threading.Lock()
 
-def init_db():
-    """Initialize the database connection and create tables if they do not exist."""
-    print(f"Initializing database at: sqlite:///{DB_PATH}")  # Debugging
-    Base.metadata.create_all(engine)
+
+def _apply_profile(dbapi_connection, connection_record):
+    """Apply the configured SQLite pragmas to each new pooled connection."""
+    cursor = dbapi_connection.cursor()
+    for name, value in DB_PROFILES[DB_PROFILE].items():
+        cursor.execute(f"PRAGMA {name} = {value}")
+    cursor.close()
+
+
+def get_engine():
+    """Return the shared engine, creating it and the schema on first use.
+
+    Nothing touches the database at import time, so commands that never
+    query it (``--help``, argument errors) never pay for it.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_engine(
+                    f"sqlite:///{DB_PATH}",
+                    poolclass=QueuePool,
+                    pool_size=DB_POOL_SIZE,
+                )
+                event.listen(engine, "connect", _apply_profile)
+                init_db(engine)
+                _engine = engine
+    return _engine
+
+
+def use_database(db_path: str) -> None:
+    """Point the engine at another SQLite file, e.g. a scratch benchmark DB.
+
+    The current engine, if any, is disposed; the next query opens (and if
+    needed creates) ``db_path``.
+    """
+    global DB_PATH, _engine, _session_factory
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+        DB_PATH = db_path
+        _engine = _session_factory = None
+
+
+def init_db(engine=None):
+    """Create missing tables and indexes unless the schema is already current."""
+    engine = engine or get_engine()
+    with engine.begin() as connection:
+        version = connection.exec_driver_sql("PRAGMA user_version").scalar()
+        if version == SCHEMA_VERSION:
+            return
+        legacy = _rename_path_tables(connection)
+        rekeyed = _rekey_content_state(connection)
+        _autoincrement_roots(connection)
+        # Scan checkpoints rely on later rows getting higher ids (version 10)
+        if _autoincrement(connection, Base.metadata.tables["root_files"]):
+            _reserve_checkpointed_ids(connection)
+        Base.metadata.create_all(connection)
+        if legacy:
+            migrate_paths(connection, legacy)
+        migrate_indexes(connection)
+        if rekeyed:
+            # Index entries of state rows the new unique index deduplicated
+            connection.exec_driver_sql(
+                "DELETE FROM file_contents "
+                "WHERE rowid NOT IN (SELECT id FROM file_contents_state)"
+            )
+        connection.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+# Tables that stored a full_path per row before paths were normalized
+# (schema version 6, see dl_cli.folders)
+_PATH_TABLES = ("root_files", "root_folders", "file_contents_state")
+
+
+def _rename_path_tables(connection) -> list[str]:
+    """Move tables still holding ``full_path`` columns aside as ``legacy_*``.
+
+    Their indexes are dropped so ``create_all`` can reuse the names.
+    Returns the tables moved; only those the database has, since older
+    schemas predate some of them (``file_contents_state`` for one).
+    """
+    columns = {
+        row[1] for row in connection.exec_driver_sql("PRAGMA table_info(root_files)")
+    }
+    if "full_path" not in columns:
+        return []
+    existing = set(
+        connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        ).scalars()
+    )
+    tables = [table for table in _PATH_TABLES if table in existing]
+    for table in tables:
+        indexes = connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master "
+            "WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (table,),
+        ).scalars().all()
+        for name in indexes:
+            connection.exec_driver_sql(f"DROP INDEX {name}")
+        connection.exec_driver_sql(f"ALTER TABLE {table} RENAME TO legacy_{table}")
+    return tables
+
+
+def _rekey_content_state(connection) -> bool:
+    """Rename ``file_contents_state.file_id`` to ``id`` (schema version 8).
+
+    Index state used to be keyed by ``root_files.id``; it is now keyed by
+    ``(folder_id, name)`` with an id of its own. The values are kept, so
+    they still match the ``file_contents`` rowids. Returns whether the
+    column was renamed.
+    """
+    columns = {
+        row[1]
+        for row in connection.exec_driver_sql("PRAGMA table_info(file_contents_state)")
+    }
+    if "file_id" not in columns:
+        return False
+    connection.exec_driver_sql(
+        "ALTER TABLE file_contents_state RENAME COLUMN file_id TO id"
+    )
+    return True
+
+
+# Tables holding rows of a single root, children before their parents
+_ROOT_TABLES = ("snapshots", "scan_sessions", "root_files", "root_folders")
+
+
+def _autoincrement(connection, table) -> bool:
+    """Rebuild ``table`` with AUTOINCREMENT ids if it was created without.
+
+    Without it SQLite hands out the id of the newest deleted row again.
+    The table's indexes go with the old table; ``migrate_indexes`` adds
+    them back. Returns whether the table was rebuilt.
+    """
+    from sqlalchemy import MetaData
+    from sqlalchemy.schema import CreateTable
+
+    sql = connection.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (table.name,),
+    ).scalar()
+    if sql is None or "AUTOINCREMENT" in sql.upper():
+        return False
+    # Alongside the other tables, so its foreign keys resolve
+    metadata = MetaData()
+    for other in Base.metadata.sorted_tables:
+        if other is not table:
+            other.to_metadata(metadata)
+    rebuilt = table.to_metadata(metadata, name=f"{table.name}_rebuild")
+    columns = ", ".join(column.name for column in rebuilt.columns)
+    connection.execute(CreateTable(rebuilt))
+    connection.exec_driver_sql(
+        f"INSERT INTO {rebuilt.name} ({columns}) SELECT {columns} FROM {table.name}"
+    )
+    connection.exec_driver_sql(f"DROP TABLE {table.name}")
+    connection.exec_driver_sql(f"ALTER TABLE {rebuilt.name} RENAME TO {table.name}")
+    return True
+
+
+def _reserve_checkpointed_ids(connection) -> None:
+    """Start new ``root_files`` ids above every stored scan checkpoint.
+
+    A session interrupted before the rebuild may have checkpointed an id
+    whose rows were deleted since; rows written when it resumes must still
+    get higher ids.
+    """
+    if connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'scan_sessions'"
+    ).first() is None:
+        return
+    checkpointed = connection.exec_driver_sql(
+        "SELECT coalesce(max(last_file_id), 0) FROM scan_sessions"
+    ).scalar()
+    updated = connection.exec_driver_sql(
+        "UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = 'root_files'",
+        (checkpointed,),
+    ).rowcount
+    if not updated and checkpointed:
+        connection.exec_driver_sql(
+            "INSERT INTO sqlite_sequence (name, seq) VALUES ('root_files', ?)",
+            (checkpointed,),
+        )
+
+
+def _autoincrement_roots(connection) -> None:
+    """Rebuild ``roots`` with AUTOINCREMENT ids (schema version 9).
+
+    Otherwise a new root could take the id of the newest deleted one and
+    inherit whatever it left behind. Rows left by roots deleted before
+    ``delete_root`` removed them are dropped here.
+    """
+    from dl_cli.models import RootModel
+
+    if not _autoincrement(connection, RootModel.__table__):
+        return
+
+    tables = set(
+        connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        ).scalars()
+    )
+    orphaned = "root_id NOT IN (SELECT id FROM roots)"
+    if "snapshots" in tables:
+        for table in ("snapshot_files", "snapshot_folders"):
+            connection.exec_driver_sql(
+                f"DELETE FROM {table} WHERE snapshot_id IN "
+                f"(SELECT id FROM snapshots WHERE {orphaned})"
+            )
+    if {"file_contents", "file_contents_state", "root_folders"} <= tables:
+        folders = f"SELECT id FROM root_folders WHERE {orphaned}"
+        connection.exec_driver_sql(
+            "DELETE FROM file_contents WHERE rowid IN (SELECT id FROM "
+            f"file_contents_state WHERE folder_id IN ({folders}))"
+        )
+        connection.exec_driver_sql(
+            f"DELETE FROM file_contents_state WHERE folder_id IN ({folders})"
+        )
+    for table in _ROOT_TABLES:
+        if table in tables:
+            connection.exec_driver_sql(f"DELETE FROM {table} WHERE {orphaned}")
+
+
+def migrate_paths(connection, tables=_PATH_TABLES):
+    """Copy the ``legacy_*`` tables into the normalized layout, then drop them.
+
+    ``tables`` are the ones ``_rename_path_tables`` moved aside. Every
+    directory of a root becomes a ``root_folders`` row, keeping the stats
+    of folders that had a row, and files keep their ids, so the content
+    index and scan checkpoints still line up. Index state is kept for
+    files that have not moved since they were indexed; the next index run
+    rereads the rest. Rows outside their root's path are dropped. The file
+    only shrinks on the next ``VACUUM``.
+    """
+    from dl_cli.folders import FolderTree
+
+    # The directory part of a legacy file path
+    parent = "substr(old.full_path, 1, length(old.full_path) - length(old.name) - 1)"
+    connection.exec_driver_sql(
+        "CREATE TEMP TABLE legacy_folder_ids "
+        "(root_id INTEGER, path TEXT, id INTEGER, PRIMARY KEY (root_id, path))"
+    )
+    listed = f"SELECT DISTINCT {parent} FROM legacy_root_files AS old WHERE old.root_id = ?"
+    if "root_folders" in tables:
+        listed += " UNION SELECT full_path FROM legacy_root_folders WHERE root_id = ?"
+    roots = connection.exec_driver_sql("SELECT id FROM roots").scalars().all()
+    for root_id in roots:
+        folders = FolderTree.load(connection, root_id)
+        paths = connection.exec_driver_sql(
+            listed, (root_id,) * listed.count("?")
+        ).scalars().all()
+        ids = []
+        for path in paths:
+            try:
+                ids.append((root_id, path, folders.ensure(connection, path)))
+            except ValueError:
+                continue
+        if ids:
+            connection.exec_driver_sql(
+                "INSERT INTO legacy_folder_ids VALUES (?, ?, ?)", ids
+            )
+
+    if "root_folders" in tables:
+        connection.exec_driver_sql(
+            "UPDATE root_folders SET size = old.size, "
+            "folder_last_modified = old.folder_last_modified, "
+            "folder_created_at = old.folder_created_at, "
+            "created_at = old.created_at, updated_at = old.updated_at "
+            "FROM legacy_root_folders AS old JOIN legacy_folder_ids AS m "
+            "ON m.root_id = old.root_id AND m.path = old.full_path "
+            "WHERE root_folders.id = m.id"
+        )
+    connection.exec_driver_sql(
+        "INSERT INTO root_files (id, root_id, folder_id, name, extension, size, "
+        "file_last_modified, file_created_at, created_at, updated_at) "
+        "SELECT old.id, old.root_id, m.id, old.name, old.extension, old.size, "
+        "old.file_last_modified, old.file_created_at, old.created_at, old.updated_at "
+        "FROM legacy_root_files AS old JOIN legacy_folder_ids AS m "
+        f"ON m.root_id = old.root_id AND m.path = {parent}"
+    )
+    if "file_contents_state" in tables:
+        connection.exec_driver_sql(
+            "INSERT INTO file_contents_state "
+            "(id, folder_id, name, size, file_last_modified, indexed) "
+            "SELECT s.file_id, f.folder_id, f.name, s.size, s.file_last_modified, s.indexed "
+            "FROM legacy_file_contents_state AS s "
+            "JOIN legacy_root_files AS old "
+            "ON old.id = s.file_id AND old.full_path = s.full_path "
+            "JOIN root_files AS f ON f.id = s.file_id"
+        )
+        connection.exec_driver_sql(
+            "DELETE FROM file_contents "
+            "WHERE rowid NOT IN (SELECT id FROM file_contents_state)"
+        )
+    connection.exec_driver_sql("DROP TABLE legacy_folder_ids")
+    for table in tables:
+        connection.exec_driver_sql(f"DROP TABLE legacy_{table}")
+
+
+def migrate_indexes(connection):
+    """Bring the indexes of an existing database in line with the models.
+
+    ``create_all`` only builds indexes together with new tables. Before a
+    unique index is added, duplicate rows that would violate it are
+    dropped, keeping the newest (highest id) row of each group. Our own
+    ``ix_``/``ux_`` indexes that the models no longer declare are dropped.
+    """
+    existing = {
+        name: table_name
+        for name, table_name in connection.exec_driver_sql(
+            "SELECT name, tbl_name FROM sqlite_master WHERE type = 'index'"
+        )
+    }
+    declared = {
+        index.name for table in Base.metadata.sorted_tables for index in table.indexes
+    }
+    for name, table_name in existing.items():
+        if (
+            name.startswith(("ix_", "ux_"))
+            and name not in declared
+            and table_name in Base.metadata.tables
+        ):
+            connection.exec_driver_sql(f"DROP INDEX {name}")
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            if index.unique:
+                columns = ", ".join(column.name for column in index.columns)
+                connection.exec_driver_sql(
+                    f"DELETE FROM {table.name} WHERE id NOT IN "
+                    f"(SELECT MAX(id) FROM {table.name} GROUP BY {columns})"
+                )
+            index.create(connection)
+
+
+def explain_query_plan(statement, connection=None) -> list[str]:
+    """Return SQLite's ``EXPLAIN QUERY PLAN`` detail lines for a statement."""
+    engine = get_engine()
+    compiled = statement.compile(dialect=engine.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    sql = f"EXPLAIN QUERY PLAN {compiled}"
+    if connection is None:
+        with engine.connect() as connection:
+            rows = connection.exec_driver_sql(sql, params).all()
+    else:
+        rows = connection.exec_driver_sql(sql, params).all()
+    return [row[-1] for row in rows]
 
 
 @contextmanager
 def get_db_session():
     """Provide a transactional scope for a database session."""
-    session = SessionLocal()
+    global _session_factory
+    if _session_factory is None:
+        # Create a configured "Session" class
+        _session_factory = sessionmaker(
+            autocommit=False, autoflush=False, bind=get_engine()
+        )
+    session = _session_factory()
     try:
         yield session
         session.commit()
@@ -32,10 +397,38 @@ def get_db_session():
         session.close()
 
 
-# This will ensure tables are created when the module is imported (e.g., by your CLI)
-# If you prefer to explicitly call it, remove this line and make sure your CLI calls init_db()
-init_db()
+@contextmanager
+def get_db_connection():
+    """Provide a Core connection wrapped in a single transaction."""
+    with get_engine().begin() as connection:
+        yield connection
+
+
+@contextmanager
+def bulk_connection(enabled: bool = True):
+    """Provide a Core connection tuned for large ingests.
 
-# It's better to manage sessions via get_db_session() context manager rather than a global db_instance for operations.
-# The original _db: Engine | None = db line in RootDbManager used a global engine, which is fine for table creation,
-# but actual CRUD operations need a session.
+    ``DB_BULK_PRAGMAS`` are applied for the duration of the block and the
+    previous values restored afterwards, since the connection goes back to
+    the pool. With ``enabled=False`` it is a plain pooled connection.
+    Callers manage transactions with ``connection.begin()``.
+    """
+    with get_engine().connect() as connection:
+        if not enabled:
+            yield connection
+            return
+        previous = {
+            name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in DB_BULK_PRAGMAS
+        }
+        for name, value in DB_BULK_PRAGMAS.items():
+            connection.exec_driver_sql(f"PRAGMA {name} = {value}")
+        # End the autobegun transaction so callers can begin() their own
+        connection.commit()
+        try:
+            yield connection
+        finally:
+            connection.rollback()
+            for name, value in previous.items():
+                connection.exec_driver_sql(f"PRAGMA {name} = {value}")
+            connection.commit()
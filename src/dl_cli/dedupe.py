@@ -0,0 +1,340 @@
+# dl_cli/dedupe.py
+from __future__ import annotations
+
+import hashlib
+import itertools
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import typer
+from dl_cli.config import (
+    HASH_ALGORITHM,
+    HASH_BLOCK_SIZE,
+    HASH_WORKERS,
+    INGEST_BATCH_SIZE,
+)
+
+if TYPE_CHECKING:
+    from dl_cli.schemas import DedupeReportSchema
+
+# Paths per "full_path IN (...)" lookup, well under SQLite's variable limit
+_LOOKUP_CHUNK = 900
+
+
+def partial_hash(path: str, size: int, block_size: int = HASH_BLOCK_SIZE) -> str:
+    """Hash the first and last ``block_size`` bytes of a file.
+
+    Files of up to two blocks are read whole, so for them the result is
+    the same digest ``full_hash`` would return.
+    """
+    digest = hashlib.new(HASH_ALGORITHM)
+    with open(path, "rb") as f:
+        digest.update(f.read(block_size))
+        if size > 2 * block_size:
+            f.seek(size - block_size)
+            digest.update(f.read(block_size))
+        else:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def full_hash(path: str) -> str:
+    """Hash a whole file with chunked ``readinto`` calls into one buffer."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, HASH_ALGORITHM).hexdigest()
+
+
+def _hash_many(
+    pool: ThreadPoolExecutor, func: Callable[..., str], jobs: list[tuple]
+) -> tuple[dict[str, str], int]:
+    """Run ``func(*job)`` for every job; each job starts with the path.
+
+    Returns ``({path: digest}, errors)``; unreadable files are left out.
+    """
+
+    def run(job):
+        try:
+            return job[0], func(*job)
+        except OSError:
+            return job[0], None
+
+    digests, errors = {}, 0
+    for path, digest in pool.map(run, jobs):
+        if digest is None:
+            errors += 1
+        else:
+            digests[path] = digest
+    return digests, errors
+
+
+def _collisions(groups: dict) -> Iterable[list[str]]:
+    return (paths for paths in groups.values() if len(paths) > 1)
+
+
+class DedupeManager:
+    """Finds files with identical content across the scanned roots."""
+
+    @staticmethod
+    def _candidates(
+        root_ids: list[int] | None, min_size: int, extensions: list[str] | None
+    ) -> tuple[int, dict[str, tuple]]:
+        """Return ``(files, {path: (size, mtime)})`` for files whose size
+        is shared with at least one other file."""
+        import sqlalchemy as sa
+        from dl_cli.database import get_db_connection
+        from dl_cli.folders import folder_paths, join_path
+        from dl_cli.models import RootFileModel
+
+        conditions = [RootFileModel.size >= min_size]
+        if root_ids:
+            conditions.append(RootFileModel.root_id.in_(root_ids))
+        if extensions:
+            conditions.append(RootFileModel.extension.in_(extensions))
+
+        paths = folder_paths(root_ids)
+        full_path = join_path(paths.c.path, RootFileModel.name)
+        on_path = paths.c.id == RootFileModel.folder_id
+        shared_sizes = (
+            sa.select(RootFileModel.size)
+            .join(paths, on_path)
+            .where(*conditions)
+            .group_by(RootFileModel.size)
+            .having(sa.func.count(sa.distinct(full_path)) > 1)
+        )
+        with get_db_connection() as connection:
+            files = connection.execute(
+                sa.select(sa.func.count(sa.distinct(full_path)))
+                .join(paths, on_path)
+                .where(*conditions)
+            ).scalar()
+            rows = connection.execute(
+                sa.select(
+                    full_path,
+                    RootFileModel.size,
+                    RootFileModel.file_last_modified,
+                )
+                .join(paths, on_path)
+                .where(*conditions, RootFileModel.size.in_(shared_sizes))
+            )
+            # Overlapping roots can list the same path twice
+            return files, {path: (size, mtime) for path, size, mtime in rows}
+
+    @staticmethod
+    def _cached_hashes(candidates: dict[str, tuple]) -> dict[str, tuple]:
+        """Stored ``(partial, full)`` hashes still valid for the candidates."""
+        import sqlalchemy as sa
+        from dl_cli.database import get_db_connection
+        from dl_cli.models import FileHashModel
+
+        cached = {}
+        with get_db_connection() as connection:
+            for chunk in itertools.batched(candidates, _LOOKUP_CHUNK):
+                rows = connection.execute(
+                    sa.select(
+                        FileHashModel.full_path,
+                        FileHashModel.size,
+                        FileHashModel.file_last_modified,
+                        FileHashModel.partial_hash,
+                        FileHashModel.full_hash,
+                    ).where(FileHashModel.full_path.in_(chunk))
+                )
+                for path, size, mtime, partial, full in rows:
+                    if candidates[path] == (size, mtime):
+                        cached[path] = (partial, full)
+        return cached
+
+    @staticmethod
+    def _store_hashes(
+        candidates: dict[str, tuple],
+        hashes: dict[str, list],
+        batch_size: int = INGEST_BATCH_SIZE,
+    ) -> None:
+        """Upsert newly computed hashes into ``file_hashes``."""
+        from sqlalchemy.dialects.sqlite import insert
+        from dl_cli.database import get_db_connection
+        from dl_cli.models import FileHashModel
+
+        stmt = insert(FileHashModel)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[FileHashModel.full_path],
+            set_={
+                "size": stmt.excluded.size,
+                "file_last_modified": stmt.excluded.file_last_modified,
+                "partial_hash": stmt.excluded.partial_hash,
+                "full_hash": stmt.excluded.full_hash,
+            },
+        )
+        rows = (
+            {
+                "full_path": path,
+                "size": candidates[path][0],
+                "file_last_modified": candidates[path][1],
+                "partial_hash": partial,
+                "full_hash": full,
+            }
+            for path, (partial, full) in hashes.items()
+        )
+        with get_db_connection() as connection:
+            for chunk in itertools.batched(rows, batch_size):
+                connection.execute(stmt, list(chunk))
+
+    @staticmethod
+    def find_duplicates(
+        root_ids: list[int] | None = None,
+        min_size: int = 1,
+        extensions: list[str] | None = None,
+        workers: int = HASH_WORKERS,
+    ) -> DedupeReportSchema:
+        """Group the scanned files of ``root_ids`` (all roots if empty) by content.
+
+        Files are narrowed in three passes: by the size stored in
+        ``root_files``, by a partial hash of their first and last blocks,
+        and only then by a full hash. Hashes are cached in ``file_hashes``
+        and reused while a file's size and mtime are unchanged, so results
+        reflect the last scan of each root.
+        """
+        from dl_cli.schemas import DedupeReportSchema, DuplicateGroupSchema
+
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
+
+        start = time.perf_counter()
+        files, candidates = DedupeManager._candidates(root_ids, min_size, extensions)
+        cached = DedupeManager._cached_hashes(candidates)
+        # path -> [partial, full] for every hash computed in this run
+        computed: dict[str, list] = {}
+        partial_hashed = full_hashed = errors = 0
+        cache_hits = 0
+
+        by_size = defaultdict(list)
+        for path, (size, _) in candidates.items():
+            by_size[size].append(path)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            partials = {}
+            jobs = []
+            for paths in _collisions(by_size):
+                for path in paths:
+                    if path in cached:
+                        partials[path] = cached[path][0]
+                        cache_hits += 1
+                    else:
+                        jobs.append((path, candidates[path][0]))
+            digests, failed = _hash_many(pool, partial_hash, jobs)
+            partial_hashed += len(digests)
+            errors += failed
+            partials.update(digests)
+            for path, digest in digests.items():
+                computed[path] = [digest, None]
+
+            by_partial = defaultdict(list)
+            for path, digest in partials.items():
+                by_partial[candidates[path][0], digest].append(path)
+
+            fulls = {}
+            jobs = []
+            for (size, digest), paths in by_partial.items():
+                if len(paths) < 2:
+                    continue
+                for path in paths:
+                    if size <= 2 * HASH_BLOCK_SIZE:
+                        # The partial hash already covered the whole file
+                        fulls[path] = digest
+                    elif path in cached and cached[path][1]:
+                        fulls[path] = cached[path][1]
+                    else:
+                        jobs.append((path,))
+            digests, failed = _hash_many(pool, full_hash, jobs)
+            full_hashed += len(digests)
+            errors += failed
+            fulls.update(digests)
+            for path, digest in fulls.items():
+                if path in computed:
+                    computed[path][1] = digest
+                elif path in digests:
+                    computed[path] = [partials[path], digest]
+
+        by_full = defaultdict(list)
+        for path, digest in fulls.items():
+            by_full[candidates[path][0], digest].append(path)
+
+        DedupeManager._store_hashes(candidates, computed)
+
+        groups = [
+            DuplicateGroupSchema(size=size, hash=digest, paths=sorted(paths))
+            for (size, digest), paths in by_full.items()
+            if len(paths) > 1
+        ]
+        groups.sort(key=lambda group: (-group.wasted_bytes, group.paths[0]))
+        return DedupeReportSchema(
+            groups=groups,
+            files=files,
+            size_candidates=len(candidates),
+            partial_hashed=partial_hashed,
+            full_hashed=full_hashed,
+            cache_hits=cache_hits,
+            errors=errors,
+            elapsed=time.perf_counter() - start,
+        )
+
+
+# Typer CLI application for duplicate detection
+app = typer.Typer(
+    name="Dedupe",
+    help="find files with identical content across the scanned roots.",
+)
+
+
+@app.command(name="find", help="Report groups of duplicate files.")
+def find(
+    roots: list[str] = typer.Option(
+        None, "--root", "-r", help="Root name to search. Repeat for several; defaults to all."
+    ),
+    min_size: int = typer.Option(
+        1, "--min-size", help="Ignore files smaller than this many bytes."
+    ),
+    extensions: list[str] = typer.Option(
+        None, "--extension", "-e", help="Only compare files with this extension, e.g. .py."
+    ),
+    workers: int = typer.Option(
+        HASH_WORKERS, "--workers", "-w", help="Threads hashing files at once."
+    ),
+    as_json: bool = typer.Option(
+        False, "--json", help="Print the report as JSON."
+    ),
+):
+    """Report groups of duplicate files."""
+    from dl_cli.root_manager import RootDbManager
+
+    try:
+        root_ids = [RootDbManager.get_root(name=name).id for name in roots or ()]
+        report = DedupeManager.find_duplicates(
+            root_ids=root_ids,
+            min_size=min_size,
+            extensions=[e.lower() for e in extensions or ()],
+            workers=workers,
+        )
+    except ValueError as e:
+        typer.echo(f"Error finding duplicates: {e}", err=True)
+        raise typer.Exit(code=1)
+
+    if as_json:
+        typer.echo(report.model_dump_json(indent=2))
+        return
+    for group in report.groups:
+        typer.echo(
+            f"{len(group.paths)} x {group.size} bytes "
+            f"({group.wasted_bytes} wasted) {group.hash[:16]}"
+        )
+        for path in group.paths:
+            typer.echo(f"  {path}")
+    typer.echo(
+        f"{len(report.groups)} duplicate groups, {report.wasted_bytes} bytes wasted. "
+        f"{report.files} files, {report.size_candidates} with a shared size, "
+        f"{report.partial_hashed} partial / {report.full_hashed} full hashes "
+        f"computed, {report.cache_hits} cached, {report.errors} unreadable "
+        f"({report.elapsed:.2f}s)"
+    )
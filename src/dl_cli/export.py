@@ -0,0 +1,290 @@
+# dl_cli/export.py
+from __future__ import annotations
+
+import contextlib
+import csv
+import datetime
+import json
+import sys
+import time
+from typing import TYPE_CHECKING
+
+import typer
+from dl_cli.config import EXPORT_CHUNK_SIZE
+
+if TYPE_CHECKING:
+    from dl_cli.schemas import ExportReportSchema
+
+FORMATS = ("csv", "ndjson", "parquet")
+_SUFFIXES = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".parquet": "parquet"}
+
+# Exported columns per table; timestamps are read as SQLite stores them
+# ("YYYY-MM-DD HH:MM:SS.ffffff", UTC) and never parsed for CSV/NDJSON.
+# full_path is not stored but rebuilt from root_folders (see dl_cli.folders)
+TABLES = {
+    "files": (
+        ("id", "int"),
+        ("root_id", "int"),
+        ("folder_id", "int"),
+        ("full_path", "str"),
+        ("name", "str"),
+        ("extension", "str"),
+        ("size", "int"),
+        ("file_last_modified", "timestamp"),
+        ("file_created_at", "timestamp"),
+    ),
+    "folders": (
+        ("id", "int"),
+        ("root_id", "int"),
+        ("parent_id", "int"),
+        ("full_path", "str"),
+        ("name", "str"),
+        ("size", "int"),
+        ("folder_last_modified", "timestamp"),
+        ("folder_created_at", "timestamp"),
+    ),
+}
+
+
+def format_for(path: str) -> str:
+    """Pick the export format from the output file's suffix."""
+    for suffix, output_format in _SUFFIXES.items():
+        if path.lower().endswith(suffix):
+            return output_format
+    raise ValueError(
+        f"Cannot tell the format of '{path}'; pass --format ({', '.join(FORMATS)})."
+    )
+
+
+@contextlib.contextmanager
+def _open_text(path: str):
+    if path == "-":
+        yield sys.stdout
+        return
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        yield f
+
+
+def _write_csv(path, columns, chunks):
+    rows = 0
+    with _open_text(path) as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for chunk in chunks:
+            writer.writerows(chunk)
+            rows += len(chunk)
+    return rows
+
+
+def _write_ndjson(path, columns, chunks):
+    rows = 0
+    dumps = json.dumps
+    with _open_text(path) as f:
+        for chunk in chunks:
+            f.write("".join(dumps(dict(zip(columns, row))) + "\n" for row in chunk))
+            rows += len(chunk)
+    return rows
+
+
+def _write_parquet(path, table, chunks):
+    """Write one Parquet row group per chunk."""
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError(
+            "Parquet export needs pyarrow: pip install 'dl-cli[parquet]'."
+        ) from None
+    if path == "-":
+        raise ValueError("Parquet cannot be written to stdout; give a file path.")
+
+    types = {"int": pa.int64(), "str": pa.string(), "timestamp": pa.timestamp("us")}
+    schema = pa.schema([(name, types[kind]) for name, kind in TABLES[table]])
+    rows = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in chunks:
+            arrays = []
+            for (name, kind), values in zip(TABLES[table], zip(*chunk)):
+                if kind == "timestamp":
+                    arrays.append(pc.cast(pa.array(values, pa.string()), types[kind]))
+                else:
+                    arrays.append(pa.array(values, types[kind]))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            rows += len(chunk)
+    return rows
+
+
+class ExportManager:
+    """Streams ``root_files``/``root_folders`` rows out to files."""
+
+    @staticmethod
+    def _statement(
+        table: str,
+        root_ids: list[int] | None,
+        extensions: list[str] | None,
+        modified_since: datetime.datetime | None,
+    ):
+        import sqlalchemy as sa
+        from dl_cli.folders import folder_paths, join_path
+        from dl_cli.models import RootFileModel, RootFolderModel
+
+        if table not in TABLES:
+            raise ValueError(f"Unknown table '{table}'. Choose one of: {', '.join(TABLES)}.")
+        paths = folder_paths(root_ids)
+        if table == "files":
+            model = RootFileModel
+            full_path, folder = join_path(paths.c.path, model.name), model.folder_id
+        else:
+            model = RootFolderModel
+            full_path, folder = paths.c.path, model.id
+        columns = []
+        for name, kind in TABLES[table]:
+            column = full_path if name == "full_path" else getattr(model, name)
+            if kind == "timestamp":
+                # Skip DateTime result processing: export the stored text
+                column = sa.type_coerce(column, sa.String)
+            columns.append(column.label(name))
+
+        stmt = (
+            sa.select(*columns)
+            .join(paths, paths.c.id == folder)
+            .order_by(model.id)
+        )
+        if root_ids:
+            stmt = stmt.where(model.root_id.in_(root_ids))
+        if extensions:
+            if table != "files":
+                raise ValueError("Only files can be filtered by extension.")
+            stmt = stmt.where(model.extension.in_(extensions))
+        if modified_since is not None:
+            modified = (
+                model.file_last_modified if table == "files"
+                else model.folder_last_modified
+            )
+            stmt = stmt.where(modified >= modified_since)
+        return stmt
+
+    @staticmethod
+    def export(
+        path: str,
+        table: str = "files",
+        output_format: str | None = None,
+        root_ids: list[int] | None = None,
+        extensions: list[str] | None = None,
+        modified_since: datetime.datetime | None = None,
+        chunk_size: int = EXPORT_CHUNK_SIZE,
+    ) -> ExportReportSchema:
+        """Write the matching rows of ``table`` to ``path`` (``-`` for stdout).
+
+        Rows are fetched ``chunk_size`` at a time from a streaming cursor
+        and each chunk is written before the next is read, so memory is
+        bounded by one chunk whatever the table size. ``modified_since``
+        is a naive UTC datetime, like the stored timestamps.
+        """
+        from dl_cli.database import get_db_connection
+        from dl_cli.schemas import ExportReportSchema
+
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1.")
+        output_format = output_format or format_for(path)
+        if output_format not in FORMATS:
+            raise ValueError(
+                f"Unknown format '{output_format}'. Choose one of: {', '.join(FORMATS)}."
+            )
+        stmt = ExportManager._statement(table, root_ids, extensions, modified_since)
+        columns = [name for name, _ in TABLES[table]]
+
+        start = time.perf_counter()
+        with get_db_connection() as connection:
+            result = connection.execution_options(
+                stream_results=True, yield_per=chunk_size
+            ).execute(stmt)
+            chunks = result.partitions()
+            if output_format == "csv":
+                rows = _write_csv(path, columns, chunks)
+            elif output_format == "ndjson":
+                rows = _write_ndjson(path, columns, chunks)
+            else:
+                rows = _write_parquet(path, table, chunks)
+
+        return ExportReportSchema(
+            table=table,
+            format=output_format,
+            path=path,
+            rows=rows,
+            elapsed=time.perf_counter() - start,
+        )
+
+
+# Typer CLI application for exports
+app = typer.Typer(
+    name="Export",
+    help="write the scanned file and folder inventory to CSV, NDJSON or Parquet.",
+)
+
+
+def _export(table, path, output_format, roots, extensions, modified_since, chunk_size):
+    from dl_cli.root_manager import RootDbManager
+
+    try:
+        root_ids = [RootDbManager.get_root(name=name).id for name in roots or ()]
+        report = ExportManager.export(
+            path,
+            table=table,
+            output_format=output_format,
+            root_ids=root_ids,
+            extensions=[e.lower() for e in extensions or ()],
+            modified_since=modified_since,
+            chunk_size=chunk_size,
+        )
+    except ValueError as e:
+        typer.echo(f"Error exporting {table}: {e}", err=True)
+        raise typer.Exit(code=1)
+    typer.echo(
+        f"Exported {report.rows} {table} to {report.path} as {report.format} "
+        f"in {report.elapsed:.2f}s ({report.rows_per_second:,.0f} rows/s)",
+        err=path == "-",
+    )
+
+
+_PATH = typer.Argument(..., help="Output file, or - for stdout (CSV/NDJSON only).")
+_FORMAT = typer.Option(
+    None, "--format", "-f", help=f"{', '.join(FORMATS)}; defaults to the file suffix."
+)
+_ROOTS = typer.Option(
+    None, "--root", "-r", help="Root name to export. Repeat for several; defaults to all."
+)
+_SINCE = typer.Option(
+    None, "--modified-since", help="Only rows modified at or after this UTC time."
+)
+_CHUNK = typer.Option(
+    EXPORT_CHUNK_SIZE, "--chunk-size", help="Rows fetched and written at a time."
+)
+
+
+@app.command(help="Export root_files.")
+def files(
+    path: str = _PATH,
+    output_format: str = _FORMAT,
+    roots: list[str] = _ROOTS,
+    extensions: list[str] = typer.Option(
+        None, "--extension", "-e", help="Only files with this extension, e.g. .py."
+    ),
+    modified_since: datetime.datetime = _SINCE,
+    chunk_size: int = _CHUNK,
+):
+    """Export root_files."""
+    _export("files", path, output_format, roots, extensions, modified_since, chunk_size)
+
+
+@app.command(help="Export root_folders.")
+def folders(
+    path: str = _PATH,
+    output_format: str = _FORMAT,
+    roots: list[str] = _ROOTS,
+    modified_since: datetime.datetime = _SINCE,
+    chunk_size: int = _CHUNK,
+):
+    """Export root_folders."""
+    _export("folders", path, output_format, roots, None, modified_since, chunk_size)
@@ -0,0 +1,202 @@
+# dl_cli/folders.py
+"""Directory paths stored once per folder instead of once per file.
+
+``root_folders`` holds one row per directory of a root: its own name, its
+parent's id and its ``tree_path``, the ids from the root's top folder down
+to it (``/3/17/42/``). A root's top folder is the one row without a
+parent and is named with the root's whole path. ``root_files`` rows point
+at their directory and store only their own name.
+
+Full paths are rebuilt on demand: in Python by ``FolderTree``, in SQL by
+joining ``folder_paths``. Everything below a folder is the ``tree_path``
+range starting with its own, which the ``(root_id, tree_path)`` index
+answers without looking at any path strings.
+"""
+from __future__ import annotations
+
+import os
+
+import sqlalchemy as sa
+from dl_cli.models import RootFolderModel as Folder
+from dl_cli.models import RootModel
+
+
+def in_subtree(column, tree_path: str):
+    """``column`` (a ``tree_path``) is ``tree_path`` or below it.
+
+    Every such string sorts between ``tree_path`` and the same string with
+    its final "/" bumped to "0", the next character up.
+    """
+    return sa.and_(column >= tree_path, column < tree_path[:-1] + "0")
+
+
+def join_path(parent, name):
+    """SQL for ``os.path.join(parent, name)``, also right for a top of "/"."""
+    return sa.func.rtrim(parent, os.sep, type_=sa.String) + os.sep + name
+
+
+def folder_paths(root_ids: list[int] | None = None):
+    """Recursive CTE of ``(id, path)`` for every folder of ``root_ids``.
+
+    Built from the top folders down through the ``(parent_id, name)``
+    index, so its cost is the number of folders, not files. Join files on
+    ``folder_id`` and take ``join_path(paths.c.path, File.name)``.
+    """
+    top = sa.select(Folder.id, Folder.name.label("path")).where(
+        Folder.parent_id.is_(None)
+    )
+    if root_ids:
+        top = top.where(Folder.root_id.in_(root_ids))
+    paths = top.cte("folder_paths", recursive=True)
+    children = sa.select(Folder.id, join_path(paths.c.path, Folder.name)).join(
+        paths, Folder.parent_id == paths.c.id
+    )
+    return paths.union_all(children)
+
+
+def paths_of(connection, folder_ids) -> dict[int, str]:
+    """Paths of a handful of folders, e.g. those of search hits.
+
+    Two queries however deep they are: the folders' ``tree_path``, then
+    the names of every id on those paths.
+    """
+    if not folder_ids:
+        return {}
+    chains = {
+        id_: [int(part) for part in tree_path.strip("/").split("/")]
+        for id_, tree_path in connection.execute(
+            sa.select(Folder.id, Folder.tree_path).where(Folder.id.in_(folder_ids))
+        )
+    }
+    ancestors = set().union(*chains.values())
+    names = dict(
+        connection.execute(
+            sa.select(Folder.id, Folder.name).where(Folder.id.in_(ancestors))
+        ).all()
+    )
+    return {
+        id_: os.path.join(*(names[part] for part in chain))
+        for id_, chain in chains.items()
+    }
+
+
+class FolderTree:
+    """The folder rows of one root by path, adding missing ones on demand.
+
+    Meant for a single writer: folders it adds are cached, and a rolled
+    back transaction leaves them in the cache, so load a new tree after a
+    failed write.
+    """
+
+    def __init__(self, root_id: int, top: str):
+        self.root_id = root_id
+        self.top = top
+        self._ids = {}
+        self._paths = {}
+        self._tree_paths = {}
+
+    @classmethod
+    def load(cls, connection, root_id: int, under: str | None = None) -> FolderTree:
+        """Read a root's folder rows, or only those at or below ``under``."""
+        top = connection.execute(
+            sa.select(RootModel.path).where(RootModel.id == root_id)
+        ).scalar()
+        if top is None:
+            raise ValueError(f"Root with ID {root_id} not found.")
+        tree = cls(root_id, top)
+
+        stmt = (
+            sa.select(Folder.id, Folder.parent_id, Folder.name, Folder.tree_path)
+            .where(Folder.root_id == root_id)
+            .order_by(Folder.tree_path)
+        )
+        if under is not None:
+            start = tree._find(connection, under)
+            if start is None:
+                return tree
+            stmt = stmt.where(in_subtree(Folder.tree_path, start[1]))
+            # The start folder's parent is not read; seed its path
+            tree._paths[start[2]] = os.path.dirname(under)
+        # Parents sort before their children: their tree_path is a prefix
+        for id_, parent_id, name, tree_path in connection.execute(stmt):
+            parent = tree._paths.get(parent_id)
+            tree._add(id_, name if parent is None else os.path.join(parent, name), tree_path)
+        if under is not None:
+            del tree._paths[start[2]]
+        return tree
+
+    def _find(self, connection, path: str) -> tuple[int, str, int | None] | None:
+        """``(id, tree_path, parent_id)`` of the stored folder at ``path``.
+
+        Walks down from the top folder one ``(parent_id, name)`` index
+        lookup per path component.
+        """
+        if path != self.top and not path.startswith(self.top.rstrip(os.sep) + os.sep):
+            return None
+        parts = [part for part in path[len(self.top):].split(os.sep) if part]
+        found = connection.execute(
+            sa.select(Folder.id, Folder.tree_path, Folder.parent_id).where(
+                Folder.root_id == self.root_id,
+                Folder.parent_id.is_(None),
+                Folder.name == self.top,
+            )
+        ).first()
+        for part in parts:
+            if found is None:
+                return None
+            found = connection.execute(
+                sa.select(Folder.id, Folder.tree_path, Folder.parent_id).where(
+                    Folder.parent_id == found.id, Folder.name == part
+                )
+            ).first()
+        return tuple(found) if found is not None else None
+
+    def _add(self, folder_id: int, path: str, tree_path: str) -> None:
+        self._ids[path] = folder_id
+        self._paths[folder_id] = path
+        self._tree_paths[folder_id] = tree_path
+
+    def get(self, path: str) -> int | None:
+        """Id of the folder at ``path``, if stored."""
+        return self._ids.get(path)
+
+    def path(self, folder_id: int) -> str:
+        return self._paths[folder_id]
+
+    def tree_path(self, folder_id: int) -> str:
+        return self._tree_paths[folder_id]
+
+    def ensure(self, connection, path: str) -> int:
+        """Id of the folder at ``path``, inserting it and missing parents.
+
+        New folders have no size or timestamps yet; incremental scans treat
+        them as changed and list them. Raises ``ValueError`` if ``path`` is
+        not the root's top or below it.
+        """
+        folder_id = self._ids.get(path)
+        if folder_id is not None:
+            return folder_id
+        if path == self.top:
+            parent_id, parent_tree, name = None, "/", path
+        else:
+            parent, name = os.path.split(path)
+            if not name:
+                raise ValueError(f"'{path}' is not inside the root '{self.top}'.")
+            parent_id = self.ensure(connection, parent)
+            parent_tree = self._tree_paths[parent_id]
+
+        # The id is only known after the insert, so tree_path is completed
+        # by an update in the same transaction
+        folder_id = connection.execute(
+            sa.insert(Folder)
+            .values(
+                root_id=self.root_id, parent_id=parent_id, name=name, tree_path=parent_tree
+            )
+            .returning(Folder.id)
+        ).scalar_one()
+        tree_path = f"{parent_tree}{folder_id}/"
+        connection.execute(
+            sa.update(Folder).where(Folder.id == folder_id).values(tree_path=tree_path)
+        )
+        self._add(folder_id, path, tree_path)
+        return folder_id
@@ -0,0 +1,141 @@
+# dl_cli/instrumentation.py
+"""Counters, phase timers and optional profiling for scans.
+
+Code under measurement calls ``get_metrics()`` and reports to whatever it
+returns. Outside ``collecting()`` that is a shared null object whose
+methods do nothing, so instrumented code costs one attribute lookup and
+call per directory or batch. Counts are kept per process: with the
+``process`` executor only the writer's side is recorded.
+"""
+import contextlib
+import cProfile
+import pstats
+import threading
+import time
+from collections import Counter, defaultdict
+
+
+class Metrics:
+    """Thread-safe counters and accumulated phase timings for one run.
+
+    Phase times are summed across threads, so phases that run in
+    parallel can add up to more than the wall-clock time. With
+    ``profile=True``, threads entering ``profile_thread`` are profiled with
+    ``cProfile`` (one profiler per thread before Python 3.12, where a
+    single profiler already sees every thread) and ``dump_profile`` merges
+    the results.
+    """
+
+    enabled = True
+
+    def __init__(self, profile: bool = False):
+        self.profile = profile
+        self.counters = Counter()
+        self.timings = defaultdict(float)
+        self._lock = threading.Lock()
+        self._profiles = []
+        self._profiling = threading.local()
+        self._start = time.perf_counter()
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += n
+
+    def update(self, **counts: int) -> None:
+        """Add several counters under one lock acquisition."""
+        with self._lock:
+            self.counters.update(counts)
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.timings[name] += elapsed
+
+    @contextlib.contextmanager
+    def profile_thread(self):
+        """Profile the current thread for the duration of the block."""
+        if not self.profile or getattr(self._profiling, "active", False):
+            yield
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+ profiles every thread from one profiler, which
+            # is already running and covers this thread too
+            yield
+            return
+        self._profiling.active = True
+        try:
+            yield
+        finally:
+            profiler.disable()
+            self._profiling.active = False
+            with self._lock:
+                self._profiles.append(profiler)
+
+    def dump_profile(self, path: str) -> pstats.Stats | None:
+        """Merge every thread's profile and write it in pstats format."""
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profiler in profiles[1:]:
+            stats.add(profiler)
+        stats.dump_stats(path)
+        return stats
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "elapsed": time.perf_counter() - self._start,
+                "counters": dict(sorted(self.counters.items())),
+                "timings": dict(sorted(self.timings.items())),
+            }
+
+
+class _NullMetrics:
+    """Stand-in used when nothing is collecting; every method is a no-op."""
+
+    enabled = False
+    profile = False
+
+    def count(self, name, n=1):
+        pass
+
+    def update(self, **counts):
+        pass
+
+    def phase(self, name):
+        return _NULL_CONTEXT
+
+    def profile_thread(self):
+        return _NULL_CONTEXT
+
+
+_NULL_CONTEXT = contextlib.nullcontext()
+NULL_METRICS = _NullMetrics()
+_current = NULL_METRICS
+
+
+def get_metrics():
+    """The active ``Metrics``, or the null object when none is collecting."""
+    return _current
+
+
+@contextlib.contextmanager
+def collecting(metrics: Metrics | None = None):
+    """Make ``metrics`` (a new ``Metrics`` by default) active for the block."""
+    global _current
+    previous = _current
+    _current = metrics or Metrics()
+    try:
+        yield _current
+    finally:
+        _current = previous
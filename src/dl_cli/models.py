@@ -1,6 +1,6 @@
 import datetime
 from typing import Any
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import DDL, Column, Integer, String, Text, DateTime, ForeignKey, Index, event
 from sqlalchemy.ext.declarative import declarative_base
 
 
@@ -11,6 +11,8 @@ class RootModel(Base):
     """Represents a root directory in the database."""
 
     __tablename__ = "roots"
+    # Never hand a deleted root's id to a new one
+    __table_args__ = {"sqlite_autoincrement": True}
     id = Column(Integer, primary_key=True, autoincrement=True)
     # Added unique=True for name consistency
     name = Column(String, nullable=False, unique=True)
@@ -32,9 +34,22 @@ class RootFileModel(Base):
     """Represents a file in a root directory."""
 
     __tablename__ = "root_files"
+    __table_args__ = (
+        # One row per name per folder; the folder stands for the directory
+        # part of the path (see dl_cli.folders)
+        Index("ux_root_files_folder_name", "folder_id", "name", unique=True),
+        # Covers the per-extension counts and bytes of the report commands,
+        # and serves every "WHERE root_id = ?"
+        Index("ix_root_files_root_extension_size", "root_id", "extension", "size"),
+        Index("ix_root_files_size", "size"),
+        Index("ix_root_files_last_modified", "file_last_modified"),
+        # Ids are never handed out twice, so rows written after a scan
+        # checkpoint always sort above it (see dl_cli.scan_sessions)
+        {"sqlite_autoincrement": True},
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     root_id = Column(Integer, ForeignKey("roots.id"), nullable=False)
-    full_path = Column(String, nullable=False)
+    folder_id = Column(Integer, ForeignKey("root_folders.id"), nullable=False)
     name = Column(String, nullable=False)
     extension = Column(String, nullable=False)
     size = Column(Integer, nullable=False)
@@ -53,13 +68,22 @@ class RootFolderModel(Base):
     """Represents a folder in a root directory."""
 
     __tablename__ = "root_folders"
+    __table_args__ = (
+        Index("ux_root_folders_parent_name", "parent_id", "name", unique=True),
+        # Subtree lookups: every folder below one is a tree_path range
+        Index("ix_root_folders_root_tree_path", "root_id", "tree_path"),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     root_id = Column(Integer, ForeignKey("roots.id"), nullable=False)
-    full_path = Column(String, nullable=False)
+    # None only for the root's top folder, whose name is the root's path
+    parent_id = Column(Integer, ForeignKey("root_folders.id"), nullable=True)
     name = Column(String, nullable=False)
-    size = Column(Integer, nullable=False)
-    folder_last_modified = Column(DateTime, nullable=False)
-    folder_created_at = Column(DateTime, nullable=False)
+    # Ids from the top folder down to this one, e.g. "/3/17/42/"
+    tree_path = Column(String, nullable=False)
+    # None until an incremental scan lists the folder
+    size = Column(Integer, nullable=True)
+    folder_last_modified = Column(DateTime, nullable=True)
+    folder_created_at = Column(DateTime, nullable=True)
     created_at = Column(
         DateTime, default=datetime.datetime.now(datetime.timezone.utc))
     updated_at = Column(
@@ -69,8 +93,134 @@ class RootFolderModel(Base):
     )
 
 
+class FileHashModel(Base):
+    """Cached content hashes of a file, valid while its size and mtime match."""
+
+    __tablename__ = "file_hashes"
+    __table_args__ = (
+        Index("ux_file_hashes_path", "full_path", unique=True),
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    full_path = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    file_last_modified = Column(DateTime, nullable=False)
+    # Digest of the first and last HASH_BLOCK_SIZE bytes
+    partial_hash = Column(String, nullable=False)
+    # Digest of the whole file, only computed when partial hashes collide
+    full_hash = Column(String, nullable=True)
+
+
+class ContentIndexStateModel(Base):
+    """The ``root_files`` version whose text is in the ``file_contents`` index."""
+
+    __tablename__ = "file_contents_state"
+    __table_args__ = (
+        # A file is known by where it is, not by its root_files.id, which
+        # every full scan reassigns; folder ids survive full scans
+        Index("ux_file_contents_state_folder_name", "folder_id", "name", unique=True),
+    )
+    # Same value as the file_contents rowid
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # The file's root_files folder_id and name; no foreign key, rows outlive
+    # deleted files until the next index run drops them
+    folder_id = Column(Integer, nullable=False)
+    name = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    file_last_modified = Column(DateTime, nullable=False)
+    # 0 when the file was binary or unreadable and has no file_contents row
+    indexed = Column(Integer, nullable=False, default=1)
+
+
+class ScanSessionModel(Base):
+    """One full scan of a root, and the checkpoint it can resume from."""
+
+    __tablename__ = "scan_sessions"
+    __table_args__ = (
+        Index("ix_scan_sessions_root_status", "root_id", "status"),
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    root_id = Column(Integer, ForeignKey("roots.id"), nullable=False)
+    # "running" until it completes; a crashed scan stays "running"
+    status = Column(String, nullable=False, default="running")
+    # Filter options of the walk, as JSON; a resume must use the same ones
+    options = Column(String, nullable=True)
+    # Directories still to list at the last checkpoint, as a JSON list
+    frontier = Column(Text, nullable=True)
+    pending_dirs = Column(Integer, nullable=False, default=0)
+    # Highest root_files.id at the last checkpoint; rows above it were
+    # written after it and are discarded on resume
+    last_file_id = Column(Integer, nullable=False, default=0)
+    rows_written = Column(Integer, nullable=False, default=0)
+    checkpoints = Column(Integer, nullable=False, default=0)
+    resumes = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class SnapshotModel(Base):
+    """The files of a root as one completed full scan left them."""
+
+    __tablename__ = "snapshots"
+    __table_args__ = (
+        Index("ix_snapshots_root", "root_id", "id"),
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    root_id = Column(Integer, ForeignKey("roots.id"), nullable=False)
+    session_id = Column(Integer, ForeignKey("scan_sessions.id"), nullable=True)
+    files = Column(Integer, nullable=False, default=0)
+    bytes = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False)
+
+
+class SnapshotFolderModel(Base):
+    """A folder's path as of a snapshot.
+
+    Keyed by path, so a snapshot's files are read in path order by walking
+    this table and, per folder, its ``snapshot_files`` rows by name.
+    """
+
+    __tablename__ = "snapshot_folders"
+    __table_args__ = {"sqlite_with_rowid": False}
+    snapshot_id = Column(Integer, ForeignKey("snapshots.id"), primary_key=True)
+    path = Column(String, primary_key=True)
+    # root_folders.id at the time; only used to find the folder's files
+    folder_id = Column(Integer, nullable=False)
+
+
+class SnapshotFileModel(Base):
+    """A file's size and mtime as of a snapshot."""
+
+    __tablename__ = "snapshot_files"
+    # Without a rowid the key is the table, so each name is stored once
+    __table_args__ = {"sqlite_with_rowid": False}
+    snapshot_id = Column(Integer, ForeignKey("snapshots.id"), primary_key=True)
+    folder_id = Column(Integer, primary_key=True)
+    name = Column(String, primary_key=True)
+    size = Column(Integer, nullable=False)
+    file_last_modified = Column(DateTime, nullable=False)
+
+
+# FTS5 index of file text, rowid = file_contents_state.id. Virtual tables cannot be
+# declared as models, so it is created alongside the metadata.
+event.listen(
+    Base.metadata,
+    "after_create",
+    DDL(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS file_contents "
+        "USING fts5(content, tokenize = 'unicode61')"
+    ),
+)
+
+
 __all__ = [
     "RootModel",
     "RootFileModel",
     "RootFolderModel",
+    "FileHashModel",
+    "ContentIndexStateModel",
+    "ScanSessionModel",
+    "SnapshotModel",
+    "SnapshotFolderModel",
+    "SnapshotFileModel",
 ]
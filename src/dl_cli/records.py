@@ -0,0 +1,83 @@
+# dl_cli/records.py
+import datetime
+import sys
+from collections.abc import Mapping
+
+
+def to_db_datetime(timestamp: float) -> datetime.datetime:
+    """Convert a ``stat`` timestamp to the naive UTC datetime stored in the DB."""
+    return datetime.datetime.fromtimestamp(
+        timestamp, datetime.timezone.utc
+    ).replace(tzinfo=None)
+
+
+class FileRecord:
+    """One scanned file, as produced by the scanner and consumed by the DB.
+
+    Uses ``__slots__`` instead of a per-record dict, which cuts the
+    container from a few hundred bytes to under a hundred, and the
+    ``parent`` and ``extension`` strings are interned so every file in a
+    directory (or of a type) shares a single string object.
+    """
+
+    __slots__ = ("path", "name", "size", "modified", "created", "extension", "parent")
+
+    def __init__(
+        self,
+        path: str,
+        name: str,
+        size: int,
+        modified: float,
+        created: float,
+        extension: str,
+        parent: str,
+    ):
+        self.path = path
+        self.name = name
+        self.size = size
+        self.modified = modified
+        self.created = created
+        self.extension = sys.intern(extension)
+        self.parent = sys.intern(parent)
+
+    @classmethod
+    def coerce(cls, record: "FileRecord | Mapping") -> "FileRecord":
+        """Accept a ``FileRecord`` or a legacy scanner dict."""
+        if isinstance(record, cls):
+            return record
+        return cls(
+            record["path"],
+            record["name"],
+            record["size"],
+            record["modified"],
+            record.get("created", record["modified"]),
+            record["extension"],
+            record["parent"],
+        )
+
+    def to_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def to_row(self, root_id: int, folder_id: int) -> dict:
+        """The ``root_files`` row for this file, in the folder ``folder_id``."""
+        return {
+            "root_id": root_id,
+            "folder_id": folder_id,
+            "name": self.name,
+            "extension": self.extension,
+            "size": self.size,
+            "file_last_modified": to_db_datetime(self.modified),
+            "file_created_at": to_db_datetime(self.created),
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, FileRecord):
+            return NotImplemented
+        return all(
+            getattr(self, slot) == getattr(other, slot) for slot in self.__slots__
+        )
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"<FileRecord(path='{self.path}', size={self.size})>"
@@ -0,0 +1,293 @@
+# dl_cli/report.py
+from __future__ import annotations
+
+import csv
+import itertools
+import sys
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
+
+import typer
+
+if TYPE_CHECKING:
+    from dl_cli.schemas import (
+        ExtensionStatSchema,
+        FolderTotalSchema,
+        LargestFileSchema,
+        RootTotalSchema,
+    )
+
+# Rows fetched from SQLite at a time while a report streams
+REPORT_FETCH_SIZE = 1000
+FORMATS = ("table", "csv", "json")
+
+
+class ReportManager:
+    """Aggregate queries over ``root_files``, computed inside SQLite.
+
+    Every report is one GROUP BY/ORDER BY/LIMIT statement whose rows are
+    streamed back, so Python only ever holds the rows being printed.
+    """
+
+    @staticmethod
+    def _stream(stmt, schema) -> Iterator:
+        from dl_cli.conversion import validate_rows
+        from dl_cli.database import get_db_connection
+
+        with get_db_connection() as connection:
+            rows = connection.execution_options(
+                yield_per=REPORT_FETCH_SIZE
+            ).execute(stmt)
+            for partition in rows.partitions():
+                yield from validate_rows(schema, partition)
+
+    @staticmethod
+    def extensions(
+        root_ids: list[int] | None = None,
+        order_by: str = "files",
+        limit: int | None = None,
+    ) -> Iterator[ExtensionStatSchema]:
+        """File count and total bytes per extension, largest first.
+
+        Answered from the ``(root_id, extension, size)`` index alone.
+        """
+        import sqlalchemy as sa
+        from dl_cli.models import RootFileModel as File
+        from dl_cli.schemas import ExtensionStatSchema
+
+        if order_by not in ("files", "bytes"):
+            raise ValueError("order_by must be 'files' or 'bytes'.")
+        files = sa.func.count().label("files")
+        total = sa.func.coalesce(sa.func.sum(File.size), 0).label("bytes")
+        stmt = (
+            sa.select(File.extension, files, total)
+            .group_by(File.extension)
+            .order_by((files if order_by == "files" else total).desc(), File.extension)
+            .limit(limit)
+        )
+        if root_ids:
+            stmt = stmt.where(File.root_id.in_(root_ids))
+        return ReportManager._stream(stmt, ExtensionStatSchema)
+
+    @staticmethod
+    def largest_files(
+        root_ids: list[int] | None = None, limit: int = 20
+    ) -> Iterator[LargestFileSchema]:
+        """The ``limit`` biggest files, read in order from the size index.
+
+        Paths are rebuilt for those files only, after the limit.
+        """
+        import sqlalchemy as sa
+        from dl_cli.folders import folder_paths, join_path
+        from dl_cli.models import RootFileModel as File
+        from dl_cli.schemas import LargestFileSchema
+
+        largest = (
+            sa.select(File.root_id, File.folder_id, File.name, File.size, File.file_last_modified)
+            .order_by(File.size.desc())
+            .limit(limit)
+        )
+        if root_ids:
+            largest = largest.where(File.root_id.in_(root_ids))
+        largest = largest.subquery()
+        paths = folder_paths(root_ids)
+        stmt = (
+            sa.select(
+                largest.c.root_id,
+                join_path(paths.c.path, largest.c.name).label("full_path"),
+                largest.c.size,
+                largest.c.file_last_modified,
+            )
+            .join(paths, paths.c.id == largest.c.folder_id)
+            .order_by(largest.c.size.desc())
+        )
+        return ReportManager._stream(stmt, LargestFileSchema)
+
+    @staticmethod
+    def largest_folders(
+        root_ids: list[int] | None = None, limit: int = 20
+    ) -> Iterator[FolderTotalSchema]:
+        """Folders ranked by the bytes of the files directly inside them."""
+        import sqlalchemy as sa
+        from dl_cli.folders import folder_paths
+        from dl_cli.models import RootFileModel as File
+        from dl_cli.schemas import FolderTotalSchema
+
+        total = sa.func.sum(File.size).label("bytes")
+        totals = (
+            sa.select(
+                File.root_id, File.folder_id, sa.func.count().label("files"), total
+            )
+            .group_by(File.folder_id)
+            .order_by(total.desc())
+            .limit(limit)
+        )
+        if root_ids:
+            totals = totals.where(File.root_id.in_(root_ids))
+        totals = totals.subquery()
+        paths = folder_paths(root_ids)
+        stmt = (
+            sa.select(
+                totals.c.root_id,
+                paths.c.path.label("full_path"),
+                totals.c.files,
+                totals.c.bytes,
+            )
+            .join(paths, paths.c.id == totals.c.folder_id)
+            .order_by(totals.c.bytes.desc())
+        )
+        return ReportManager._stream(stmt, FolderTotalSchema)
+
+    @staticmethod
+    def root_totals() -> Iterator[RootTotalSchema]:
+        """File count, bytes and newest mtime of every root."""
+        import sqlalchemy as sa
+        from dl_cli.models import RootFileModel as File
+        from dl_cli.models import RootModel as Root
+        from dl_cli.schemas import RootTotalSchema
+
+        totals = (
+            sa.select(
+                File.root_id,
+                sa.func.count().label("files"),
+                sa.func.sum(File.size).label("bytes"),
+                sa.func.max(File.file_last_modified).label("last_modified"),
+            )
+            .group_by(File.root_id)
+            .subquery()
+        )
+        stmt = (
+            sa.select(
+                Root.id.label("root_id"),
+                Root.name,
+                Root.path,
+                sa.func.coalesce(totals.c.files, 0).label("files"),
+                sa.func.coalesce(totals.c.bytes, 0).label("bytes"),
+                totals.c.last_modified,
+            )
+            .outerjoin(totals, totals.c.root_id == Root.id)
+            .order_by(Root.id)
+        )
+        return ReportManager._stream(stmt, RootTotalSchema)
+
+
+# Typer CLI application for reports
+app = typer.Typer(
+    name="Report",
+    help="summarise the scanned files with queries that run inside SQLite.",
+)
+
+
+def _root_ids(names: list[str] | None) -> list[int]:
+    from dl_cli.root_manager import RootDbManager
+
+    return [RootDbManager.get_root(name=name).id for name in names or ()]
+
+
+def _emit(rows: Iterator, columns: list[str], output_format: str) -> None:
+    """Print report rows as they arrive, in the chosen format."""
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown format '{output_format}'. Choose one of: {', '.join(FORMATS)}.")
+    if output_format == "json":
+        for row in rows:
+            typer.echo(row.model_dump_json(include=set(columns)))
+        return
+    if output_format == "csv":
+        writer = csv.writer(sys.stdout)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow([getattr(row, column) for column in columns])
+        return
+    first = next(rows, None)
+    if first is None:
+        typer.echo("No rows.")
+        return
+    # The table streams, so widths come from the header and first row:
+    # numbers right-aligned, text padded except in the last column
+    widths = {}
+    for c in columns:
+        value = getattr(first, c)
+        if isinstance(value, int):
+            widths[c] = f">{max(14, len(c))},"
+        elif c != columns[-1]:
+            widths[c] = f"<{max(12, len(c), len(str(value)))}"
+        else:
+            widths[c] = ""
+    typer.echo("  ".join(format(c, widths[c].rstrip(",")) for c in columns))
+    for row in itertools.chain([first], rows):
+        typer.echo("  ".join(
+            format(getattr(row, c), widths[c]) if widths[c].endswith(",")
+            else format(str(getattr(row, c)), widths[c])
+            for c in columns
+        ))
+
+
+def _run(label: str, rows, columns: list[str], output_format: str) -> None:
+    try:
+        _emit(rows, columns, output_format)
+    except ValueError as e:
+        typer.echo(f"Error reporting {label}: {e}", err=True)
+        raise typer.Exit(code=1)
+
+
+_ROOTS = typer.Option(
+    None, "--root", "-r", help="Root name to include. Repeat for several; defaults to all."
+)
+_FORMAT = typer.Option("table", "--format", "-f", help=f"Output format: {', '.join(FORMATS)}.")
+
+
+@app.command(help="File count and bytes per extension.")
+def extensions(
+    roots: list[str] = _ROOTS,
+    order_by: str = typer.Option("files", "--order-by", help="Rank by 'files' or 'bytes'."),
+    limit: int = typer.Option(None, "--limit", "-l", help="Show only the top N extensions."),
+    output_format: str = _FORMAT,
+):
+    """File count and bytes per extension."""
+    try:
+        rows = ReportManager.extensions(_root_ids(roots), order_by=order_by, limit=limit)
+    except ValueError as e:
+        typer.echo(f"Error reporting extensions: {e}", err=True)
+        raise typer.Exit(code=1)
+    _run("extensions", rows, ["extension", "files", "bytes"], output_format)
+
+
+@app.command(help="The largest files.")
+def largest(
+    roots: list[str] = _ROOTS,
+    limit: int = typer.Option(20, "--limit", "-l", help="Number of files to show."),
+    output_format: str = _FORMAT,
+):
+    """The largest files."""
+    try:
+        rows = ReportManager.largest_files(_root_ids(roots), limit=limit)
+    except ValueError as e:
+        typer.echo(f"Error reporting largest files: {e}", err=True)
+        raise typer.Exit(code=1)
+    _run("largest files", rows, ["size", "file_last_modified", "full_path"], output_format)
+
+
+@app.command(help="Folders holding the most bytes in files directly inside them.")
+def folders(
+    roots: list[str] = _ROOTS,
+    limit: int = typer.Option(20, "--limit", "-l", help="Number of folders to show."),
+    output_format: str = _FORMAT,
+):
+    """Folders holding the most bytes in files directly inside them."""
+    try:
+        rows = ReportManager.largest_folders(_root_ids(roots), limit=limit)
+    except ValueError as e:
+        typer.echo(f"Error reporting folders: {e}", err=True)
+        raise typer.Exit(code=1)
+    _run("folders", rows, ["bytes", "files", "full_path"], output_format)
+
+
+@app.command(help="File count, bytes and newest file of every root.")
+def roots(output_format: str = _FORMAT):
+    """File count, bytes and newest file of every root."""
+    _run(
+        "roots",
+        ReportManager.root_totals(),
+        ["root_id", "name", "files", "bytes", "last_modified", "path"],
+        output_format,
+    )
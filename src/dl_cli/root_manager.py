@@ -1,12 +1,95 @@
 # dl_cli/root_manager.py
+from __future__ import annotations
+
+import datetime
+import itertools
+import os
+import time
+from collections.abc import Iterable, Iterator, Mapping
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-# Import for handling unique constraint errors
-from sqlalchemy.exc import IntegrityError  # noqa: F401
 import typer
-from dl_cli.models import RootModel
-from dl_cli.schemas import RootSchema
-from dl_cli.database import get_db_session
+from dl_cli.config import INGEST_BATCH_SIZE, INGEST_BULK_LOAD
+from dl_cli.instrumentation import get_metrics
+from dl_cli.records import FileRecord, to_db_datetime
+
+# SQLAlchemy, pydantic and the database layer are imported inside the
+# functions that use them, so building the CLI (and ``--help``) stays cheap.
+if TYPE_CHECKING:
+    from dl_cli.folders import FolderTree
+    from dl_cli.schemas import (
+        IngestReportSchema,
+        RootChangesSchema,
+        RootFileSchema,
+        RootFolderSchema,
+        RootOverlapSchema,
+        RootSchema,
+        SyncReportSchema,
+    )
+
+
+def _file_row(connection, folders: FolderTree, record: FileRecord | Mapping) -> dict:
+    """Map a scanner file record onto a ``root_files`` row.
+
+    The record's directory is looked up in ``folders``, and added to
+    ``root_folders`` through ``connection`` if it is new.
+    """
+    record = FileRecord.coerce(record)
+    return record.to_row(folders.root_id, folders.ensure(connection, record.parent))
+
+
+def _folder_row(record: Mapping) -> dict:
+    """Map a scanner folder record onto the stats of its ``root_folders`` row."""
+    return {
+        "size": record["size"],
+        "folder_last_modified": to_db_datetime(record["modified"]),
+        "folder_created_at": to_db_datetime(record["created"]),
+    }
+
+
+def _execute_batched(
+    stmt, items: Iterable, batch_size: int, prepare=None
+) -> tuple[int, int]:
+    """Execute ``stmt`` as executemany over ``items``, one transaction per chunk.
+
+    ``prepare(connection, chunk)``, if given, turns each chunk of items
+    into its rows inside the chunk's transaction, so it can write rows
+    they depend on first. Returns ``(rows, batches)``.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1.")
+
+    from dl_cli.database import bulk_connection
+
+    count = batches = 0
+    with bulk_connection(INGEST_BULK_LOAD) as connection:
+        for chunk in itertools.batched(items, batch_size):
+            with connection.begin():
+                rows = prepare(connection, chunk) if prepare else list(chunk)
+                connection.execute(stmt, rows)
+            count += len(chunk)
+            batches += 1
+    get_metrics().update(rows_written=count, transactions=batches)
+    return count, batches
+
+
+# Results of get_root/list_roots while a daemon serves commands (see
+# dl_cli.daemon), which empties it whenever the database changes; None
+# when caching is off, as it is for a single CLI call
+_root_cache: dict | None = None
+
+
+def cache_roots(enabled: bool = True) -> None:
+    """Turn the root lookup cache on, empty, or off."""
+    global _root_cache
+    _root_cache = {} if enabled else None
+
+
+def forget_roots() -> None:
+    """Empty the root lookup cache, if it is on."""
+    if _root_cache is not None:
+        _root_cache.clear()
 
 
 class RootDbManager:
@@ -15,9 +98,14 @@ class RootDbManager:
     @staticmethod
     def create_root(path: str, name: str | None = None) -> RootSchema:
         """Create a new root directory."""
+        from dl_cli.database import get_db_session
+        from dl_cli.models import RootModel
+        from dl_cli.schemas import RootSchema
+
         _path = Path(path)
         if not _path.is_dir():
             raise ValueError(f"The path '{_path}' is not a valid directory.")
+        forget_roots()
 
         resolved_path = str(_path.resolve())
         root_name = name or _path.name
@@ -44,46 +132,145 @@ class RootDbManager:
             # Refresh to load default values like created_at, updated_at
             session.refresh(new_root)
             # Use () with Pydantic v2+ # THIS IS DEPRICATED
-            return RootSchema(**new_root)
+            return RootSchema.model_validate(new_root)
 
     @staticmethod
-    def get_root(name: str | None = None, path: str | None = None) -> "RootSchema":
+    def get_root(name: str | None = None, path: str | None = None) -> RootSchema:
         """Get a root directory by name or path."""
-        with get_db_session() as session:
-            if name:
-                root = session.query(RootModel).filter_by(name=name).first()
-            elif path:
-                _path = Path(path)
-                root = (
-                    session.query(RootModel)
-                    .filter_by(path=str(_path.resolve()))
-                    .first()
-                )
-            else:
-                raise ValueError("Either name or path must be provided.")
+        from dl_cli.database import get_db_session
+        from dl_cli.models import RootModel
+        from dl_cli.schemas import RootSchema
+
+        if name:
+            key = ("name", name)
+        elif path:
+            key = ("path", str(Path(path).resolve()))
+        else:
+            raise ValueError("Either name or path must be provided.")
+        if _root_cache is not None and key in _root_cache:
+            return _root_cache[key]
 
+        with get_db_session() as session:
+            root = session.query(RootModel).filter_by(**{key[0]: key[1]}).first()
             if not root:
                 # Provide more specific error message based on what was searched
                 search_term = f"name '{name}'" if name else f"path '{path}'"
                 raise ValueError(f"Root with {search_term} not found.")
 
-            return RootSchema(**root)
+            found = RootSchema.model_validate(root)
+        if _root_cache is not None:
+            _root_cache[key] = found
+        return found
 
     @staticmethod
     def list_roots() -> list[RootSchema]:
         """List all root directories."""
+        from dl_cli.conversion import validate_rows
+        from dl_cli.database import get_db_session
+        from dl_cli.models import RootModel
+        from dl_cli.schemas import RootSchema
+
+        if _root_cache is not None and ("list",) in _root_cache:
+            return list(_root_cache[("list",)])
         with get_db_session() as session:
-            roots = session.query(RootModel).all()
-            return [RootSchema(**root) for root in roots]
+            roots = validate_rows(RootSchema, session.query(RootModel).all())
+        if _root_cache is not None:
+            _root_cache[("list",)] = roots
+            return list(roots)
+        return roots
+
+    @staticmethod
+    def find_overlaps(path: str, exclude_id: int | None = None) -> RootOverlapSchema:
+        """Registered roots that contain ``path`` or lie below it.
+
+        Nested roots are allowed; full scans walk a shared subtree once
+        and store its files under every root that contains them.
+        """
+        from dl_cli.root_tree import RootTree
+        from dl_cli.schemas import RootOverlapSchema
+
+        roots = {
+            root.id: root for root in RootDbManager.list_roots() if root.id != exclude_id
+        }
+        tree = RootTree((root.id, root.path) for root in roots.values())
+        resolved = str(Path(path).resolve())
+        at = tree.root_at(resolved)
+        return RootOverlapSchema(
+            contained_in=[roots[id_] for id_ in tree.containing(resolved) if id_ != at],
+            contains=[roots[id_] for id_ in tree.below(resolved)],
+        )
 
     @staticmethod
     def delete_root(root_id: int) -> None:
-        """Delete a root directory by its ID."""
+        """Delete a root directory by its ID, with everything stored for it.
+
+        Its files, folders, scan sessions, snapshots, content index entries
+        and cached hashes of files no other root covers go in the same
+        transaction. Root ids are never reused, so nothing left behind
+        could be taken for a later root's.
+        """
+        import sqlalchemy as sa
+        from dl_cli.database import get_db_session
+        from dl_cli.folders import in_subtree
+        from dl_cli.models import (
+            ContentIndexStateModel as State,
+            FileHashModel,
+            RootFileModel,
+            RootFolderModel,
+            RootModel,
+            ScanSessionModel,
+            SnapshotFileModel,
+            SnapshotFolderModel,
+            SnapshotModel,
+        )
+
+        forget_roots()
         with get_db_session() as session:
             # .get() is for primary key lookup
             root = session.query(RootModel).get(root_id)
             if not root:
                 raise ValueError(f"Root with ID {root_id} not found.")
+
+            folders = sa.select(RootFolderModel.id).where(
+                RootFolderModel.root_id == root_id
+            )
+            session.execute(
+                sa.text(
+                    "DELETE FROM file_contents WHERE rowid IN "
+                    "(SELECT id FROM file_contents_state WHERE folder_id IN "
+                    "(SELECT id FROM root_folders WHERE root_id = :root_id))"
+                ),
+                {"root_id": root_id},
+            )
+            session.execute(sa.delete(State).where(State.folder_id.in_(folders)))
+
+            # Hashes are cached by path: keep those another root still covers
+            prefix = root.path.rstrip(os.sep) + os.sep
+            others = [
+                path.rstrip(os.sep) + os.sep
+                for path in session.execute(
+                    sa.select(RootModel.path).where(RootModel.id != root_id)
+                ).scalars()
+            ]
+            if not any(prefix.startswith(other) for other in others):
+                nested = [other for other in others if other.startswith(prefix)]
+                session.execute(
+                    sa.delete(FileHashModel).where(
+                        in_subtree(FileHashModel.full_path, prefix),
+                        *(
+                            sa.not_(in_subtree(FileHashModel.full_path, other))
+                            for other in nested
+                        ),
+                    )
+                )
+
+            snapshots = sa.select(SnapshotModel.id).where(
+                SnapshotModel.root_id == root_id
+            )
+            for model in (SnapshotFileModel, SnapshotFolderModel):
+                session.execute(sa.delete(model).where(model.snapshot_id.in_(snapshots)))
+            for model in (SnapshotModel, ScanSessionModel, RootFileModel, RootFolderModel):
+                session.execute(sa.delete(model).where(model.root_id == root_id))
             session.delete(root)
 
     @staticmethod
@@ -91,6 +278,11 @@ class RootDbManager:
         root_id: int, name: str | None = None, path: str | None = None
     ) -> RootSchema:
         """Update an existing root directory."""
+        from dl_cli.database import get_db_session
+        from dl_cli.models import RootFolderModel, RootModel
+        from dl_cli.schemas import RootSchema
+
+        forget_roots()
         with get_db_session() as session:
             root = session.query(RootModel).get(root_id)
             if not root:
@@ -125,13 +317,317 @@ class RootDbManager:
                     raise ValueError(
                         f"A root for the path '{resolved_new_path}' already exists."
                     )
+                # Stored paths hang off the top folder, named after the root
+                session.query(RootFolderModel).filter(
+                    RootFolderModel.root_id == root_id,
+                    RootFolderModel.parent_id.is_(None),
+                ).update({RootFolderModel.name: resolved_new_path})
                 root.path = resolved_new_path
 
             # Add back to session if not already tracked (e.g., if detached)
             session.add(root)
             session.flush()  # Ensure changes are visible for refresh
             session.refresh(root)  # Refresh to get updated_at value
-            return RootSchema(**root)
+            return RootSchema.model_validate(root)
+
+    @staticmethod
+    def folder_tree(root_id: int) -> FolderTree:
+        """Load a root's ``root_folders`` rows, e.g. to reuse across ``add_files`` calls."""
+        from dl_cli.database import get_db_connection
+        from dl_cli.folders import FolderTree
+
+        with get_db_connection() as connection:
+            return FolderTree.load(connection, root_id)
+
+    @staticmethod
+    def add_files(
+        root_id: int,
+        files: Iterable[FileRecord | Mapping],
+        batch_size: int = INGEST_BATCH_SIZE,
+        folders: FolderTree | None = None,
+    ) -> IngestReportSchema:
+        """Bulk-insert scanned file records into ``root_files``.
+
+        ``files`` is consumed lazily and written in chunks of ``batch_size``
+        rows, each chunk as one Core executemany in its own transaction, so
+        memory stays flat however many records the iterator yields.
+        Directories not yet in ``root_folders`` are added as they come up.
+        Pass the root's ``folders`` from ``folder_tree`` when calling this
+        once per batch, so they are not read again every time.
+        """
+        import sqlalchemy as sa
+        from dl_cli.models import RootFileModel
+        from dl_cli.schemas import IngestReportSchema
+
+        start = time.perf_counter()
+        if folders is None:
+            folders = RootDbManager.folder_tree(root_id)
+        rows, batches = _execute_batched(
+            sa.insert(RootFileModel),
+            files,
+            batch_size,
+            lambda connection, chunk: [
+                _file_row(connection, folders, record) for record in chunk
+            ],
+        )
+        return IngestReportSchema(
+            root_id=root_id,
+            rows=rows,
+            batches=batches,
+            batch_size=batch_size,
+            elapsed=time.perf_counter() - start,
+        )
+
+    @staticmethod
+    def clear_files(root_id: int) -> int:
+        """Delete every ``root_files`` row of a root, returning the count."""
+        import sqlalchemy as sa
+        from dl_cli.database import get_db_connection
+        from dl_cli.models import RootFileModel
+
+        with get_db_connection() as connection:
+            result = connection.execute(
+                sa.delete(RootFileModel).where(RootFileModel.root_id == root_id)
+            )
+        get_metrics().update(rows_deleted=result.rowcount, transactions=1)
+        return result.rowcount
+
+    @staticmethod
+    def _iter_rows(model, schema, root_id, batch_size, validate):
+        import sqlalchemy as sa
+        from dl_cli.conversion import construct_rows, validate_rows
+        from dl_cli.database import get_db_connection
+        from dl_cli.folders import folder_paths, join_path
+        from dl_cli.models import RootFileModel
+
+        convert = validate_rows if validate else construct_rows
+        paths = folder_paths([root_id])
+        if model is RootFileModel:
+            full_path, folder = join_path(paths.c.path, model.name), model.folder_id
+        else:
+            full_path, folder = paths.c.path, model.id
+        columns = [
+            full_path.label(name) if name == "full_path" else getattr(model, name)
+            for name in schema.model_fields
+        ]
+        with get_db_connection() as connection:
+            result = connection.execution_options(yield_per=batch_size).execute(
+                sa.select(*columns)
+                .join(paths, paths.c.id == folder)
+                .where(model.root_id == root_id)
+                .order_by(model.id)
+            )
+            for partition in result.partitions():
+                yield convert(schema, partition)
+
+    @staticmethod
+    def iter_files(
+        root_id: int, batch_size: int = INGEST_BATCH_SIZE, validate: bool = False
+    ) -> Iterator[list[RootFileSchema]]:
+        """Stream a root's ``root_files`` rows as schema lists of ``batch_size``.
+
+        Rows are trusted and built without validation unless ``validate``.
+        """
+        from dl_cli.models import RootFileModel
+        from dl_cli.schemas import RootFileSchema
+
+        return RootDbManager._iter_rows(
+            RootFileModel, RootFileSchema, root_id, batch_size, validate
+        )
+
+    @staticmethod
+    def iter_folders(
+        root_id: int, batch_size: int = INGEST_BATCH_SIZE, validate: bool = False
+    ) -> Iterator[list[RootFolderSchema]]:
+        """Stream a root's ``root_folders`` rows, like ``iter_files``."""
+        from dl_cli.models import RootFolderModel
+        from dl_cli.schemas import RootFolderSchema
+
+        return RootDbManager._iter_rows(
+            RootFolderModel, RootFolderSchema, root_id, batch_size, validate
+        )
+
+    @staticmethod
+    def get_folder_states(root_id: int) -> dict[str, tuple[int, datetime.datetime]]:
+        """Map each stored folder path of a root to its ``(id, last_modified)``.
+
+        ``last_modified`` is None for folders no incremental scan has listed.
+        """
+        import sqlalchemy as sa
+        from dl_cli.database import get_db_connection
+        from dl_cli.folders import FolderTree
+        from dl_cli.models import RootFolderModel
+
+        with get_db_connection() as connection:
+            folders = FolderTree.load(connection, root_id)
+            rows = connection.execute(
+                sa.select(
+                    RootFolderModel.id, RootFolderModel.folder_last_modified
+                ).where(RootFolderModel.root_id == root_id)
+            )
+            return {folders.path(id_): (id_, modified) for id_, modified in rows}
+
+    @staticmethod
+    def get_file_states(folder_id: int) -> dict[str, tuple[int, int, datetime.datetime]]:
+        """Map the names of one folder's files to ``(id, size, last_modified)``."""
+        import sqlalchemy as sa
+        from dl_cli.database import get_db_connection
+        from dl_cli.models import RootFileModel
+
+        with get_db_connection() as connection:
+            rows = connection.execute(
+                sa.select(
+                    RootFileModel.name,
+                    RootFileModel.id,
+                    RootFileModel.size,
+                    RootFileModel.file_last_modified,
+                ).where(RootFileModel.folder_id == folder_id)
+            )
+            return {name: (id_, size, modified) for name, id_, size, modified in rows}
+
+    @staticmethod
+    def iter_file_states(
+        root_id: int,
+        batch_size: int = INGEST_BATCH_SIZE,
+        under: str | None = None,
+        recursive: bool = True,
+    ) -> Iterator[tuple[int, str, int, datetime.datetime]]:
+        """Stream ``(id, full_path, size, last_modified)`` for a root's files.
+
+        With ``under``, only files below that directory are returned (only
+        its direct children if ``recursive`` is false). Its subtree is a
+        ``tree_path`` range of ``root_folders``, read from the index.
+        """
+        import sqlalchemy as sa
+        from dl_cli.database import get_db_connection
+        from dl_cli.folders import FolderTree, in_subtree
+        from dl_cli.models import RootFileModel, RootFolderModel
+
+        if under is not None:
+            under = under.rstrip(os.sep) or os.sep
+        with get_db_connection() as connection:
+            folders = FolderTree.load(connection, root_id, under=under)
+            stmt = sa.select(
+                RootFileModel.id,
+                RootFileModel.folder_id,
+                RootFileModel.name,
+                RootFileModel.size,
+                RootFileModel.file_last_modified,
+            )
+            if under is None:
+                stmt = stmt.where(RootFileModel.root_id == root_id)
+            else:
+                folder_id = folders.get(under)
+                if folder_id is None:
+                    return
+                if recursive:
+                    stmt = stmt.join(
+                        RootFolderModel, RootFolderModel.id == RootFileModel.folder_id
+                    ).where(
+                        RootFolderModel.root_id == root_id,
+                        in_subtree(RootFolderModel.tree_path, folders.tree_path(folder_id)),
+                    )
+                else:
+                    stmt = stmt.where(RootFileModel.folder_id == folder_id)
+
+            rows = connection.execution_options(yield_per=batch_size).execute(stmt)
+            join = os.path.join
+            for id_, folder_id, name, size, modified in rows:
+                yield id_, join(folders.path(folder_id), name), size, modified
+
+    @staticmethod
+    def apply_changes(
+        changes: RootChangesSchema,
+        batch_size: int = INGEST_BATCH_SIZE,
+        folders: FolderTree | None = None,
+        report: SyncReportSchema | None = None,
+    ) -> SyncReportSchema:
+        """Write an incremental change set to ``root_files``/``root_folders``.
+
+        File rows are written before folder mtimes: if the run dies midway
+        the stored folder mtimes are still the old ones (or unset, for new
+        folders), so the next rescan re-lists those directories instead of
+        trusting half-applied state.
+
+        A rescan planned in parts (see ``plan_rescan``) is applied one part
+        at a time: pass the root's ``folders`` from ``folder_tree`` and the
+        ``report`` returned for the previous part, and the counts and time
+        are added to that report.
+        """
+        import sqlalchemy as sa
+        from dl_cli.models import RootFileModel, RootFolderModel
+        from dl_cli.schemas import SyncReportSchema
+
+        root_id = changes.root_id
+        start = time.perf_counter()
+        if folders is None:
+            folders = RootDbManager.folder_tree(root_id)
+
+        _execute_batched(
+            sa.insert(RootFileModel),
+            changes.files_added,
+            batch_size,
+            lambda connection, chunk: [
+                _file_row(connection, folders, record) for record in chunk
+            ],
+        )
+        _execute_batched(
+            sa.update(RootFileModel).where(
+                RootFileModel.id == sa.bindparam("_id")
+            ),
+            changes.files_changed,
+            batch_size,
+            lambda connection, chunk: [
+                {"_id": id_, **_file_row(connection, folders, record)}
+                for id_, record in chunk
+            ],
+        )
+        _execute_batched(
+            sa.delete(RootFileModel).where(
+                RootFileModel.id == sa.bindparam("_id")
+            ),
+            ({"_id": id_} for id_ in changes.files_removed),
+            batch_size,
+        )
+        # New folders holding files were added with them; the rest now
+        _execute_batched(
+            sa.update(RootFolderModel).where(
+                RootFolderModel.id == sa.bindparam("_id")
+            ),
+            itertools.chain(changes.folders_added, changes.folders_changed),
+            batch_size,
+            lambda connection, chunk: [
+                {
+                    "_id": record.get("id") or folders.ensure(connection, record["path"]),
+                    **_folder_row(record),
+                }
+                for record in chunk
+            ],
+        )
+        _execute_batched(
+            sa.delete(RootFolderModel).where(
+                RootFolderModel.id == sa.bindparam("_id")
+            ),
+            ({"_id": id_} for id_ in changes.folders_removed),
+            batch_size,
+        )
+
+        counts = {
+            "files_added": len(changes.files_added),
+            "files_changed": len(changes.files_changed),
+            "files_removed": len(changes.files_removed),
+            "folders_added": len(changes.folders_added),
+            "folders_changed": len(changes.folders_changed),
+            "folders_removed": len(changes.folders_removed),
+            "dirs_listed": changes.dirs_listed,
+            "dirs_skipped": changes.dirs_skipped,
+            "elapsed": time.perf_counter() - start,
+        }
+        if report is None:
+            return SyncReportSchema(root_id=root_id, **counts)
+        for name, value in counts.items():
+            setattr(report, name, getattr(report, name) + value)
+        return report
 
 
 # Typer CLI application for roots
@@ -160,6 +656,22 @@ def create(
     except ValueError as e:
         typer.echo(f"Error creating root: {e}", err=True)
         raise typer.Exit(code=1)
+    _echo_overlaps(root)
+
+
+def _echo_overlaps(root) -> None:
+    """Point out roots nested with ``root``; scans share their walks."""
+    overlaps = RootDbManager.find_overlaps(root.path, exclude_id=root.id)
+    for outer in overlaps.contained_in:
+        typer.echo(
+            f"  Note: inside root '{outer.name}' (ID: {outer.id}); "
+            "full scans walk them together."
+        )
+    for inner in overlaps.contains:
+        typer.echo(
+            f"  Note: contains root '{inner.name}' (ID: {inner.id}); "
+            "full scans walk them together."
+        )
 
 
 @app.command(help="Get details of a root directory by name or path.")
@@ -196,10 +708,16 @@ def list_all_roots():  # Renamed to avoid conflict with list() built-in
         if not roots:
             typer.echo("No roots found.")
             return
+        from dl_cli.root_tree import RootTree
+
+        tree = RootTree((root.id, root.path) for root in roots)
+        names = {root.id: root.name for root in roots}
         typer.echo("Registered Roots:")
         for root in roots:
+            outer = tree.containing(root.path)
+            inside = f" | Inside: '{names[outer[-2]]}'" if len(outer) > 1 else ""
             typer.echo(
-                f"  ID: {root.id} | Name: '{root.name}' | Path: '{root.path}'")
+                f"  ID: {root.id} | Name: '{root.name}' | Path: '{root.path}'{inside}")
     except Exception as e:
         typer.echo(f"Error listing roots: {e}", err=True)
         raise typer.Exit(code=1)
@@ -245,6 +763,8 @@ def update(
     except ValueError as e:
         typer.echo(f"Error updating root: {e}", err=True)
         raise typer.Exit(code=1)
+    if path:
+        _echo_overlaps(root)
 
 
 # This __name__ == "__main__" block is for direct testing of this file.
@@ -0,0 +1,99 @@
+# dl_cli/root_tree.py
+import os
+from collections.abc import Iterable
+
+
+class _Node:
+    __slots__ = ("children", "root_id")
+
+    def __init__(self):
+        self.children = {}
+        self.root_id = None
+
+
+def _parts(path: str) -> list[str]:
+    path = os.path.normpath(os.fspath(path))
+    return [part for part in path.split(os.sep) if part]
+
+
+class RootTree:
+    """Prefix tree of registered root paths, one node per path component.
+
+    Answers "which roots contain this path" and "which roots lie below it"
+    in time proportional to the path's depth, however many roots exist.
+    Paths are compared component by component, so ``/data/pro`` is not
+    taken to contain ``/data/projects``. Paths should be resolved, as
+    stored in ``roots``.
+    """
+
+    def __init__(self, roots: Iterable[tuple[int, str]] = ()):
+        self._top = _Node()
+        self._paths = {}
+        for root_id, path in roots:
+            self.add(root_id, path)
+
+    def add(self, root_id: int, path: str) -> None:
+        node = self._top
+        for part in _parts(path):
+            node = node.children.setdefault(part, _Node())
+        if node.root_id is not None and node.root_id != root_id:
+            raise ValueError(f"Roots {node.root_id} and {root_id} share the path '{path}'.")
+        node.root_id = root_id
+        self._paths[root_id] = path
+
+    def path(self, root_id: int) -> str:
+        return self._paths[root_id]
+
+    def _find(self, path: str) -> _Node | None:
+        node = self._top
+        for part in _parts(path):
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node
+
+    def root_at(self, path: str) -> int | None:
+        """The root registered at exactly ``path``, if any."""
+        node = self._find(path)
+        return node.root_id if node is not None else None
+
+    def containing(self, path: str) -> list[int]:
+        """Roots at or above ``path``, outermost first."""
+        found = []
+        node = self._top
+        if node.root_id is not None:
+            found.append(node.root_id)
+        for part in _parts(path):
+            node = node.children.get(part)
+            if node is None:
+                break
+            if node.root_id is not None:
+                found.append(node.root_id)
+        return found
+
+    def below(self, path: str, nearest: bool = False) -> list[int]:
+        """Roots strictly below ``path``.
+
+        With ``nearest``, only those not nested inside another root below
+        ``path``: the ones a walk has to start from to cover them all.
+        """
+        node = self._find(path)
+        if node is None:
+            return []
+        found = []
+        stack = list(node.children.values())
+        while stack:
+            node = stack.pop()
+            if node.root_id is not None:
+                found.append(node.root_id)
+                if nearest:
+                    continue
+            stack.extend(node.children.values())
+        return sorted(found)
+
+    def outermost(self) -> list[int]:
+        """Roots not contained in any other root."""
+        return sorted(
+            root_id for root_id, path in self._paths.items()
+            if self.containing(path)[0] == root_id
+        )
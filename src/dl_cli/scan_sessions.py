@@ -0,0 +1,226 @@
+# dl_cli/scan_sessions.py
+"""Scan sessions: resumable full scans of a root.
+
+A full scan records a ``scan_sessions`` row when it starts. The walker
+periodically hands the writer a checkpoint, taken at a directory boundary:
+the stack of directories it has not listed yet. The writer stores it only
+after every record that came before it is committed, together with the
+highest ``root_files.id`` at that moment. Every row of the root above that
+id belongs to a directory still in the frontier. A scan that dies leaves
+its session ``running``. The next scan of the root deletes the rows above
+the checkpoint and walks on from the stored frontier, instead of clearing
+the root and starting from its top.
+"""
+from __future__ import annotations
+
+import datetime
+import json
+from typing import TYPE_CHECKING
+
+import typer
+from dl_cli.instrumentation import get_metrics
+
+if TYPE_CHECKING:
+    from dl_cli.schemas import ScanSessionSchema
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+class ScanSessionManager:
+    """Starts, checkpoints and finishes ``scan_sessions`` rows."""
+
+    @staticmethod
+    def start(
+        root_id: int, options: dict | None = None, resume: bool = True
+    ) -> tuple[int, list[str] | None]:
+        """Open a session for a full scan of a root and prepare its rows.
+
+        Returns ``(session_id, frontier)``. When the root has an interrupted
+        session with a checkpoint taken under the same ``options``, and
+        ``resume`` is set, that session is reopened. Rows written after its
+        checkpoint are deleted and its frontier is returned for the walker
+        to continue from. Otherwise any interrupted session is marked
+        ``abandoned``, the root's ``root_files`` rows are cleared and a new
+        session is started with ``frontier`` None. ``options=None`` never
+        resumes.
+        """
+        import sqlalchemy as sa
+        from dl_cli.database import get_db_connection
+        from dl_cli.models import RootFileModel, ScanSessionModel as Session
+
+        key = json.dumps(options, sort_keys=True) if options is not None else None
+        now = _now()
+        with get_db_connection() as connection:
+            interrupted = connection.execute(
+                sa.select(Session.id, Session.options, Session.frontier, Session.last_file_id)
+                .where(Session.root_id == root_id, Session.status == "running")
+                .order_by(Session.id.desc())
+                .limit(1)
+            ).first()
+            if (
+                resume
+                and interrupted is not None
+                and interrupted.frontier is not None
+                and key is not None
+                and interrupted.options == key
+            ):
+                deleted = connection.execute(
+                    sa.delete(RootFileModel).where(
+                        RootFileModel.root_id == root_id,
+                        RootFileModel.id > interrupted.last_file_id,
+                    )
+                ).rowcount
+                connection.execute(
+                    sa.update(Session)
+                    .where(Session.id == interrupted.id)
+                    .values(resumes=Session.resumes + 1, updated_at=now)
+                )
+                get_metrics().update(rows_deleted=deleted, transactions=1)
+                return interrupted.id, json.loads(interrupted.frontier)
+
+            connection.execute(
+                sa.update(Session)
+                .where(Session.root_id == root_id, Session.status == "running")
+                .values(status="abandoned", updated_at=now)
+            )
+            deleted = connection.execute(
+                sa.delete(RootFileModel).where(RootFileModel.root_id == root_id)
+            ).rowcount
+            session_id = connection.execute(
+                sa.insert(Session).values(
+                    root_id=root_id,
+                    status="running",
+                    options=key,
+                    started_at=now,
+                    updated_at=now,
+                )
+            ).inserted_primary_key[0]
+        get_metrics().update(rows_deleted=deleted, transactions=1)
+        return session_id, None
+
+    @staticmethod
+    def checkpoint(session_id: int, frontier: list[str], rows: int) -> None:
+        """Record that every directory outside ``frontier`` is committed.
+
+        ``rows`` is the number of rows written since the previous
+        checkpoint. Call only after those rows are committed.
+        """
+        import sqlalchemy as sa
+        from dl_cli.database import get_db_connection
+        from dl_cli.models import RootFileModel, ScanSessionModel as Session
+
+        metrics = get_metrics()
+        with metrics.phase("db.checkpoint"), get_db_connection() as connection:
+            # max(rowid) is one b-tree lookup. root_files ids are
+            # AUTOINCREMENT, so any later insert gets a higher id, even
+            # after the rows with the highest ids are deleted
+            last_file_id = connection.execute(
+                sa.select(sa.func.coalesce(sa.func.max(RootFileModel.id), 0))
+            ).scalar()
+            connection.execute(
+                sa.update(Session)
+                .where(Session.id == session_id)
+                .values(
+                    frontier=json.dumps(frontier),
+                    pending_dirs=len(frontier),
+                    last_file_id=last_file_id,
+                    rows_written=Session.rows_written + rows,
+                    checkpoints=Session.checkpoints + 1,
+                    updated_at=_now(),
+                )
+            )
+        metrics.update(checkpoints=1, transactions=1)
+
+    @staticmethod
+    def finish(session_id: int, rows: int) -> None:
+        """Mark a session completed; ``rows`` as for ``checkpoint``."""
+        import sqlalchemy as sa
+        from dl_cli.database import get_db_connection
+        from dl_cli.models import ScanSessionModel as Session
+
+        now = _now()
+        with get_db_connection() as connection:
+            connection.execute(
+                sa.update(Session)
+                .where(Session.id == session_id)
+                .values(
+                    status="completed",
+                    frontier=None,
+                    pending_dirs=0,
+                    rows_written=Session.rows_written + rows,
+                    updated_at=now,
+                    finished_at=now,
+                )
+            )
+
+    @staticmethod
+    def list_sessions(
+        root_id: int | None = None, limit: int | None = None
+    ) -> list[ScanSessionSchema]:
+        """Sessions newest first, optionally for one root only."""
+        import sqlalchemy as sa
+        from dl_cli.conversion import validate_rows
+        from dl_cli.database import get_db_connection
+        from dl_cli.models import ScanSessionModel as Session
+        from dl_cli.schemas import ScanSessionSchema
+
+        stmt = (
+            sa.select(
+                Session.id,
+                Session.root_id,
+                Session.status,
+                Session.rows_written,
+                Session.checkpoints,
+                Session.resumes,
+                Session.pending_dirs,
+                Session.started_at,
+                Session.updated_at,
+                Session.finished_at,
+            )
+            .order_by(Session.id.desc())
+            .limit(limit)
+        )
+        if root_id is not None:
+            stmt = stmt.where(Session.root_id == root_id)
+        with get_db_connection() as connection:
+            return validate_rows(ScanSessionSchema, connection.execute(stmt))
+
+
+# Typer CLI application for scan sessions
+app = typer.Typer(
+    name="Sessions",
+    help="inspect full scans and the checkpoints interrupted ones resume from.",
+)
+
+
+@app.command(name="list", help="List scan sessions, newest first.")
+def list_sessions(
+    root: str = typer.Option(None, "--root", "-r", help="Only sessions of this root."),
+    limit: int = typer.Option(20, "--limit", "-l", help="Number of sessions to show."),
+):
+    """List scan sessions, newest first."""
+    from dl_cli.root_manager import RootDbManager
+
+    try:
+        root_id = RootDbManager.get_root(name=root).id if root else None
+        sessions = ScanSessionManager.list_sessions(root_id, limit)
+    except ValueError as e:
+        typer.echo(f"Error listing sessions: {e}", err=True)
+        raise typer.Exit(code=1)
+    if not sessions:
+        typer.echo("No scan sessions.")
+        return
+    for session in sessions:
+        detail = (
+            f"{session.pending_dirs} dirs pending"
+            if session.finished_at is None
+            else f"finished {session.finished_at:%Y-%m-%d %H:%M:%S}"
+        )
+        typer.echo(
+            f"  #{session.id} root {session.root_id}: {session.status}, "
+            f"{session.rows_written} rows, {session.checkpoints} checkpoints, "
+            f"{session.resumes} resumes, started {session.started_at:%Y-%m-%d %H:%M:%S} "
+            f"({detail})"
+        )
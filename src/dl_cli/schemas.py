@@ -1,5 +1,7 @@
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, computed_field
+
+from dl_cli.records import FileRecord
 
 
 class RootSchema(BaseModel):
@@ -15,18 +17,26 @@ class RootSchema(BaseModel):
         # In older Pydantic versions, this was orm_mode = True
 
 
+class RootOverlapSchema(BaseModel):
+    """Registered roots nested with a path; scans walk them together."""
+
+    contained_in: list[RootSchema] = []  # outermost first
+    contains: list[RootSchema] = []
+
+
 class RootFileSchema(BaseModel):
     id: int
     root_id: int
-    full_path: str
+    folder_id: int
+    full_path: str  # rebuilt from the folder's path and the name
     name: str
     extension: str
     size: int
-    file_last_modified: str  # ISO format date string
-    file_created_at: str  # ISO format date string
+    file_last_modified: datetime  # naive UTC, as stored
+    file_created_at: datetime  # naive UTC, as stored
     # database timestamps
-    created_at: str  # ISO format date string
-    updated_at: str  # ISO format date string
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
 
     class Config:
         from_attributes = True
@@ -35,14 +45,198 @@ class RootFileSchema(BaseModel):
 class RootFolderSchema(BaseModel):
     id: int
     root_id: int
-    full_path: str
+    parent_id: int | None  # None for the root's top folder
+    full_path: str  # rebuilt from the parent chain
     name: str
-    size: int
-    folder_last_modified: str  # ISO format date string
-    folder_created_at: str  # ISO format date string
+    # None until an incremental scan lists the folder
+    size: int | None
+    folder_last_modified: datetime | None  # naive UTC, as stored
+    folder_created_at: datetime | None  # naive UTC, as stored
     # database timestamps
-    created_at: str  # ISO format date string
-    updated_at: str  # ISO format date string
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
 
     class Config:
         from_attributes = True
+
+
+class IngestReportSchema(BaseModel):
+    root_id: int
+    rows: int
+    batches: int
+    batch_size: int
+    elapsed: float  # wall-clock seconds, including producing the records
+    scan_elapsed: float = 0.0  # seconds the walker spent on the root, if known
+    resumed: bool = False  # continued an interrupted scan from its checkpoint
+    snapshot_id: int | None = None  # snapshot taken when the scan completed
+
+    @computed_field
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+class RootChangesSchema(BaseModel):
+    """Row-level differences between the stored and on-disk state of a root."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    root_id: int
+    files_added: list[FileRecord] = []
+    files_changed: list[tuple[int, FileRecord]] = []  # (root_files id, record)
+    files_removed: list[int] = []  # root_files ids
+    # folder records; "changed" ones also carry the row ``id``
+    folders_added: list[dict] = []
+    folders_changed: list[dict] = []
+    folders_removed: list[int] = []  # root_folders ids
+    # traversal counters
+    dirs_listed: int = 0
+    dirs_skipped: int = 0
+
+
+class SyncReportSchema(BaseModel):
+    root_id: int
+    files_added: int
+    files_changed: int
+    files_removed: int
+    folders_added: int
+    folders_changed: int
+    folders_removed: int
+    dirs_listed: int
+    dirs_skipped: int
+    elapsed: float  # wall-clock seconds spent writing the changes
+    scan_elapsed: float = 0.0  # seconds the walker spent on the root, if known
+
+
+class DuplicateGroupSchema(BaseModel):
+    size: int
+    hash: str
+    paths: list[str]
+
+    @computed_field
+    @property
+    def wasted_bytes(self) -> int:
+        return self.size * (len(self.paths) - 1)
+
+
+class DedupeReportSchema(BaseModel):
+    groups: list[DuplicateGroupSchema]
+    files: int  # files considered (size >= min_size)
+    size_candidates: int  # files sharing their size with another file
+    partial_hashed: int
+    full_hashed: int
+    cache_hits: int  # hashes reused from file_hashes
+    errors: int  # files that could not be read
+    elapsed: float
+
+    @computed_field
+    @property
+    def wasted_bytes(self) -> int:
+        return sum(group.wasted_bytes for group in self.groups)
+
+
+class ContentIndexReportSchema(BaseModel):
+    indexed: int  # files whose text was (re)written to the index
+    skipped: int  # binary or unreadable files, remembered so they are not re-read
+    removed: int  # index entries of files no longer in root_files
+    bytes_read: int
+    elapsed: float
+
+
+class SearchHitSchema(BaseModel):
+    file_id: int
+    root_id: int
+    full_path: str
+    rank: float  # bm25 score; lower is a better match
+    snippet: str
+
+
+class ExtensionStatSchema(BaseModel):
+    extension: str
+    files: int
+    bytes: int
+
+
+class LargestFileSchema(BaseModel):
+    root_id: int
+    full_path: str
+    size: int
+    file_last_modified: datetime
+
+
+class FolderTotalSchema(BaseModel):
+    root_id: int
+    full_path: str
+    files: int  # files directly in the folder
+    bytes: int
+
+
+class RootTotalSchema(BaseModel):
+    root_id: int
+    name: str
+    path: str
+    files: int
+    bytes: int
+    last_modified: datetime | None  # newest file mtime
+
+
+class ExportReportSchema(BaseModel):
+    table: str
+    format: str
+    path: str
+    rows: int
+    elapsed: float
+
+    @computed_field
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+class ScanSessionSchema(BaseModel):
+    id: int
+    root_id: int
+    status: str
+    rows_written: int  # rows committed as of the last checkpoint or the end
+    checkpoints: int
+    resumes: int
+    pending_dirs: int  # directories in the last checkpoint's frontier
+    started_at: datetime
+    updated_at: datetime
+    finished_at: datetime | None = None
+
+
+class SnapshotSchema(BaseModel):
+    id: int
+    root_id: int
+    session_id: int | None  # the full scan that left the files this way
+    files: int
+    bytes: int
+    created_at: datetime
+
+
+class FileChangeSchema(BaseModel):
+    change: str  # "added", "removed", "resized" or "touched" (same size, new mtime)
+    full_path: str
+    old_size: int | None  # None when added
+    new_size: int | None  # None when removed
+    old_modified: datetime | None
+    new_modified: datetime | None
+
+
+class SnapshotDiffReportSchema(BaseModel):
+    old_id: int
+    new_id: int
+    path: str
+    format: str
+    added: int
+    removed: int
+    resized: int
+    touched: int
+    unchanged: int
+    elapsed: float
+
+    @computed_field
+    @property
+    def changes(self) -> int:
+        return self.added + self.removed + self.resized + self.touched
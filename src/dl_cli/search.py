@@ -0,0 +1,324 @@
+# dl_cli/search.py
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import typer
+from dl_cli.config import (
+    CONTENT_BATCH_SIZE,
+    CONTENT_MAX_SIZE,
+    CONTENT_SNIFF_SIZE,
+    CONTENT_WORKERS,
+)
+
+if TYPE_CHECKING:
+    from dl_cli.schemas import ContentIndexReportSchema, SearchHitSchema
+
+
+def read_text(path: str) -> str | None:
+    """Return a file's text, or None if it is binary or cannot be read.
+
+    A NUL byte in the first ``CONTENT_SNIFF_SIZE`` bytes marks a file as
+    binary; anything else is decoded as UTF-8 with invalid bytes replaced.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read(CONTENT_MAX_SIZE)
+    except OSError:
+        return None
+    if b"\0" in data[:CONTENT_SNIFF_SIZE]:
+        return None
+    return data.decode("utf-8", errors="replace")
+
+
+class SearchManager:
+    """Maintains and queries the ``file_contents`` full-text index."""
+
+    @staticmethod
+    def _remove_orphans(connection) -> int:
+        """Drop index entries of files no longer in ``root_files``."""
+        orphans = (
+            "SELECT s.id FROM file_contents_state AS s WHERE NOT EXISTS "
+            "(SELECT 1 FROM root_files AS f "
+            "WHERE f.folder_id = s.folder_id AND f.name = s.name)"
+        )
+        connection.exec_driver_sql(
+            f"DELETE FROM file_contents WHERE rowid IN ({orphans})"
+        )
+        return connection.exec_driver_sql(
+            f"DELETE FROM file_contents_state WHERE id IN ({orphans})"
+        ).rowcount
+
+    @staticmethod
+    def _stale_files(
+        connection, root_ids: list[int] | None, after: int, limit: int
+    ) -> list[tuple]:
+        """The next ``limit`` files past ``root_files.id`` ``after`` that are
+        not indexed as they are now, in id order.
+
+        Rows are ``(id, folder_id, name, size, last_modified)``. Files are
+        matched to their index state by folder and name, which full scans
+        keep, so rescanning an unchanged tree leaves nothing stale.
+        """
+        import sqlalchemy as sa
+        from dl_cli.models import ContentIndexStateModel as State
+        from dl_cli.models import RootFileModel as File
+
+        stmt = (
+            sa.select(File.id, File.folder_id, File.name, File.size, File.file_last_modified)
+            .outerjoin(
+                State, sa.and_(State.folder_id == File.folder_id, State.name == File.name)
+            )
+            .where(
+                File.id > after,
+                sa.or_(
+                    State.id.is_(None),
+                    State.size != File.size,
+                    State.file_last_modified != File.file_last_modified,
+                ),
+            )
+            .order_by(File.id)
+            .limit(limit)
+        )
+        if root_ids:
+            # "+ 0" keeps SQLite on the rowid order instead of sorting the
+            # root's files by id for every batch
+            stmt = stmt.where((File.root_id + 0).in_(root_ids))
+        return [tuple(row) for row in connection.execute(stmt)]
+
+    @staticmethod
+    def index_contents(
+        root_ids: list[int] | None = None,
+        batch_size: int = CONTENT_BATCH_SIZE,
+        workers: int = CONTENT_WORKERS,
+    ) -> ContentIndexReportSchema:
+        """Bring the full-text index up to date with ``root_files``.
+
+        Only files that are new, or whose size or mtime changed since they
+        were last indexed, are read. Files of ``CONTENT_MAX_SIZE`` or more,
+        binary files and unreadable files are recorded without text so they
+        are not read again until they change. Stale files are fetched
+        ``batch_size`` at a time, each batch picking up after the last id
+        of the one before, so memory stays at one batch however many files
+        need indexing.
+        """
+        from sqlalchemy.dialects.sqlite import insert
+        from dl_cli.database import get_db_connection
+        from dl_cli.folders import paths_of
+        from dl_cli.models import ContentIndexStateModel as State
+        from dl_cli.schemas import ContentIndexReportSchema
+
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
+
+        start = time.perf_counter()
+        with get_db_connection() as connection:
+            removed = SearchManager._remove_orphans(connection)
+
+        state = insert(State)
+        state = state.on_conflict_do_update(
+            index_elements=[State.folder_id, State.name],
+            set_={
+                "size": state.excluded.size,
+                "file_last_modified": state.excluded.file_last_modified,
+                "indexed": state.excluded.indexed,
+            },
+        ).returning(State.id, sort_by_parameter_order=True)
+
+        def load(item):
+            path, size = item
+            return read_text(path) if size < CONTENT_MAX_SIZE else None
+
+        indexed = skipped = bytes_read = 0
+        after = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                with get_db_connection() as connection:
+                    chunk = SearchManager._stale_files(
+                        connection, root_ids, after, batch_size
+                    )
+                    folders = paths_of(connection, {row[1] for row in chunk})
+                if not chunk:
+                    break
+                after = chunk[-1][0]
+                texts = list(
+                    pool.map(
+                        load,
+                        [
+                            (os.path.join(folders[folder_id], name), size)
+                            for _, folder_id, name, size, _ in chunk
+                        ],
+                    )
+                )
+                with get_db_connection() as connection:
+                    # The state row's id is the file's rowid in file_contents
+                    ids = connection.execute(
+                        state,
+                        [
+                            {
+                                "folder_id": folder_id,
+                                "name": name,
+                                "size": size,
+                                "file_last_modified": modified,
+                                "indexed": int(text is not None),
+                            }
+                            for (_, folder_id, name, size, modified), text in zip(
+                                chunk, texts
+                            )
+                        ],
+                    ).scalars().all()
+                    connection.exec_driver_sql(
+                        "DELETE FROM file_contents WHERE rowid = ?",
+                        [(id_,) for id_ in ids],
+                    )
+                    documents = [
+                        (id_, text) for id_, text in zip(ids, texts) if text is not None
+                    ]
+                    if documents:
+                        connection.exec_driver_sql(
+                            "INSERT INTO file_contents (rowid, content) VALUES (?, ?)",
+                            documents,
+                        )
+                indexed += len(documents)
+                skipped += len(chunk) - len(documents)
+                bytes_read += sum(row[3] for row, text in zip(chunk, texts) if text is not None)
+
+        return ContentIndexReportSchema(
+            indexed=indexed,
+            skipped=skipped,
+            removed=removed,
+            bytes_read=bytes_read,
+            elapsed=time.perf_counter() - start,
+        )
+
+    @staticmethod
+    def search(
+        query: str, limit: int = 20, root_ids: list[int] | None = None
+    ) -> list[SearchHitSchema]:
+        """Return the best ``limit`` matches of an FTS5 query, best first.
+
+        ``query`` uses FTS5 syntax: words, "quoted phrases", ``prefix*``,
+        ``AND``/``OR``/``NOT`` and ``NEAR(...)``.
+        """
+        import sqlalchemy as sa
+        from sqlalchemy.exc import OperationalError
+        from dl_cli.database import get_db_connection
+        from dl_cli.folders import paths_of
+        from dl_cli.schemas import SearchHitSchema
+
+        if limit < 1:
+            raise ValueError("limit must be at least 1.")
+
+        # Without a root filter, ORDER BY rank LIMIT runs inside the FTS5
+        # query, which only scores and snippets the top hits
+        hits = (
+            "SELECT rowid, rank, "
+            "snippet(file_contents, 0, '[', ']', '...', 12) AS snippet "
+            "FROM file_contents WHERE file_contents MATCH :query"
+        )
+        if root_ids:
+            roots = "AND f.root_id IN :root_ids"
+        else:
+            hits += " ORDER BY rank LIMIT :limit"
+            roots = ""
+        stmt = sa.text(
+            f"SELECT f.id, f.root_id, f.folder_id, f.name, h.rank, h.snippet "
+            f"FROM ({hits}) AS h "
+            f"JOIN file_contents_state AS s ON s.id = h.rowid "
+            f"JOIN root_files AS f ON f.folder_id = s.folder_id AND f.name = s.name "
+            f"WHERE 1 = 1 {roots} "
+            f"ORDER BY h.rank LIMIT :limit"
+        )
+        params = {"query": query, "limit": limit}
+        if root_ids:
+            stmt = stmt.bindparams(sa.bindparam("root_ids", expanding=True))
+            params["root_ids"] = list(root_ids)
+
+        try:
+            with get_db_connection() as connection:
+                rows = connection.execute(stmt, params).all()
+                folders = paths_of(connection, {row.folder_id for row in rows})
+        except OperationalError as e:
+            raise ValueError(f"Invalid search query '{query}': {e.orig}") from None
+        return [
+            SearchHitSchema(
+                file_id=id_,
+                root_id=root_id,
+                full_path=os.path.join(folders[folder_id], name),
+                rank=rank,
+                snippet=snippet,
+            )
+            for id_, root_id, folder_id, name, rank, snippet in rows
+        ]
+
+
+# Typer CLI application for the content index
+app = typer.Typer(
+    name="Content",
+    help="index the text of scanned files and search it.",
+)
+
+
+def _root_ids(names: list[str] | None) -> list[int]:
+    from dl_cli.root_manager import RootDbManager
+
+    return [RootDbManager.get_root(name=name).id for name in names or ()]
+
+
+@app.command(help="Index the text of new and changed files.")
+def index(
+    roots: list[str] = typer.Option(
+        None, "--root", "-r", help="Root name to index. Repeat for several; defaults to all."
+    ),
+    batch_size: int = typer.Option(
+        CONTENT_BATCH_SIZE, "--batch-size", help="Files written per transaction."
+    ),
+    workers: int = typer.Option(
+        CONTENT_WORKERS, "--workers", "-w", help="Threads reading files at once."
+    ),
+):
+    """Index the text of new and changed files."""
+    try:
+        report = SearchManager.index_contents(
+            root_ids=_root_ids(roots), batch_size=batch_size, workers=workers
+        )
+    except ValueError as e:
+        typer.echo(f"Error indexing contents: {e}", err=True)
+        raise typer.Exit(code=1)
+    typer.echo(
+        f"Indexed {report.indexed} files ({report.bytes_read} bytes), "
+        f"skipped {report.skipped}, removed {report.removed} "
+        f"in {report.elapsed:.2f}s"
+    )
+
+
+@app.command(help="Search indexed file contents (FTS5 query syntax).")
+def search(
+    query: str = typer.Argument(..., help="Words, \"phrases\", prefix*, AND/OR/NOT."),
+    limit: int = typer.Option(20, "--limit", "-l", help="Maximum number of hits."),
+    roots: list[str] = typer.Option(
+        None, "--root", "-r", help="Root name to search. Repeat for several; defaults to all."
+    ),
+    as_json: bool = typer.Option(False, "--json", help="Print hits as NDJSON."),
+):
+    """Search indexed file contents."""
+    try:
+        start = time.perf_counter()
+        hits = SearchManager.search(query, limit=limit, root_ids=_root_ids(roots))
+        elapsed = time.perf_counter() - start
+    except ValueError as e:
+        typer.echo(f"Error searching: {e}", err=True)
+        raise typer.Exit(code=1)
+
+    for hit in hits:
+        if as_json:
+            typer.echo(hit.model_dump_json())
+        else:
+            typer.echo(f"{hit.full_path}\n    {hit.snippet.replace(chr(10), ' ')}")
+    if not as_json:
+        typer.echo(f"{len(hits)} hits in {elapsed * 1000:.1f} ms")
@@ -0,0 +1,398 @@
+# dl_cli/snapshots.py
+"""Snapshots of a root's files, and the changes between two of them.
+
+Every completed full scan copies the root's files into a snapshot: one
+``snapshot_folders`` row per folder with its path, one ``snapshot_files``
+row per file with its name, size and mtime. Both tables are keyed so that
+reading a snapshot in ``(folder path, name)`` order walks their primary
+keys, without sorting. ``diff`` reads two snapshots that way side by side
+and merge-joins them in a single pass, holding one row of each in memory,
+so comparing scans of millions of files costs two index scans.
+"""
+from __future__ import annotations
+
+import datetime
+import os
+import time
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
+
+import typer
+from dl_cli.config import SNAPSHOT_DIFF_CHUNK_SIZE, SNAPSHOT_RETENTION
+from dl_cli.instrumentation import get_metrics
+
+if TYPE_CHECKING:
+    from dl_cli.schemas import (
+        FileChangeSchema,
+        SnapshotDiffReportSchema,
+        SnapshotSchema,
+    )
+
+FORMATS = ("csv", "ndjson")
+# Columns of a change row, as yielded by iter_changes and exported by diff
+CHANGE_COLUMNS = (
+    "change", "full_path", "old_size", "new_size", "old_modified", "new_modified"
+)
+CHANGES = ("added", "removed", "resized", "touched")
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def _merge(old_rows, new_rows):
+    """Change rows between two ``(path, name, size, mtime)`` streams.
+
+    Both streams must be sorted by ``(path, name)``. Yields a change row
+    per difference and ``None`` per unchanged file, so callers can count
+    those too.
+    """
+    join = os.path.join
+    old = next(old_rows, None)
+    new = next(new_rows, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and (old[0], old[1]) < (new[0], new[1])):
+            yield ("removed", join(old[0], old[1]), old[2], None, old[3], None)
+            old = next(old_rows, None)
+        elif old is None or (new[0], new[1]) < (old[0], old[1]):
+            yield ("added", join(new[0], new[1]), None, new[2], None, new[3])
+            new = next(new_rows, None)
+        else:
+            if old[2] != new[2]:
+                change = "resized"
+            elif old[3] != new[3]:
+                change = "touched"
+            else:
+                change = None
+            if change is None:
+                yield None
+            else:
+                yield (change, join(new[0], new[1]), old[2], new[2], old[3], new[3])
+            old = next(old_rows, None)
+            new = next(new_rows, None)
+
+
+class SnapshotManager:
+    """Takes, lists and compares snapshots of roots' files."""
+
+    @staticmethod
+    def take(root_id: int, session_id: int | None = None) -> int | None:
+        """Copy a root's current files into a new snapshot and return its id.
+
+        Snapshots of the root beyond the newest ``SNAPSHOT_RETENTION`` are
+        deleted. Returns None, taking nothing, when the retention is 0.
+        """
+        import sqlalchemy as sa
+        from dl_cli.config import INGEST_BULK_LOAD
+        from dl_cli.database import bulk_connection
+        from dl_cli.folders import folder_paths
+        from dl_cli.models import RootFileModel as File
+        from dl_cli.models import SnapshotFileModel, SnapshotFolderModel
+        from dl_cli.models import SnapshotModel as Snapshot
+
+        if SNAPSHOT_RETENTION < 1:
+            return None
+        metrics = get_metrics()
+        with metrics.phase("db.snapshot"), bulk_connection(
+            INGEST_BULK_LOAD
+        ) as connection, connection.begin():
+            totals = connection.execute(
+                sa.select(sa.func.count(), sa.func.coalesce(sa.func.sum(File.size), 0))
+                .where(File.root_id == root_id)
+            ).one()
+            snapshot_id = connection.execute(
+                sa.insert(Snapshot).values(
+                    root_id=root_id,
+                    session_id=session_id,
+                    files=totals[0],
+                    bytes=totals[1],
+                    created_at=_now(),
+                )
+            ).inserted_primary_key[0]
+
+            paths = folder_paths([root_id])
+            connection.execute(
+                sa.insert(SnapshotFolderModel).from_select(
+                    ["snapshot_id", "path", "folder_id"],
+                    sa.select(sa.literal(snapshot_id), paths.c.path, paths.c.id),
+                )
+            )
+            # In key order, so the rows are appended to the b-tree
+            connection.execute(
+                sa.insert(SnapshotFileModel).from_select(
+                    ["snapshot_id", "folder_id", "name", "size", "file_last_modified"],
+                    sa.select(
+                        sa.literal(snapshot_id),
+                        File.folder_id,
+                        File.name,
+                        File.size,
+                        File.file_last_modified,
+                    )
+                    .where(File.root_id == root_id)
+                    .order_by(File.folder_id, File.name),
+                )
+            )
+
+            expired = connection.execute(
+                sa.select(Snapshot.id)
+                .where(Snapshot.root_id == root_id)
+                .order_by(Snapshot.id.desc())
+                .offset(SNAPSHOT_RETENTION)
+            ).scalars().all()
+            if expired:
+                for model in (SnapshotFileModel, SnapshotFolderModel):
+                    connection.execute(
+                        sa.delete(model).where(model.snapshot_id.in_(expired))
+                    )
+                connection.execute(sa.delete(Snapshot).where(Snapshot.id.in_(expired)))
+        metrics.update(snapshot_rows=totals[0], transactions=1)
+        return snapshot_id
+
+    @staticmethod
+    def list_snapshots(
+        root_id: int | None = None, limit: int | None = None
+    ) -> list[SnapshotSchema]:
+        """Snapshots newest first, optionally for one root only."""
+        import sqlalchemy as sa
+        from dl_cli.conversion import validate_rows
+        from dl_cli.database import get_db_connection
+        from dl_cli.models import SnapshotModel as Snapshot
+        from dl_cli.schemas import SnapshotSchema
+
+        stmt = sa.select(
+            Snapshot.id,
+            Snapshot.root_id,
+            Snapshot.session_id,
+            Snapshot.files,
+            Snapshot.bytes,
+            Snapshot.created_at,
+        ).order_by(Snapshot.id.desc()).limit(limit)
+        if root_id is not None:
+            stmt = stmt.where(Snapshot.root_id == root_id)
+        with get_db_connection() as connection:
+            return validate_rows(SnapshotSchema, connection.execute(stmt))
+
+    @staticmethod
+    def resolve(
+        root_id: int, old_id: int | None = None, new_id: int | None = None
+    ) -> tuple[int, int]:
+        """Pick the snapshots of a root to compare.
+
+        ``new_id`` defaults to the root's latest snapshot and ``old_id`` to
+        the one before ``new_id``. Raises ``ValueError`` if there is none,
+        or if a given id is not a snapshot of the root.
+        """
+        import sqlalchemy as sa
+        from dl_cli.database import get_db_connection
+        from dl_cli.models import SnapshotModel as Snapshot
+
+        with get_db_connection() as connection:
+            ids = connection.execute(
+                sa.select(Snapshot.id)
+                .where(Snapshot.root_id == root_id)
+                .order_by(Snapshot.id.desc())
+            ).scalars().all()
+        for given in (old_id, new_id):
+            if given is not None and given not in ids:
+                raise ValueError(f"Snapshot {given} is not a snapshot of root {root_id}.")
+        if new_id is None:
+            if not ids:
+                raise ValueError(f"Root {root_id} has no snapshots; run a full scan.")
+            new_id = ids[0]
+        if old_id is None:
+            older = [id_ for id_ in ids if id_ < new_id]
+            if not older:
+                raise ValueError(
+                    f"Snapshot {new_id} is the oldest of root {root_id}; "
+                    "there is nothing to compare it with."
+                )
+            old_id = older[0]
+        return old_id, new_id
+
+    @staticmethod
+    def _rows(connection, snapshot_id: int, chunk_size: int) -> Iterator:
+        """A snapshot's ``(path, name, size, mtime)`` rows in that order."""
+        import sqlalchemy as sa
+        from dl_cli.models import SnapshotFileModel as File
+        from dl_cli.models import SnapshotFolderModel as Folder
+
+        # mtimes are compared, never interpreted: read the stored text
+        stmt = (
+            sa.select(
+                Folder.path,
+                File.name,
+                File.size,
+                sa.type_coerce(File.file_last_modified, sa.String),
+            )
+            .join(
+                File,
+                sa.and_(
+                    File.snapshot_id == Folder.snapshot_id,
+                    File.folder_id == Folder.folder_id,
+                ),
+            )
+            .where(Folder.snapshot_id == snapshot_id)
+            .order_by(Folder.path, File.name)
+        )
+        result = connection.execution_options(
+            stream_results=True, yield_per=chunk_size
+        ).execute(stmt)
+        for chunk in result.partitions():
+            yield from chunk
+
+    @staticmethod
+    def iter_changes(
+        old_id: int,
+        new_id: int,
+        chunk_size: int = SNAPSHOT_DIFF_CHUNK_SIZE,
+        counts: dict[str, int] | None = None,
+    ) -> Iterator[list[tuple]]:
+        """Stream the changes from one snapshot to another, in path order.
+
+        Yields lists of up to ``chunk_size`` rows with ``CHANGE_COLUMNS``;
+        timestamps are the stored text. Memory stays at a chunk of rows
+        whatever the snapshots' size. ``counts``, if given, is filled in
+        with the number of rows per change and of ``unchanged`` files.
+        """
+        from dl_cli.database import get_db_connection
+
+        if counts is None:
+            counts = {}
+        for key in (*CHANGES, "unchanged"):
+            counts.setdefault(key, 0)
+        with get_db_connection() as connection:
+            changes = _merge(
+                SnapshotManager._rows(connection, old_id, chunk_size),
+                SnapshotManager._rows(connection, new_id, chunk_size),
+            )
+            chunk = []
+            for row in changes:
+                if row is None:
+                    counts["unchanged"] += 1
+                    continue
+                counts[row[0]] += 1
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+    @staticmethod
+    def changes(
+        old_id: int, new_id: int, chunk_size: int = SNAPSHOT_DIFF_CHUNK_SIZE
+    ) -> Iterator[FileChangeSchema]:
+        """``iter_changes`` as ``FileChangeSchema`` instances."""
+        from dl_cli.conversion import validate_rows
+        from dl_cli.schemas import FileChangeSchema
+
+        for chunk in SnapshotManager.iter_changes(old_id, new_id, chunk_size):
+            yield from validate_rows(
+                FileChangeSchema, (dict(zip(CHANGE_COLUMNS, row)) for row in chunk)
+            )
+
+    @staticmethod
+    def diff(
+        old_id: int,
+        new_id: int,
+        path: str,
+        output_format: str | None = None,
+        chunk_size: int = SNAPSHOT_DIFF_CHUNK_SIZE,
+    ) -> SnapshotDiffReportSchema:
+        """Write the changes from one snapshot to another to ``path``.
+
+        ``path`` may be ``-`` for stdout; the format defaults to its suffix.
+        """
+        from dl_cli.export import _write_csv, _write_ndjson, format_for
+        from dl_cli.schemas import SnapshotDiffReportSchema
+
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1.")
+        output_format = output_format or format_for(path)
+        if output_format not in FORMATS:
+            raise ValueError(
+                f"Unknown format '{output_format}'. Choose one of: {', '.join(FORMATS)}."
+            )
+        write = _write_csv if output_format == "csv" else _write_ndjson
+
+        start = time.perf_counter()
+        counts = {}
+        write(
+            path,
+            CHANGE_COLUMNS,
+            SnapshotManager.iter_changes(old_id, new_id, chunk_size, counts),
+        )
+        return SnapshotDiffReportSchema(
+            old_id=old_id,
+            new_id=new_id,
+            path=path,
+            format=output_format,
+            elapsed=time.perf_counter() - start,
+            **counts,
+        )
+
+
+# Typer CLI application for snapshots
+app = typer.Typer(
+    name="Snapshots",
+    help="list the file snapshots full scans leave and diff two of them.",
+)
+
+
+@app.command(name="list", help="List snapshots, newest first.")
+def list_snapshots(
+    root: str = typer.Option(None, "--root", "-r", help="Only snapshots of this root."),
+    limit: int = typer.Option(20, "--limit", "-l", help="Number of snapshots to show."),
+):
+    """List snapshots, newest first."""
+    from dl_cli.root_manager import RootDbManager
+
+    try:
+        root_id = RootDbManager.get_root(name=root).id if root else None
+        snapshots = SnapshotManager.list_snapshots(root_id, limit)
+    except ValueError as e:
+        typer.echo(f"Error listing snapshots: {e}", err=True)
+        raise typer.Exit(code=1)
+    if not snapshots:
+        typer.echo("No snapshots.")
+        return
+    for snapshot in snapshots:
+        typer.echo(
+            f"  #{snapshot.id} root {snapshot.root_id}: {snapshot.files} files, "
+            f"{snapshot.bytes} bytes, session #{snapshot.session_id}, "
+            f"taken {snapshot.created_at:%Y-%m-%d %H:%M:%S}"
+        )
+
+
+@app.command(help="Write the file changes between two snapshots of a root.")
+def diff(
+    path: str = typer.Argument("-", help="Output file, or - for stdout."),
+    root: str = typer.Option(..., "--root", "-r", help="Root whose snapshots to compare."),
+    old_id: int = typer.Option(
+        None, "--from", help="Older snapshot; defaults to the one before --to."
+    ),
+    new_id: int = typer.Option(
+        None, "--to", help="Newer snapshot; defaults to the root's latest."
+    ),
+    output_format: str = typer.Option(
+        None, "--format", "-f", help=f"{', '.join(FORMATS)}; defaults to the file suffix."
+    ),
+):
+    """Write the file changes between two snapshots of a root."""
+    from dl_cli.root_manager import RootDbManager
+
+    try:
+        root_id = RootDbManager.get_root(name=root).id
+        old_id, new_id = SnapshotManager.resolve(root_id, old_id, new_id)
+        if path == "-" and output_format is None:
+            output_format = "ndjson"
+        report = SnapshotManager.diff(old_id, new_id, path, output_format)
+    except ValueError as e:
+        typer.echo(f"Error diffing snapshots: {e}", err=True)
+        raise typer.Exit(code=1)
+    typer.echo(
+        f"Snapshot #{report.old_id} -> #{report.new_id}: +{report.added} "
+        f"-{report.removed} ~{report.resized} resized, {report.touched} touched, "
+        f"{report.unchanged} unchanged ({report.elapsed:.2f}s)",
+        err=True,
+    )
@@ -0,0 +1,214 @@
+import contextlib
+import json
+import sys
+
+import typer
+
+from dl_cli.config import INGEST_BATCH_SIZE
+from dl_cli.instrumentation import NULL_METRICS, Metrics, collecting
+from dl_cli.schemas import IngestReportSchema
+from .scanner import EXECUTORS, WALKERS, iter_user_directory, scan_all_roots
+from .watcher import WATCH_DEBOUNCE, WATCH_MAX_DELAY, WATCH_POLL_INTERVAL, watch_roots
+
+
+app = typer.Typer(
+    name="scan-utils",
+    help="Scan registered roots and store their files in the database.",
+)
+
+
+@app.callback()
+def main():
+    """Scan registered roots and store their files in the database."""
+
+
+def _echo_report(root, report):
+    if isinstance(report, IngestReportSchema):
+        detail = (
+            f"{report.rows} rows in {report.batches} batches, "
+            f"{report.rows_per_second:,.0f} rows/s"
+        )
+        if report.resumed:
+            detail += ", resumed from checkpoint"
+        if report.snapshot_id is not None:
+            detail += f", snapshot #{report.snapshot_id}"
+    else:
+        detail = (
+            f"+{report.files_added} ~{report.files_changed} "
+            f"-{report.files_removed} files, "
+            f"{report.dirs_listed} dirs listed, {report.dirs_skipped} skipped"
+        )
+    typer.echo(
+        f"  {root.name}: {detail} "
+        f"(walk {report.scan_elapsed:.2f}s, write {report.elapsed:.2f}s)"
+    )
+
+
+@app.command(help="Scan every registered root.")
+def scan(
+    incremental: bool = typer.Option(
+        False,
+        "--incremental",
+        "-i",
+        help="Only re-list directories whose mtime changed since the last incremental scan.",
+    ),
+    resume: bool = typer.Option(
+        True,
+        "--resume/--no-resume",
+        help="Continue an interrupted full scan from its last checkpoint.",
+    ),
+    concurrency: int = typer.Option(
+        1, "--concurrency", "-c", help="Number of roots walked at the same time."
+    ),
+    executor: str = typer.Option(
+        "thread", "--executor", help=f"Worker pool type: {', '.join(EXECUTORS)}."
+    ),
+    walker: str = typer.Option(
+        "scandir", "--walker", help=f"Walker engine: {', '.join(WALKERS)}."
+    ),
+    workers: int = typer.Option(
+        None,
+        "--workers",
+        "-w",
+        help="Per root: threads for the parallel walker, calls in flight for the async one.",
+    ),
+    batch_size: int = typer.Option(
+        INGEST_BATCH_SIZE, "--batch-size", help="Rows written per transaction."
+    ),
+    index_content: bool = typer.Option(
+        False,
+        "--index-content",
+        help="Afterwards, load the text of new and changed files into the search index.",
+    ),
+    stats: bool = typer.Option(
+        False, "--stats", help="Print per-phase timings and counters as JSON."
+    ),
+    profile: str = typer.Option(
+        None, "--profile", help="Write a cProfile dump (pstats format) of every scan thread here."
+    ),
+):
+    """Scan every registered root."""
+    if stats or profile:
+        metrics = Metrics(profile=profile is not None)
+        scope = collecting(metrics)
+    else:
+        metrics = NULL_METRICS
+        scope = contextlib.nullcontext()
+
+    with scope, metrics.profile_thread(), metrics.phase("total"):
+        try:
+            reports = scan_all_roots(
+                batch_size=batch_size,
+                incremental=incremental,
+                resume=resume,
+                concurrency=concurrency,
+                executor=executor,
+                progress=_echo_report,
+                walker=walker,
+                workers=workers,
+            )
+        except ValueError as e:
+            typer.echo(f"Error scanning roots: {e}", err=True)
+            raise typer.Exit(code=1)
+
+        if not reports:
+            typer.echo("No roots found.")
+        else:
+            typer.echo(f"Scanned {len(reports)} roots.")
+
+        if reports and index_content:
+            from dl_cli.search import SearchManager
+
+            with metrics.phase("index_content"):
+                report = SearchManager.index_contents()
+            typer.echo(
+                f"Indexed {report.indexed} files, skipped {report.skipped}, "
+                f"removed {report.removed} ({report.elapsed:.2f}s)"
+            )
+
+    if stats:
+        typer.echo(json.dumps(metrics.to_dict(), indent=2))
+    if profile:
+        metrics.dump_profile(profile)
+        typer.echo(f"Profile written to {profile} (view with: python -m pstats {profile})")
+
+
+@app.command(help="Keep every registered root in sync as files change.")
+def watch(
+    debounce: float = typer.Option(
+        WATCH_DEBOUNCE, "--debounce", help="Seconds without events before a batch is written."
+    ),
+    max_delay: float = typer.Option(
+        WATCH_MAX_DELAY, "--max-delay", help="Longest a batch is held back while events keep coming."
+    ),
+    poll: bool = typer.Option(
+        False, "--poll", help="Stat directories on an interval instead of using inotify."
+    ),
+    poll_interval: float = typer.Option(
+        WATCH_POLL_INTERVAL, "--poll-interval", help="Seconds between polling passes."
+    ),
+    batch_size: int = typer.Option(
+        INGEST_BATCH_SIZE, "--batch-size", help="Rows written per transaction."
+    ),
+):
+    """Keep every registered root in sync as files change."""
+    def ready(watcher):
+        typer.echo(f"Watching with {watcher.name}. Press Ctrl+C to stop.")
+
+    try:
+        watch_roots(
+            debounce=debounce,
+            max_delay=max_delay,
+            polling=poll,
+            poll_interval=poll_interval,
+            batch_size=batch_size,
+            progress=_echo_report,
+            on_ready=ready,
+        )
+    except (ValueError, OSError) as e:
+        typer.echo(f"Error watching roots: {e}", err=True)
+        raise typer.Exit(code=1)
+    except KeyboardInterrupt:
+        typer.echo("Stopped.")
+
+
+@app.command(help="Stream the accepted files under a directory as NDJSON.")
+def files(
+    path: str = typer.Argument(..., help="The directory to walk."),
+    walker: str = typer.Option(
+        "scandir", "--walker", help=f"Walker engine: {', '.join(WALKERS)}."
+    ),
+    workers: int = typer.Option(
+        None,
+        "--workers",
+        "-w",
+        help="Threads for the parallel walker, calls in flight for the async one.",
+    ),
+    special_includes: bool = typer.Option(
+        False, "--special-includes", help="Only collect SPECIAL_INCLUDES matches."
+    ),
+    include: list[str] = typer.Option(
+        None, "--include", help="Only collect files matching this pattern (repeatable)."
+    ),
+):
+    """Stream the accepted files under a directory as NDJSON."""
+    try:
+        records = iter_user_directory(
+            path,
+            use_special_includes=special_includes,
+            extra_includes=include,
+            walker=walker,
+            workers=workers,
+        )
+    except ValueError as e:
+        typer.echo(f"Error walking directory: {e}", err=True)
+        raise typer.Exit(code=1)
+
+    write = sys.stdout.write
+    for record in records:
+        write(json.dumps(record.to_dict()))
+        write("\n")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,185 @@
+import asyncio
+import contextlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from dl_cli.instrumentation import get_metrics
+from dl_cli.records import FileRecord
+from .scanner import (
+    MAX_FILE_SIZE,
+    _relative,
+    count_directory,
+    select_files,
+    split_entries,
+)
+
+
+# Default number of listings and stats in flight per root. High because
+# each call mostly waits on the server; too high only queues on the server
+ASYNC_CONCURRENCY = 64
+
+
+def _list(scandir, path):
+    with scandir(path) as it:
+        return list(it)
+
+
+def _stat(entry):
+    try:
+        return entry.stat()
+    except OSError:
+        return None
+
+
+class AsyncWalker:
+    """Walk one directory tree with many filesystem calls in flight.
+
+    Meant for roots on network filesystems (SMB/NFS), where every
+    ``scandir`` and ``stat`` is a round trip of a millisecond or more and a
+    serial walker spends almost all of its time waiting. Each directory is
+    a task: it lists the directory, starts tasks for the subdirectories,
+    filters the names with the same rules as ``list_directory``, and then
+    stats the remaining files concurrently. The blocking calls run on a
+    thread pool of ``concurrency`` threads, and a semaphore of the same size
+    keeps the pool's queue empty, so closing the walk early does not leave
+    thousands of queued calls behind.
+
+    ``scandir`` stands in for ``os.scandir``, e.g. to inject latency.
+    """
+
+    def __init__(self, rules, concurrency=ASYNC_CONCURRENCY, scandir=os.scandir):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1.")
+        self._rules = rules
+        self._concurrency = concurrency
+        self._scandir = scandir
+
+    async def walk(self, top):
+        """Yield the accepted file records of each directory under ``top``.
+
+        Directories are yielded as they finish, one list per directory.
+        Each directory takes one of ``4 * concurrency`` slots before it is
+        listed and gives it back once its list has been consumed (or right
+        away if it has no files), so a slow consumer stops new listings
+        rather than letting records pile up. Directories not yet listed
+        only cost a pending task holding their path.
+        """
+        top = os.fspath(top)
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(
+            self._concurrency, thread_name_prefix='asyncscan'
+        )
+        calls = asyncio.Semaphore(self._concurrency)
+        slots = asyncio.Semaphore(4 * self._concurrency)
+        results = asyncio.Queue()
+
+        async def call(fn, *args):
+            async with calls:
+                return await loop.run_in_executor(executor, fn, *args)
+
+        async def visit(tasks, root):
+            await slots.acquire()
+            try:
+                subdirs, files = await self._list_directory(call, root, top)
+            except BaseException:
+                slots.release()
+                raise
+            for subdir in subdirs:
+                tasks.create_task(visit(tasks, subdir))
+            if files:
+                # The consumer releases the slot when it takes the list
+                results.put_nowait(files)
+            else:
+                slots.release()
+
+        async def run():
+            try:
+                async with asyncio.TaskGroup() as tasks:
+                    tasks.create_task(visit(tasks, top))
+            except BaseExceptionGroup as group:
+                # Surface the first failure like the other walkers do
+                raise group.exceptions[0] from None
+            finally:
+                results.put_nowait(None)
+
+        runner = asyncio.create_task(run())
+        try:
+            while (files := await results.get()) is not None:
+                slots.release()
+                yield files
+            # Raises the first error of any directory task
+            await runner
+        finally:
+            if not runner.done():
+                runner.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await runner
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _list_directory(self, call, root, top):
+        """``list_directory`` with the listing and each stat awaited."""
+        metrics = get_metrics()
+        try:
+            entries = await call(_list, self._scandir, root)
+        except OSError:
+            # os.walk silently skips directories it cannot list
+            metrics.count('dir_errors')
+            return (), ()
+
+        rules = self._rules
+        rel = _relative(root, top)
+        subdirs, file_entries, pruned = split_entries(entries, rules, rel)
+        if not file_entries:
+            metrics.update(dirs_visited=1, dirs_pruned=pruned)
+            return subdirs, ()
+
+        candidates, rejected_name, rejected_include = select_files(
+            file_entries, rules, root, rel
+        )
+        stats = await asyncio.gather(
+            *(call(_stat, entry) for entry, _ in candidates)
+        )
+        parent = str(Path(root))
+        files = [
+            FileRecord(
+                entry.path,
+                entry.name,
+                stat.st_size,
+                stat.st_mtime,
+                stat.st_ctime,
+                ext,
+                parent,
+            )
+            for (entry, ext), stat in zip(candidates, stats)
+            if stat is not None and stat.st_size < MAX_FILE_SIZE
+        ]
+
+        if metrics.enabled:
+            count_directory(
+                metrics, pruned, len(file_entries), rejected_name,
+                rejected_include, len(candidates),
+                sum(stat is None for stat in stats), len(files),
+            )
+        return subdirs, files
+
+    def iter_walk(self, top):
+        """Yield every file record under ``top`` from a synchronous caller.
+
+        Drives ``walk`` on a private event loop in the calling thread, so
+        it plugs into the same batching and ingestion path as the other
+        walkers. Calls already in flight keep running while the caller
+        handles a batch; new ones start when it asks for more.
+        """
+        loop = asyncio.new_event_loop()
+        walk = self.walk(top)
+        try:
+            while True:
+                try:
+                    files = loop.run_until_complete(anext(walk))
+                except StopAsyncIteration:
+                    return
+                yield from files
+        finally:
+            loop.run_until_complete(walk.aclose())
+            loop.close()
@@ -0,0 +1,79 @@
+"""Filter decisions per second: ``FilterRules`` vs the per-call functions.
+
+Run with ``python -m src.scan-utils.benchmarks.filters``.
+"""
+import json
+import random
+import time
+
+from ..scanner import (
+    IGNORE_DIRS,
+    IGNORE_EXTENSIONS,
+    TARGET_EXTENSIONS,
+    build_filter_rules,
+    should_ignore_dir,
+    should_include_file,
+)
+
+_DIR_NAMES = [
+    'src', 'lib', 'docs', 'tests', 'node_modules', '.git', 'build', 'app',
+    'Components', 'Cache', 'vendor', 'scripts', '.dev', 'versions', 'utils',
+]
+_FILE_NAMES = [
+    'main.py', 'index.ts', 'README.md', 'photo.JPG', 'Dockerfile', 'Makefile',
+    'config.yaml', 'data.csv', 'notes', 'app.log', 'setup.cfg', '.env',
+    'archive.tar.gz', 'style.scss', 'LICENSE', 'build.sh', 'video.mp4',
+]
+
+
+def _sample(count, seed):
+    rng = random.Random(seed)
+    dirs = [rng.choice(_DIR_NAMES) for _ in range(count)]
+    files = []
+    for _ in range(count):
+        parts = [rng.choice(_DIR_NAMES) for _ in range(rng.randint(1, 6))]
+        files.append(('/home/user/' + '/'.join(parts), rng.choice(_FILE_NAMES)))
+    return dirs, files
+
+
+def _rate(decide, items):
+    start = time.perf_counter()
+    for item in items:
+        decide(item)
+    return len(items) / (time.perf_counter() - start)
+
+
+def run(count=100_000, seed=0):
+    """Return decisions/second for directory and file checks, old and new."""
+    dirs, files = _sample(count, seed)
+    rules = build_filter_rules()
+
+    def new_file(item):
+        parent, name = item
+        parts = parent.split('/')
+        return rules.accept_file(name, '.dev' in parts, 'versions' in parts)
+
+    return {
+        'count': count,
+        'dirs_old': _rate(lambda d: should_ignore_dir(d, IGNORE_DIRS), dirs),
+        'dirs_new': _rate(rules.ignore_dir, dirs),
+        'files_old': _rate(
+            lambda item: should_include_file(
+                f'{item[0]}/{item[1]}', TARGET_EXTENSIONS, IGNORE_EXTENSIONS
+            ),
+            files,
+        ),
+        'files_new': _rate(new_file, files),
+    }
+
+
+def main():
+    results = run()
+    for kind in ('dirs', 'files'):
+        old, new = results[f'{kind}_old'], results[f'{kind}_new']
+        print(f'{kind:>5}: {old:>12,.0f}/s -> {new:>12,.0f}/s  ({new / old:.1f}x)')
+    print(json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Keep ``dl_cli`` CLI startup cheap.
+
+Measures ``import dl_cli.cli`` in a fresh interpreter with
+``-X importtime``, checks that SQLAlchemy and pydantic stay out of it, and
+times cold ``--help``/``root list`` invocations. Exits non-zero when the
+import exceeds ``IMPORT_BUDGET_MS`` or pulls in a heavy module. Run with
+``python -m src.scan-utils.benchmarks.importtime``.
+"""
+import subprocess
+import sys
+import time
+
+IMPORT_BUDGET_MS = 150
+HEAVY_MODULES = ("sqlalchemy", "pydantic", "dl_cli.database", "dl_cli.models")
+COMMANDS = {
+    "--help": ["--help"],
+    "root list": ["root", "list"],
+}
+RUNS = 5
+
+
+def import_profile():
+    """Return ``(total_ms, loaded_modules)`` for a cold ``import dl_cli.cli``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import dl_cli.cli"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total_us = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        if not cumulative.strip().isdigit():
+            continue
+        modules.add(name)
+        if name == "dl_cli.cli":
+            total_us = int(cumulative)
+    return total_us / 1000, modules
+
+
+def time_command(args):
+    """Best wall time in ms of ``python -m dl_cli.cli *args`` over ``RUNS``."""
+    best = float("inf")
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "dl_cli.cli", *args],
+            capture_output=True,
+            check=False,
+        )
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    total_ms, modules = import_profile()
+    heavy = [
+        name
+        for name in HEAVY_MODULES
+        if any(m == name or m.startswith(name + ".") for m in modules)
+    ]
+    over = total_ms > IMPORT_BUDGET_MS
+    print(
+        f"{'FAIL' if over else 'ok':>4}  import dl_cli.cli: "
+        f"{total_ms:.1f} ms (budget {IMPORT_BUDGET_MS} ms)"
+    )
+    print(
+        f"{'FAIL' if heavy else 'ok':>4}  heavy modules at import: "
+        f"{', '.join(heavy) or 'none'}"
+    )
+    for label, args in COMMANDS.items():
+        print(f"{'':>4}  {label}: {time_command(args):.1f} ms")
+    sys.exit(1 if over or heavy else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Walk a tree as if it were on a network mount, with every call delayed.
+
+``LatencyFS`` wraps ``os.scandir`` so each listing and each ``stat`` sleeps
+first, like a round trip to an SMB/NFS server (``is_dir`` and friends stay
+free, as ``d_type`` comes back with the listing there too). The walkers
+take it through their ``scandir`` argument, which makes slow-mount
+behaviour reproducible on a local disk. Run with
+``python -m src.scan-utils.benchmarks.network [--latency MS] [--size N]``.
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+from ..scanner import WALKERS, build_filter_rules, scan_user_directory
+from .treegen import generate_tree
+
+
+class _SlowEntry:
+    """A ``DirEntry`` whose ``stat`` pays the filesystem's latency."""
+
+    __slots__ = ('_entry', '_fs', 'name', 'path')
+
+    def __init__(self, entry, fs):
+        self._entry = entry
+        self._fs = fs
+        self.name = entry.name
+        self.path = entry.path
+
+    def is_dir(self):
+        return self._entry.is_dir()
+
+    def is_symlink(self):
+        return self._entry.is_symlink()
+
+    def stat(self):
+        self._fs.wait()
+        return self._entry.stat()
+
+
+class LatencyFS:
+    """``os.scandir`` with ``latency`` seconds (plus up to ``jitter``) per call.
+
+    ``calls`` counts the delayed calls, so a run can be checked for the
+    number of round trips it would have cost.
+    """
+
+    def __init__(self, latency=0.002, jitter=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+        time.sleep(delay)
+
+    @contextlib.contextmanager
+    def scandir(self, path):
+        self.wait()
+        with os.scandir(path) as it:
+            yield [_SlowEntry(entry, self) for entry in it]
+
+
+def _time(path, latency, walker, workers):
+    fs = LatencyFS(latency)
+    rules = build_filter_rules()
+    # Through the engine directly: iter_user_directory has no scandir hook
+    engine = WALKERS[walker]
+    start = time.perf_counter()
+    if workers is None:
+        records = list(engine(path, rules, scandir=fs.scandir))
+    else:
+        records = list(engine(path, rules, workers, scandir=fs.scandir))
+    return {
+        'walker': walker,
+        'workers': workers,
+        'files': len(records),
+        'calls': fs.calls,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def run(size=2000, latency=0.002, path=None):
+    """Time the scandir, parallel and async walkers over a slow tree."""
+    with contextlib.ExitStack() as stack:
+        if path is None:
+            path = stack.enter_context(tempfile.TemporaryDirectory(prefix='network-'))
+            generate_tree(path, size)
+        expected = len(scan_user_directory(path))
+        results = [
+            _time(path, latency, 'scandir', None),
+            _time(path, latency, 'parallel', 8),
+            _time(path, latency, 'async', 64),
+        ]
+    for result in results:
+        if result['files'] != expected:
+            raise AssertionError(
+                f"{result['walker']} found {result['files']} files, expected {expected}"
+            )
+    return {'size': size, 'latency': latency, 'results': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=2000, help='Files in the generated tree.')
+    parser.add_argument('--latency', type=float, default=2.0, help='Milliseconds per call.')
+    parser.add_argument('--path', help='Walk this tree instead of generating one.')
+    args = parser.parse_args()
+
+    report = run(args.size, args.latency / 1000, args.path)
+    serial = report['results'][0]['seconds']
+    for result in report['results']:
+        workers = result['workers'] or 1
+        print(
+            f"{result['walker']:>9} x{workers:<3} {result['seconds']:>8.2f}s  "
+            f"{result['calls']:>7} calls  {serial / result['seconds']:>5.1f}x"
+        )
+    print(json.dumps(report))
+
+
+if __name__ == '__main__':
+    main()
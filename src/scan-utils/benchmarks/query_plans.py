@@ -0,0 +1,108 @@
+"""Check that the hot root_files/root_folders lookups stay indexed.
+
+Runs ``EXPLAIN QUERY PLAN`` for each query against the configured
+database and exits non-zero if any of them falls back to a full table
+scan or a temporary sort. Run with
+``python -m src.scan-utils.benchmarks.query_plans``. The test suite
+(``tests/test_query_plans.py``) checks the same queries against a fresh
+database, down to the index each one uses.
+"""
+import datetime
+import sys
+
+import sqlalchemy as sa
+
+from dl_cli.database import explain_query_plan
+from dl_cli.folders import in_subtree
+from dl_cli.models import (
+    RootFileModel,
+    RootFolderModel,
+    ScanSessionModel,
+    SnapshotFileModel,
+    SnapshotFolderModel,
+    SnapshotModel,
+)
+
+QUERIES = {
+    "files by root": sa.select(RootFileModel.id).where(RootFileModel.root_id == 1),
+    "file by name": sa.select(RootFileModel.id).where(
+        RootFileModel.folder_id == 1, RootFileModel.name == "y.py"
+    ),
+    "files of a folder": sa.select(RootFileModel.id).where(
+        RootFileModel.folder_id == 1
+    ),
+    "files by extension": sa.select(RootFileModel.id).where(
+        RootFileModel.root_id == 1, RootFileModel.extension == ".py"
+    ),
+    "extension totals by root": sa.select(
+        RootFileModel.extension, sa.func.count(), sa.func.sum(RootFileModel.size)
+    )
+    .where(RootFileModel.root_id == 1)
+    .group_by(RootFileModel.extension),
+    "largest files": sa.select(RootFileModel.id)
+    .order_by(RootFileModel.size.desc())
+    .limit(10),
+    "modified since": sa.select(RootFileModel.id).where(
+        RootFileModel.file_last_modified >= datetime.datetime(2024, 1, 1)
+    ),
+    "folder by name": sa.select(RootFolderModel.id).where(
+        RootFolderModel.parent_id == 1, RootFolderModel.name == "x"
+    ),
+    "top folder": sa.select(RootFolderModel.id).where(
+        RootFolderModel.root_id == 1,
+        RootFolderModel.parent_id.is_(None),
+        RootFolderModel.name == "/x",
+    ),
+    "folders by tree path": sa.select(RootFolderModel.id)
+    .where(RootFolderModel.root_id == 1)
+    .order_by(RootFolderModel.tree_path),
+    "files in a subtree": sa.select(RootFileModel.id)
+    .join(RootFolderModel, RootFolderModel.id == RootFileModel.folder_id)
+    .where(
+        RootFolderModel.root_id == 1,
+        in_subtree(RootFolderModel.tree_path, "/1/2/"),
+    ),
+    "interrupted scan session": sa.select(ScanSessionModel.id)
+    .where(ScanSessionModel.root_id == 1, ScanSessionModel.status == "running")
+    .order_by(ScanSessionModel.id.desc())
+    .limit(1),
+    "snapshots of a root": sa.select(SnapshotModel.id)
+    .where(SnapshotModel.root_id == 1)
+    .order_by(SnapshotModel.id.desc()),
+    "snapshot files in path order": sa.select(
+        SnapshotFolderModel.path, SnapshotFileModel.name
+    )
+    .join(
+        SnapshotFileModel,
+        sa.and_(
+            SnapshotFileModel.snapshot_id == SnapshotFolderModel.snapshot_id,
+            SnapshotFileModel.folder_id == SnapshotFolderModel.folder_id,
+        ),
+    )
+    .where(SnapshotFolderModel.snapshot_id == 1)
+    .order_by(SnapshotFolderModel.path, SnapshotFileModel.name),
+}
+
+
+def unindexed(plan):
+    """The plan lines that read a whole table or sort in a temp b-tree."""
+    return [
+        line
+        for line in plan
+        if (line.startswith("SCAN ") and " USING " not in line)
+        or "USE TEMP B-TREE" in line
+    ]
+
+
+def main():
+    failed = False
+    for name, query in QUERIES.items():
+        plan = explain_query_plan(query)
+        bad = unindexed(plan)
+        failed = failed or bool(bad)
+        print(f"{'FAIL' if bad else 'ok':>4}  {name}: {' | '.join(plan)}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Rows converted per second: per-row validation vs the bulk fast paths.
+
+Compares the old str-typed schema (datetimes formatted with ``isoformat``
+and validated row by row) with ``model_validate`` per row, one
+``TypeAdapter(list[...])`` call per batch, and ``model_construct``. Run
+with ``python -m src.scan-utils.benchmarks.schemas``.
+"""
+import datetime
+import json
+import time
+
+from pydantic import BaseModel
+
+from dl_cli.conversion import construct_rows, validate_rows
+from dl_cli.schemas import RootFileSchema
+
+
+class _LegacyRootFileSchema(BaseModel):
+    """``RootFileSchema`` as it was, with timestamps as ISO strings."""
+
+    id: int
+    root_id: int
+    full_path: str
+    name: str
+    extension: str
+    size: int
+    file_last_modified: str
+    file_created_at: str
+    created_at: str
+    updated_at: str
+
+
+class _Row:
+    """Stands in for a Core ``Row``: the conversions read ``_mapping``."""
+
+    __slots__ = ('_mapping',)
+
+    def __init__(self, mapping):
+        self._mapping = mapping
+
+
+def _sample(count):
+    base = datetime.datetime(2024, 1, 1)
+    rows = []
+    for i in range(count):
+        stamp = base + datetime.timedelta(seconds=i)
+        rows.append(_Row({
+            'id': i,
+            'root_id': 1,
+            'folder_id': i % 100,
+            'full_path': f'/home/user/src/pkg{i % 100}/module_{i}.py',
+            'name': f'module_{i}.py',
+            'extension': '.py',
+            'size': i * 7,
+            'file_last_modified': stamp,
+            'file_created_at': stamp,
+            'created_at': stamp,
+            'updated_at': stamp,
+        }))
+    return rows
+
+
+def _legacy(rows):
+    out = []
+    for row in rows:
+        values = dict(row._mapping)
+        for key, value in values.items():
+            if isinstance(value, datetime.datetime):
+                values[key] = value.isoformat()
+        out.append(_LegacyRootFileSchema(**values))
+    return out
+
+
+def _per_row(rows):
+    return [RootFileSchema.model_validate(row._mapping) for row in rows]
+
+
+def _rate(convert, rows, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        convert(rows)
+        best = min(best, time.perf_counter() - start)
+    return len(rows) / best
+
+
+def run(count=100_000, repeat=3):
+    """Return rows/second for each way of turning rows into schemas."""
+    rows = _sample(count)
+    mappings = [row._mapping for row in rows]
+    return {
+        'count': count,
+        'legacy': _rate(_legacy, rows, repeat),
+        'per_row': _rate(_per_row, rows, repeat),
+        'adapter': _rate(lambda _: validate_rows(RootFileSchema, mappings), rows, repeat),
+        'construct': _rate(lambda r: construct_rows(RootFileSchema, r), rows, repeat),
+    }
+
+
+def main():
+    results = run()
+    legacy = results['legacy']
+    for name in ('legacy', 'per_row', 'adapter', 'construct'):
+        rate = results[name]
+        print(f'{name:>9}: {rate:>12,.0f}/s  ({rate / legacy:.1f}x)')
+    print(json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
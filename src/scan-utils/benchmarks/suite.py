@@ -0,0 +1,207 @@
+"""End-to-end benchmark suite over synthetic trees.
+
+For each tree size, times the walkers (``scan_user_directory``), the
+filter rules, bulk ingestion (``RootDbManager.add_files``), full and
+incremental ``scan_all_roots`` and the ``RootDbManager`` read queries.
+Everything DB-related runs against a scratch database in the work
+directory, never the configured one.
+
+Results are written as JSON; ``--compare`` loads an earlier file and
+exits non-zero if any timing got slower by more than ``--threshold``.
+Run with ``python -m src.scan-utils.benchmarks.suite --sizes 10000,100000``.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from dl_cli.database import use_database
+from dl_cli.root_manager import RootDbManager as root_db
+from ..scanner import WALKERS, scan_all_roots, scan_user_directory
+from . import filters
+from .treegen import generate_tree
+
+SIZES = (10_000, 100_000, 1_000_000)
+DEFAULT_WORKDIR = os.path.join(tempfile.gettempdir(), 'scan-utils-bench')
+# Relative slowdown reported as a regression by --compare
+DEFAULT_THRESHOLD = 0.10
+
+
+def _best(func, repeat):
+    """Run ``func`` ``repeat`` times; return the fastest time and last result."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _fresh_database(path):
+    for suffix in ('', '-wal', '-shm'):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+    use_database(path)
+
+
+def run_size(files, workdir=DEFAULT_WORKDIR, repeat=3):
+    """Time every stage on a tree of ``files`` files.
+
+    Returns ``{name: {"seconds": ..., "items": ...}}``; seconds are the
+    best of ``repeat`` runs.
+    """
+    results = {}
+
+    def record(name, seconds, items):
+        results[name] = {
+            'seconds': seconds,
+            'items': items,
+            'per_second': items / seconds if seconds else 0.0,
+        }
+
+    tree = os.path.join(workdir, f'tree-{files}')
+    start = time.perf_counter()
+    manifest = generate_tree(tree, files=files, depth=4 if files <= 100_000 else 5)
+    record('treegen', time.perf_counter() - start, files)
+
+    records = []
+    for walker in sorted(WALKERS):
+        seconds, records = _best(
+            lambda: scan_user_directory(tree, walker=walker), repeat
+        )
+        record(f'scan_user_directory.{walker}', seconds, len(records))
+
+    sample = min(files, 100_000)
+    rates = filters.run(count=sample)
+    for kind in ('dirs_old', 'dirs_new', 'files_old', 'files_new'):
+        record(f'filters.{kind}', sample / rates[kind], sample)
+
+    _fresh_database(os.path.join(workdir, f'bench-{files}.db'))
+    root = root_db.create_root(tree, name='bench')
+
+    def ingest():
+        root_db.clear_files(root.id)
+        return root_db.add_files(root.id, records)
+
+    seconds, report = _best(ingest, repeat)
+    record('ingest.add_files', seconds, report.rows)
+
+    seconds, reports = _best(lambda: scan_all_roots(), repeat)
+    record('scan_all_roots.full', seconds, reports[0].rows)
+    # The first incremental pass stores every folder; later ones skip them
+    seconds, _ = _best(lambda: scan_all_roots(incremental=True), 1)
+    record('scan_all_roots.incremental_first', seconds, manifest['dirs'])
+    seconds, _ = _best(lambda: scan_all_roots(incremental=True), repeat)
+    record('scan_all_roots.incremental_noop', seconds, manifest['dirs'])
+
+    seconds, _ = _best(root_db.list_roots, repeat)
+    record('query.list_roots', seconds, 1)
+    seconds, _ = _best(lambda: root_db.get_root(name='bench'), repeat)
+    record('query.get_root', seconds, 1)
+    seconds, folders = _best(lambda: root_db.get_folder_states(root.id), repeat)
+    record('query.get_folder_states', seconds, len(folders))
+    seconds, states = _best(
+        lambda: list(root_db.iter_file_states(root.id)), repeat
+    )
+    record('query.iter_file_states', seconds, len(states))
+    seconds, states = _best(
+        lambda: list(root_db.iter_file_states(
+            root.id, under=tree, recursive=False
+        )),
+        repeat,
+    )
+    record('query.iter_file_states.directory', seconds, len(states))
+    return results
+
+
+def _meta():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sqlite': sqlite3.sqlite_version,
+        'cpus': os.cpu_count(),
+    }
+
+
+def run(sizes=SIZES, workdir=DEFAULT_WORKDIR, repeat=3):
+    os.makedirs(workdir, exist_ok=True)
+    return {
+        'meta': _meta(),
+        'results': {str(files): run_size(files, workdir, repeat) for files in sizes},
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """``(size, name, old, new)`` for timings slower than ``threshold``."""
+    regressions = []
+    for size, timings in current['results'].items():
+        old_timings = baseline['results'].get(size, {})
+        for name, timing in timings.items():
+            old = old_timings.get(name)
+            if name == 'treegen' or old is None or not old['seconds']:
+                continue
+            if timing['seconds'] > old['seconds'] * (1 + threshold):
+                regressions.append((size, name, old['seconds'], timing['seconds']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the scanner benchmarks.')
+    parser.add_argument(
+        '--sizes', default=str(SIZES[0]),
+        help='Comma-separated tree sizes in files, e.g. 10000,100000,1000000.',
+    )
+    parser.add_argument('--workdir', default=DEFAULT_WORKDIR)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Results file (default: bench-<time>.json).')
+    parser.add_argument('--compare', help='Earlier results file to check against.')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    results = run(sizes, args.workdir, args.repeat)
+    for size, timings in results['results'].items():
+        print(f'{int(size):,} files')
+        for name, timing in timings.items():
+            print(
+                f'  {name:<36} {timing["seconds"]:>9.4f}s '
+                f'{timing["per_second"]:>14,.0f}/s'
+            )
+
+    output = args.output or datetime.datetime.now().strftime('bench-%Y%m%d-%H%M%S.json')
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'Results written to {output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, args.threshold)
+        for size, name, old, new in regressions:
+            print(f'SLOWER  {int(size):,} {name}: {old:.4f}s -> {new:.4f}s '
+                  f'(+{(new / old - 1) * 100:.0f}%)')
+        if regressions:
+            sys.exit(1)
+        print(f'No regressions over {args.threshold:.0%}.')
+
+
+if __name__ == '__main__':
+    main()
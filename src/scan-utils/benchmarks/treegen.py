@@ -0,0 +1,140 @@
+"""Deterministic synthetic directory trees for the benchmarks.
+
+The same arguments always produce the same tree: names, layout, sizes
+and mtimes all come from one seeded ``random.Random``. File bodies are
+sparse (``truncate``), so even a million-file tree costs little disk.
+A finished tree records its arguments in ``.treegen.json`` and is reused
+when asked for again. Run with
+``python -m src.scan-utils.benchmarks.treegen PATH --files 100000``.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+
+# (extension, weight); mostly files the scanner keeps, plus ones it drops
+DEFAULT_EXTENSION_MIX = (
+    ('.py', 20), ('.js', 10), ('.ts', 8), ('.md', 8), ('.json', 8),
+    ('.yaml', 5), ('.txt', 5), ('.html', 4), ('.css', 3), ('.sh', 2),
+    ('', 2), ('.png', 8), ('.jpg', 6), ('.log', 5), ('.mp4', 2),
+    ('.zip', 2), ('.pyc', 2),
+)
+DEFAULT_IGNORED_DIRS = ('node_modules', '.git', '__pycache__', 'build')
+_MANIFEST = '.treegen.json'
+# Fixed base mtime so repeated runs see identical trees (2024-01-01 UTC)
+_EPOCH = 1704067200
+
+
+def _spec(files, depth, fanout, extensions, ignored_dirs, ignored_fraction,
+          max_size, seed):
+    return {
+        'files': files,
+        'depth': depth,
+        'fanout': fanout,
+        'extensions': [list(item) for item in extensions],
+        'ignored_dirs': list(ignored_dirs),
+        'ignored_fraction': ignored_fraction,
+        'max_size': max_size,
+        'seed': seed,
+    }
+
+
+def _directories(rng, top, depth, fanout):
+    """Every directory of a tree ``depth`` levels deep, ``fanout`` wide."""
+    dirs = [top]
+    level = [top]
+    for d in range(depth):
+        level = [
+            os.path.join(parent, f'd{d}_{i}')
+            for parent in level
+            for i in range(rng.randint(1, fanout))
+        ]
+        dirs.extend(level)
+    return dirs
+
+
+def generate_tree(
+        path,
+        files=10_000,
+        depth=4,
+        fanout=6,
+        extensions=DEFAULT_EXTENSION_MIX,
+        ignored_dirs=DEFAULT_IGNORED_DIRS,
+        ignored_fraction=0.1,
+        max_size=4096,
+        seed=0,
+):
+    """Create (or reuse) a synthetic tree under ``path`` and describe it.
+
+    ``files`` are spread over a tree ``depth`` levels deep with up to
+    ``fanout`` subdirectories each; about ``ignored_fraction`` of them land
+    inside directories named after ``ignored_dirs``. Returns the manifest:
+    the arguments plus the ``dirs`` count.
+    """
+    spec = _spec(files, depth, fanout, extensions, ignored_dirs,
+                 ignored_fraction, max_size, seed)
+    manifest_path = os.path.join(path, _MANIFEST)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if {k: manifest.get(k) for k in spec} == spec:
+            return manifest
+    except (OSError, ValueError):
+        pass
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    rng = random.Random(seed)
+    dirs = _directories(rng, path, depth, fanout)
+    ignored = [
+        os.path.join(rng.choice(dirs), name, 'pkg')
+        for name in ignored_dirs
+        for _ in range(max(1, len(dirs) // 50))
+    ] if ignored_dirs and ignored_fraction else []
+    for d in dirs + ignored:
+        os.makedirs(d, exist_ok=True)
+
+    names = [ext for ext, _ in extensions]
+    weights = [weight for _, weight in extensions]
+    for i in range(files):
+        if ignored and rng.random() < ignored_fraction:
+            parent = rng.choice(ignored)
+        else:
+            parent = rng.choice(dirs)
+        ext = rng.choices(names, weights)[0]
+        file_path = os.path.join(parent, f'f{i}{ext}' if ext else f'Makefile{i}')
+        with open(file_path, 'wb') as f:
+            f.truncate(rng.randint(0, max_size))
+        mtime = _EPOCH + i
+        os.utime(file_path, (mtime, mtime))
+
+    manifest = {**spec, 'dirs': len(dirs) + len(ignored)}
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic tree.')
+    parser.add_argument('path')
+    parser.add_argument('--files', type=int, default=10_000)
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--fanout', type=int, default=6)
+    parser.add_argument('--ignored-fraction', type=float, default=0.1)
+    parser.add_argument('--max-size', type=int, default=4096)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(generate_tree(
+        args.path,
+        files=args.files,
+        depth=args.depth,
+        fanout=args.fanout,
+        ignored_fraction=args.ignored_fraction,
+        max_size=args.max_size,
+        seed=args.seed,
+    )))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+import re
+
+
+_GLOB_CHARS = frozenset('*?[')
+
+
+def _glob_to_regex(pattern):
+    """Translate one gitignore-style glob into a regex fragment.
+
+    ``*`` and ``?`` never cross a ``/``; ``**/`` matches zero or more
+    directories and a trailing ``**`` matches everything below.
+    """
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**/', i):
+                out.append('(?:.*/)?')
+                i += 3
+                continue
+            if pattern.startswith('**', i):
+                out.append('.*')
+                i += 2
+                continue
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            j = i + 1
+            if j < n and pattern[j] == '!':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            j = pattern.find(']', j)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j].replace('\\', '\\\\')
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append(f'[{body}]')
+                i = j + 1
+                continue
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+def _path_regex(pattern):
+    """Regex fragment matching a root-relative path, gitignore-style.
+
+    A pattern with a leading or inner ``/`` is anchored at the scan root;
+    one without a ``/`` matches a name at any depth.
+    """
+    pattern = pattern.rstrip('/')
+    if pattern.startswith('/'):
+        return _glob_to_regex(pattern[1:])
+    if '/' in pattern:
+        return _glob_to_regex(pattern)
+    return '(?:.*/)?' + _glob_to_regex(pattern)
+
+
+def _include_regex(pattern):
+    """Regex fragment for one include pattern.
+
+    A trailing ``/`` limits the pattern to directories, so it matches the
+    paths below the directory but not a file of that name.
+    """
+    if pattern.endswith('/'):
+        return _path_regex(pattern) + '/.*'
+    return _path_regex(pattern)
+
+
+def _runs(patterns):
+    """Split ``patterns`` into ``(negated, patterns)`` runs of one sign.
+
+    A leading ``!`` negates a pattern and ``\\!`` stands for a literal
+    ``!``, as in a ``.gitignore``. The runs keep the patterns' order, so the
+    last matching run decides like the last matching line does there.
+    """
+    runs = []
+    for pattern in patterns:
+        negated = pattern.startswith('!')
+        if negated or pattern.startswith('\\!'):
+            pattern = pattern[1:]
+        if runs and runs[-1][0] == negated:
+            runs[-1][1].append(pattern)
+        else:
+            runs.append((negated, [pattern]))
+    return runs
+
+
+def _compile_dir_run(patterns):
+    """``(names, name_regex, path_regex)`` for a run of ignore patterns."""
+    literal, globbed, pathed = set(), [], []
+    for pattern in patterns:
+        pattern = pattern.rstrip('/')
+        if '/' in pattern:
+            pathed.append(_path_regex(pattern))
+        elif _GLOB_CHARS.isdisjoint(pattern):
+            literal.add(pattern.lower())
+        else:
+            globbed.append(_glob_to_regex(pattern))
+    return (
+        frozenset(literal),
+        _combine(globbed, r'\Z', re.IGNORECASE),
+        _combine(pathed, r'\Z', re.IGNORECASE),
+    )
+
+
+def _combine(fragments, suffix='', flags=0):
+    if not fragments:
+        return None
+    return re.compile(
+        '(?:' + '|'.join(fragments) + ')' + suffix, flags
+    )
+
+
+class FilterRules:
+    """Ignore/include rules compiled once and shared by every walker.
+
+    Directory names are checked with one set lookup for literal names and
+    one combined regex for globbed ones, both case-insensitive like the old
+    ``should_ignore_dir``. Ignore patterns containing a ``/`` (such as
+    ``Documents/My Music``) are matched against the path relative to the
+    scan root. File names are decided by suffix with set lookups only.
+
+    Each include group (``SPECIAL_INCLUDES``, user patterns) compiles to a
+    single regex over root-relative paths; a file is collected only if it
+    matches every group, either directly or through one of its parent
+    directories, as in a ``.gitignore``.
+
+    In both lists a ``!pattern`` takes back what earlier patterns matched,
+    and the last matching pattern wins. Consecutive patterns of one sign
+    share their lookups, so lists without negations cost the same as before.
+    """
+
+    def __init__(
+            self,
+            ignore_dirs,
+            ignore_extensions,
+            target_extensions,
+            extensionless_names,
+            include_groups=(),
+    ):
+        self._ignore_dir_runs = tuple(
+            (negated, *_compile_dir_run(patterns))
+            for negated, patterns in _runs(ignore_dirs)
+        )
+        self.ignore_extensions = frozenset(e.lower() for e in ignore_extensions)
+        self.target_extensions = frozenset(e.lower() for e in target_extensions)
+        self.extensionless_names = frozenset(n.lower() for n in extensionless_names)
+        self._include_groups = tuple(
+            tuple(
+                (negated, _combine(
+                    [_include_regex(p) for p in patterns], r'(?:/.*)?\Z'
+                ))
+                for negated, patterns in _runs(group)
+            )
+            for group in include_groups
+            if group
+        )
+        # A directory's match only covers everything below it when no
+        # later pattern can take part of it back
+        self._include_negations = any(
+            negated for group in self._include_groups for negated, _ in group
+        )
+
+    @property
+    def has_includes(self):
+        return bool(self._include_groups)
+
+    def ignore_dir(self, name, rel_parent=''):
+        """Whether to prune the directory ``name`` inside ``rel_parent``."""
+        lowered = name.lower()
+        for negated, names, name_regex, path_regex in reversed(self._ignore_dir_runs):
+            if (
+                lowered in names
+                or name_regex is not None and name_regex.match(name)
+                or path_regex is not None and path_regex.match(
+                    f'{rel_parent}/{name}' if rel_parent else name
+                )
+            ):
+                return not negated
+        return False
+
+    def include_path(self, rel_path):
+        """Whether a root-relative path passes every include group."""
+        for group in self._include_groups:
+            for negated, regex in reversed(group):
+                if regex.match(rel_path) is not None:
+                    if negated:
+                        return False
+                    break
+            else:
+                return False
+        return True
+
+    def include_dir(self, rel_dir):
+        """Whether every file below the directory ``rel_dir`` is included."""
+        return not self._include_negations and self.include_path(rel_dir)
+
+    def accept_file(self, name, in_dev=False, in_versions=False):
+        """Return the lowercased extension if ``name`` is wanted, else None.
+
+        ``in_dev``/``in_versions`` say whether the parent path contains a
+        ``.dev``/``versions`` component; extensionless files there are kept.
+        """
+        # Same rule as Path(name).suffix: a leading dot is not a suffix
+        i = name.rfind('.')
+        if 0 < i < len(name) - 1:
+            ext = name[i:].lower()
+            if ext in self.ignore_extensions or ext not in self.target_extensions:
+                return None
+            return ext
+
+        if name.lower() in self.extensionless_names:
+            return ''
+        if (in_dev or name == '.dev') and (in_versions or name == 'versions'):
+            return ''
+        return None
@@ -0,0 +1,187 @@
+import os
+from collections import defaultdict
+
+from dl_cli.config import INGEST_BATCH_SIZE
+from dl_cli.records import to_db_datetime
+from dl_cli.root_manager import RootDbManager as root_db
+from dl_cli.schemas import RootChangesSchema
+from .scanner import list_directory
+
+
+def _folder_record(path, stat):
+    return {
+        'path': path,
+        'name': os.path.basename(path),
+        'size': stat.st_size,
+        'modified': stat.st_mtime,
+        'created': stat.st_ctime,
+    }
+
+
+def plan_rescan(root_id, root_path, rules, batch_size=INGEST_BATCH_SIZE):
+    """Compare a root on disk with ``root_folders``/``root_files``.
+
+    A directory whose mtime matches the stored ``folder_last_modified`` has
+    not gained, lost or renamed entries, so it is not listed again: its
+    subdirectories are taken from ``root_folders`` and only stat'ed to check
+    their own mtimes. Directories that changed (or are new) are re-listed
+    and their files compared by size and mtime against that directory's
+    stored rows.
+
+    Yields the changes as ``RootChangesSchema`` parts to apply in order,
+    each with about ``batch_size`` file changes, so memory stays flat
+    however much of the root changed (or was never listed, as after a full
+    scan). A directory's files and its new mtime always share a part; the
+    last part removes what has vanished and may be empty.
+
+    Edits that rewrite a file in place without touching its directory entry
+    do not change the directory mtime and are only picked up by a full scan.
+    """
+    stored_folders = root_db.get_folder_states(root_id)
+    children = defaultdict(list)
+    for path in stored_folders:
+        children[os.path.dirname(path)].append(path)
+
+    changes = RootChangesSchema(root_id=root_id)
+    seen = set()
+    top = os.fspath(root_path)
+    stack = [top]
+
+    while stack:
+        path = stack.pop()
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # Gone: its stored folder and file rows get removed below
+            continue
+
+        stored = stored_folders.get(path)
+        if stored is not None and stored[1] == to_db_datetime(stat.st_mtime):
+            seen.add(path)
+            changes.dirs_skipped += 1
+            stack.extend(children.get(path, ()))
+            continue
+
+        try:
+            subdirs, files = list_directory(path, rules, top)
+        except OSError:
+            # Unreadable right now: keep whatever is stored for the subtree
+            seen.add(path)
+            stack.extend(children.get(path, ()))
+            continue
+
+        seen.add(path)
+        changes.dirs_listed += 1
+        record = _folder_record(path, stat)
+        if stored is None:
+            changes.folders_added.append(record)
+            current = {}
+        else:
+            changes.folders_changed.append({'id': stored[0], **record})
+            current = root_db.get_file_states(stored[0])
+        for file in files:
+            state = current.pop(file.name, None)
+            if state is None:
+                changes.files_added.append(file)
+            elif file.size != state[1] or to_db_datetime(file.modified) != state[2]:
+                changes.files_changed.append((state[0], file))
+        changes.files_removed.extend(id_ for id_, _, _ in current.values())
+        stack.extend(subdirs)
+        if _file_changes(changes) >= batch_size:
+            yield changes
+            changes = RootChangesSchema(root_id=root_id)
+
+    for path, (folder_id, _) in stored_folders.items():
+        if path in seen:
+            continue
+        # Gone or now ignored, with the files stored for it
+        changes.folders_removed.append(folder_id)
+        changes.files_removed.extend(
+            id_ for id_, _, _ in root_db.get_file_states(folder_id).values()
+        )
+        if _file_changes(changes) >= batch_size:
+            yield changes
+            changes = RootChangesSchema(root_id=root_id)
+    yield changes
+
+
+def _file_changes(changes):
+    return (
+        len(changes.files_added)
+        + len(changes.files_changed)
+        + len(changes.files_removed)
+    )
+
+
+def _under(path, parent):
+    return path == parent or path.startswith(parent.rstrip(os.sep) + os.sep)
+
+
+def plan_directories(root_id, root_path, rules, dirs):
+    """Reconcile only the directories in ``dirs`` with the stored rows.
+
+    Used by watch mode, where the watcher names the directories whose
+    entries changed. Each one is re-listed whatever its mtime (so in-place
+    file edits are seen), stored subdirectories that vanished are dropped
+    with everything below them, and new subdirectories are walked in full.
+    A directory that no longer exists hands over to its parent.
+    """
+    top = os.fspath(root_path)
+    stored_folders = root_db.get_folder_states(root_id)
+    children = defaultdict(list)
+    for path in stored_folders:
+        children[os.path.dirname(path)].append(path)
+
+    changes = RootChangesSchema(root_id=root_id)
+    stack = sorted({d for d in dirs if _under(d, top)}, reverse=True)
+    done = set()
+    removed = set()
+
+    while stack:
+        path = stack.pop()
+        if path in done or any(_under(path, gone) for gone in removed):
+            continue
+        done.add(path)
+        try:
+            stat = os.stat(path)
+            subdirs, files = list_directory(path, rules, top)
+        except OSError:
+            if path != top:
+                stack.append(os.path.dirname(path))
+            continue
+
+        changes.dirs_listed += 1
+        stored = stored_folders.get(path)
+        record = _folder_record(path, stat)
+        if stored is None:
+            changes.folders_added.append(record)
+        elif stored[1] != to_db_datetime(stat.st_mtime):
+            changes.folders_changed.append({'id': stored[0], **record})
+
+        current = {file.path: file for file in files}
+        for id_, full_path, size, modified in root_db.iter_file_states(
+            root_id, under=path, recursive=False
+        ):
+            file = current.pop(full_path, None)
+            if file is None:
+                changes.files_removed.append(id_)
+            elif file.size != size or to_db_datetime(file.modified) != modified:
+                changes.files_changed.append((id_, file))
+        changes.files_added.extend(current.values())
+
+        listed = set(subdirs)
+        stack.extend(sub for sub in subdirs if sub not in stored_folders)
+        for sub in children.get(path, ()):
+            if sub in listed:
+                continue
+            # Deleted, moved away or now ignored: drop the whole subtree
+            removed.add(sub)
+            changes.folders_removed.extend(
+                id_ for folder, (id_, _) in stored_folders.items()
+                if _under(folder, sub)
+            )
+            changes.files_removed.extend(
+                id_ for id_, *_ in root_db.iter_file_states(root_id, under=sub)
+            )
+
+    return changes
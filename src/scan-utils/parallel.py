@@ -0,0 +1,132 @@
+import os
+import queue
+import threading
+from collections import deque
+
+from dl_cli.instrumentation import get_metrics
+
+
+# Default worker count for the parallel walker; beyond this the GIL-held
+# filtering work starts to dominate over the syscalls that run in parallel
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+
+class WorkStealingWalker:
+    """Walk one directory tree with a pool of work-stealing threads.
+
+    Every worker owns a deque of directories. It pushes the subdirectories
+    it discovers onto its own deque and pops from the same end, so it keeps
+    working depth-first through its own subtree. A worker that runs dry
+    steals from the other end of a busy worker's deque, which holds the
+    oldest, highest-up and therefore largest pending subtrees.
+
+    ``list_dir(path)`` must return ``(subdirs, files)`` and may raise
+    ``OSError`` for unreadable directories, which are skipped. The
+    ``os.scandir``/``stat`` calls behind it release the GIL, which is where
+    the speedup comes from.
+    """
+
+    def __init__(self, list_dir, workers=DEFAULT_WORKERS):
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
+        self._list_dir = list_dir
+        self._workers = workers
+
+    def iter_walk(self, top):
+        """Yield every file record under ``top`` as the workers find them.
+
+        Workers hand over one directory's records at a time through a
+        bounded queue, so a slow consumer throttles the walk instead of
+        letting results pile up. Closing the generator early stops the
+        workers.
+        """
+        self._deques = [deque() for _ in range(self._workers)]
+        self._out = queue.Queue(maxsize=4 * self._workers)
+        self._cond = threading.Condition()
+        self._error = None
+        self._stopped = False
+        # Directories queued or being listed; the walk ends when it hits 0
+        self._outstanding = 1
+        self._deques[0].append(os.fspath(top))
+
+        threads = [
+            threading.Thread(target=self._run, args=(index,), daemon=True)
+            for index in range(self._workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            finished = 0
+            while finished < self._workers:
+                files = self._out.get()
+                if files is None:
+                    finished += 1
+                else:
+                    yield from files
+            if self._error is not None:
+                raise self._error
+        finally:
+            with self._cond:
+                self._stopped = True
+                self._cond.notify_all()
+            # Unblock workers still waiting to hand over records
+            while any(thread.is_alive() for thread in threads):
+                try:
+                    self._out.get(timeout=0.05)
+                except queue.Empty:
+                    pass
+
+    def _steal(self, index):
+        deques = self._deques
+        count = len(deques)
+        for offset in range(1, count):
+            try:
+                return deques[(index + offset) % count].popleft()
+            except IndexError:
+                continue
+        return None
+
+    def _run(self, index):
+        with get_metrics().profile_thread():
+            self._work(index)
+
+    def _work(self, index):
+        own = self._deques[index]
+        cond = self._cond
+
+        try:
+            while self._error is None and not self._stopped:
+                try:
+                    path = own.pop()
+                except IndexError:
+                    path = self._steal(index)
+                    if path is None:
+                        with cond:
+                            if self._outstanding == 0:
+                                return
+                            cond.wait(0.05)
+                        continue
+
+                try:
+                    subdirs, files = self._list_dir(path)
+                except OSError:
+                    subdirs, files = (), ()
+                if files:
+                    self._out.put(files)
+
+                # Count the new directories as they are published, so the
+                # total can never drop to 0 while work is still pending
+                with cond:
+                    self._outstanding += len(subdirs) - 1
+                    if subdirs:
+                        own.extend(subdirs)
+                        cond.notify(len(subdirs))
+                    elif self._outstanding == 0:
+                        cond.notify_all()
+        except BaseException as e:
+            with cond:
+                self._error = e
+                cond.notify_all()
+        finally:
+            self._out.put(None)
@@ -1,8 +1,20 @@
-from src.dl_cli.schemas import RootFileSchema
+from dl_cli.schemas import IngestReportSchema, RootFileSchema
 import os
 from pathlib import Path
 import fnmatch
-from src.dl_cli.root_manager import RootDbManager as root_db
+import itertools
+import multiprocessing
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dl_cli.config import INGEST_BATCH_SIZE, SCAN_CHECKPOINT_INTERVAL
+from dl_cli.instrumentation import get_metrics
+from dl_cli.records import FileRecord
+from dl_cli.root_manager import RootDbManager as root_db
+from dl_cli.scan_sessions import ScanSessionManager
+from dl_cli.snapshots import SnapshotManager
+from .filters import FilterRules
+from .parallel import DEFAULT_WORKERS, WorkStealingWalker
 
 # These directories can contain 10k-100k+ files each
 IGNORE_DIRS = [
@@ -118,6 +130,16 @@ SPECIAL_INCLUDES = [
 ]
 
 
+# Extensionless file names that are always worth keeping
+EXTENSIONLESS_INCLUDES = {
+    'dockerfile', 'makefile', 'rakefile', 'gemfile', 'procfile',
+    '.env', '.gitignore', '.dockerignore', '.gitattributes'
+}
+
+# Text files larger than this are skipped
+MAX_FILE_SIZE = 10 * 1024 * 1024
+
+
 def should_ignore_dir(dir_name, ignore_dirs):
     return any(fnmatch.fnmatch(dir_name.lower(), pattern.lower())
                for pattern in ignore_dirs)
@@ -129,10 +151,7 @@ def should_include_file(file_path, target_extensions, ignore_extensions):
     # Special handling for extensionless files
     if not path_obj.suffix:
         # Include common extensionless config files
-        if path_obj.name.lower() in {
-            'dockerfile', 'makefile', 'rakefile', 'gemfile', 'procfile',
-            '.env', '.gitignore', '.dockerignore', '.gitattributes'
-        }:
+        if path_obj.name.lower() in EXTENSIONLESS_INCLUDES:
             return True
         # Include files in .dev/versions/ regardless of extension
         if '.dev' in path_obj.parts and 'versions' in path_obj.parts:
@@ -149,78 +168,675 @@ def should_include_file(file_path, target_extensions, ignore_extensions):
     return ext in target_extensions
 
 
-def scan_user_directory(
-        user_path,
-        use_special_includes=False,
-        extra_includes=None
-):
-    files = []
+def build_filter_rules(use_special_includes=False, extra_includes=None):
+    """Compile this module's ignore/include policy into ``FilterRules``."""
+    include_groups = []
+    if extra_includes:
+        include_groups.append(list(extra_includes))
+    if use_special_includes:
+        include_groups.append(SPECIAL_INCLUDES)
+    return FilterRules(
+        IGNORE_DIRS,
+        IGNORE_EXTENSIONS,
+        TARGET_EXTENSIONS,
+        EXTENSIONLESS_INCLUDES,
+        include_groups,
+    )
 
-    for root, dirs, filenames in os.walk(user_path):
+
+def _relative(root, top):
+    """``root`` relative to the scan root, with ``/`` separators."""
+    rel = root[len(top):].lstrip(os.sep)
+    return rel.replace(os.sep, '/') if os.sep != '/' else rel
+
+
+def _scan_os_walk(user_path, rules):
+    """Original walker: ``os.walk`` plus an ``os.stat`` per candidate file."""
+    top = os.fspath(user_path)
+    metrics = get_metrics()
+
+    def on_error(error):
+        metrics.count('dir_errors')
+
+    for root, dirs, filenames in os.walk(top, onerror=on_error):
+        rel = _relative(root, top)
         # Skip ignored directories
-        dirs[:] = [d for d in dirs if not should_ignore_dir(d, IGNORE_DIRS)]
-
-        # Handle special includes
-        if extra_includes:
-            for pattern in extra_includes:
-                if fnmatch.fnmatch(root, pattern):
-                    # If the root matches an extra include, don't skip it
-                    break
-            else:
-                # If no extra include matched, skip this directory
-                continue
+        kept = [d for d in dirs if not rules.ignore_dir(d, rel)]
+        metrics.update(
+            dirs_visited=1, dirs_pruned=len(dirs) - len(kept),
+            files_seen=len(filenames),
+        )
+        dirs[:] = kept
 
-        # Handle special includes for .dev/versions
-        if use_special_includes:
-            for pattern in SPECIAL_INCLUDES:
-                if fnmatch.fnmatch(root, pattern):
-                    # If the root matches a special include, don't skip it
-                    break
-            else:
-                # If no special include matched, skip this directory
-                continue
+        collect_all = rules.include_dir(rel)
+        parts = Path(root).parts
+        in_dev, in_versions = '.dev' in parts, 'versions' in parts
 
         # Collect files
         for filename in filenames:
             filepath = os.path.join(root, filename)
 
             # Check if the file should be included
-            if should_include_file(
-                filepath,
-                TARGET_EXTENSIONS,
-                IGNORE_EXTENSIONS
+            if rules.accept_file(filename, in_dev, in_versions) is None:
+                metrics.count('files_rejected_name')
+                continue
+            if not collect_all and not rules.include_path(
+                f'{rel}/{filename}' if rel else filename
             ):
-                try:
-                    stat = os.stat(filepath)
-                    # Only include files smaller than 10MB for text files
-                    if stat.st_size < 10 * 1024 * 1024:
-                        files.append({
-                            'path': filepath,
-                            'name': filename,
-                            'size': stat.st_size,
-                            'modified': stat.st_mtime,
-                            'extension': Path(filepath).suffix.lower(),
-                            'parent': str(Path(filepath).parent),
-                        })
-                except (OSError, IOError):
-                    continue
-            root_db.add_files(files)
-    return files
+                metrics.count('files_rejected_include')
+                continue
+            metrics.count('stat_calls')
+            try:
+                stat = os.stat(filepath)
+            except (OSError, IOError):
+                metrics.count('stat_errors')
+                continue
+            # Only include files smaller than 10MB for text files
+            if stat.st_size >= MAX_FILE_SIZE:
+                metrics.count('files_rejected_size')
+            else:
+                metrics.count('files_accepted')
+                yield FileRecord(
+                    filepath,
+                    filename,
+                    stat.st_size,
+                    stat.st_mtime,
+                    stat.st_ctime,
+                    Path(filepath).suffix.lower(),
+                    str(Path(filepath).parent),
+                )
+
+
+def split_entries(entries, rules, rel):
+    """Sort one directory's entries into subdirectories and files.
+
+    Returns ``(subdirs, file_entries, pruned)``: the paths of subdirectories
+    to descend into (ignored and symlinked ones removed), the non-directory
+    entries, and how many subdirectories the rules pruned.
+    """
+    subdirs = []
+    file_entries = []
+    pruned = 0
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if not is_dir:
+            file_entries.append(entry)
+        elif rules.ignore_dir(entry.name, rel):
+            pruned += 1
+        else:
+            # Like os.walk(followlinks=False): list symlinked dirs,
+            # but never descend into them
+            try:
+                if not entry.is_symlink():
+                    subdirs.append(entry.path)
+            except OSError:
+                continue
+    return subdirs, file_entries, pruned
+
+
+def select_files(file_entries, rules, root, rel):
+    """Filter file entries by name before anything is stat'ed.
+
+    Returns ``(candidates, rejected_name, rejected_include)`` where
+    ``candidates`` holds the ``(entry, extension)`` pairs worth a ``stat``.
+    """
+    collect_all = rules.include_dir(rel)
+    parts = Path(root).parts
+    in_dev = '.dev' in parts
+    in_versions = 'versions' in parts
+
+    candidates = []
+    rejected_name = rejected_include = 0
+    for entry in file_entries:
+        name = entry.name
+        ext = rules.accept_file(name, in_dev, in_versions)
+        if ext is None:
+            rejected_name += 1
+            continue
+        if not collect_all and not rules.include_path(
+            f'{rel}/{name}' if rel else name
+        ):
+            rejected_include += 1
+            continue
+        candidates.append((entry, ext))
+    return candidates, rejected_name, rejected_include
+
+
+def list_directory(root, rules, top, scandir=os.scandir):
+    """List one directory of the tree under ``top`` with ``os.scandir``.
+
+    Returns ``(subdirs, files)``: the paths of subdirectories to descend
+    into (ignored and symlinked ones removed) and the accepted file records.
+    File names are filtered before anything is stat'ed, so rejected files
+    cost no syscall at all, and path-derived values (parent, ``.dev`` /
+    ``versions`` membership) are computed once per directory instead of
+    once per file. Raises ``OSError`` if the directory cannot be listed.
+    ``scandir`` stands in for ``os.scandir``, e.g. to inject latency.
+    """
+    metrics = get_metrics()
+    try:
+        with scandir(root) as it:
+            entries = list(it)
+    except OSError:
+        metrics.count('dir_errors')
+        raise
+
+    rel = _relative(root, top)
+    subdirs, file_entries, pruned = split_entries(entries, rules, rel)
+    files = []
+    if not file_entries:
+        metrics.update(dirs_visited=1, dirs_pruned=pruned)
+        return subdirs, files
+
+    candidates, rejected_name, rejected_include = select_files(
+        file_entries, rules, root, rel
+    )
+    parent = str(Path(root))
+    stat_errors = 0
+    for entry, ext in candidates:
+        try:
+            stat = entry.stat()
+        except OSError:
+            stat_errors += 1
+            continue
+        if stat.st_size < MAX_FILE_SIZE:
+            files.append(FileRecord(
+                entry.path,
+                entry.name,
+                stat.st_size,
+                stat.st_mtime,
+                stat.st_ctime,
+                ext,
+                parent,
+            ))
+
+    if metrics.enabled:
+        count_directory(
+            metrics, pruned, len(file_entries), rejected_name,
+            rejected_include, len(candidates), stat_errors, len(files),
+        )
+    return subdirs, files
+
+
+def count_directory(
+        metrics, pruned, seen, rejected_name, rejected_include,
+        stat_calls, stat_errors, accepted,
+):
+    """Report one listed directory's tallies in a single update."""
+    metrics.update(
+        dirs_visited=1,
+        dirs_pruned=pruned,
+        files_seen=seen,
+        files_rejected_name=rejected_name,
+        files_rejected_include=rejected_include,
+        files_rejected_size=stat_calls - stat_errors - accepted,
+        files_accepted=accepted,
+        stat_calls=stat_calls,
+        stat_errors=stat_errors,
+    )
+
+
+def _scan_scandir(user_path, rules, scandir=os.scandir):
+    """``os.scandir`` walker built on ``list_directory``.
+
+    Produces the same records as ``_scan_os_walk`` with far fewer syscalls
+    and temporary objects per file.
+    """
+    top = os.fspath(user_path)
+    stack = [top]
+
+    while stack:
+        root = stack.pop()
+        try:
+            subdirs, dir_files = list_directory(root, rules, top, scandir)
+        except OSError:
+            # os.walk silently skips directories it cannot list
+            continue
+        # Reversed so directories pop in os.walk's top-down order
+        stack.extend(reversed(subdirs))
+        yield from dir_files
+
+
+def _scan_parallel(user_path, rules, workers=DEFAULT_WORKERS, scandir=os.scandir):
+    """Multi-threaded ``list_directory`` walker with work stealing.
+
+    Yields the same file set as the serial walkers, in a different order.
+    """
+    top = os.fspath(user_path)
+
+    def list_dir(root):
+        return list_directory(root, rules, top, scandir)
+
+    return WorkStealingWalker(list_dir, workers).iter_walk(top)
+
+
+def _scan_async(user_path, rules, workers=None, scandir=os.scandir):
+    """asyncio walker with up to ``workers`` filesystem calls in flight.
+
+    For high-latency network mounts; yields the same file set as the
+    serial walkers, in a different order. On a local disk, where calls
+    return in microseconds, handing each one to a thread costs more than
+    it saves and ``scandir`` is faster.
+    """
+    # Imported here: asyncscan builds on this module
+    from .asyncscan import ASYNC_CONCURRENCY, AsyncWalker
+
+    walker = AsyncWalker(rules, workers or ASYNC_CONCURRENCY, scandir)
+    return walker.iter_walk(user_path)
+
+
+# Selectable walker engines, keyed by the ``walker`` argument
+WALKERS = {
+    'os.walk': _scan_os_walk,
+    'scandir': _scan_scandir,
+    'parallel': _scan_parallel,
+    'async': _scan_async,
+}
+
+# Walkers whose ``workers`` argument sets how much runs concurrently
+CONCURRENT_WALKERS = ('parallel', 'async')
+
+
+def iter_user_directory(
+        user_path,
+        use_special_includes=False,
+        extra_includes=None,
+        walker='scandir',
+        workers=None,
+        rules=None,
+):
+    """Yield the accepted files under ``user_path`` as they are found.
+
+    Nothing is accumulated, so memory stays flat however large the tree.
+    ``rules`` is a precompiled ``FilterRules``; when omitted one is built
+    from ``use_special_includes`` and ``extra_includes``.
+    """
+    if rules is None:
+        rules = build_filter_rules(use_special_includes, extra_includes)
+    check_walker(walker, workers)
+
+    engine = WALKERS[walker]
+    if workers is None:
+        return engine(user_path, rules)
+    return engine(user_path, rules, workers)
+
+
+def check_walker(walker='scandir', workers=None):
+    """Raise ``ValueError`` unless ``walker`` exists and takes ``workers``."""
+    if walker not in WALKERS:
+        raise ValueError(
+            f"Unknown walker '{walker}'. Choose one of: {', '.join(WALKERS)}."
+        )
+    if workers is not None and walker not in CONCURRENT_WALKERS:
+        raise ValueError(
+            f"workers only applies to the {' and '.join(CONCURRENT_WALKERS)} walkers."
+        )
+
+
+def iter_file_batches(user_path, batch_size=INGEST_BATCH_SIZE, **kwargs):
+    """Yield the files under ``user_path`` in lists of up to ``batch_size``."""
+    for batch in itertools.batched(iter_user_directory(user_path, **kwargs), batch_size):
+        yield list(batch)
+
+
+def iter_checkpointed_batches(
+        user_path,
+        rules,
+        batch_size=INGEST_BATCH_SIZE,
+        frontier=None,
+        interval=SCAN_CHECKPOINT_INTERVAL,
+        scandir=os.scandir,
+):
+    """Serial ``scandir`` walk in batches that can carry a checkpoint.
+
+    Yields ``(files, frontier)`` pairs. Batches end only at directory
+    boundaries, so a batch can exceed ``batch_size`` by one directory's
+    files. At most once every ``interval`` seconds, ``frontier`` is a
+    copy of the directories still to list. Every file outside them has
+    then been yielded, so a walk given that list as ``frontier`` yields
+    exactly the rest. Between checkpoints ``frontier`` is None, and when a
+    checkpoint falls due with no files pending, the batch is empty.
+    """
+    top = os.fspath(user_path)
+    stack = list(frontier) if frontier is not None else [top]
+    buffer = []
+    last = time.monotonic()
+
+    while stack:
+        root = stack.pop()
+        try:
+            subdirs, dir_files = list_directory(root, rules, top, scandir)
+        except OSError:
+            continue
+        stack.extend(reversed(subdirs))
+        buffer.extend(dir_files)
+
+        now = time.monotonic()
+        if now - last >= interval:
+            last = now
+            yield buffer, list(stack)
+            buffer = []
+        elif len(buffer) >= batch_size:
+            yield buffer, None
+            buffer = []
+    if buffer:
+        yield buffer, None
+
+
+def scan_user_directory(user_path, **kwargs):
+    """Return the accepted files under ``user_path`` as a list of records.
+
+    Thin wrapper around ``iter_user_directory``; prefer that for big trees.
+    """
+    return list(iter_user_directory(user_path, **kwargs))
+
+
+# Pool types for scan_all_roots, keyed by the ``executor`` argument
+EXECUTORS = {
+    'thread': ThreadPoolExecutor,
+    'process': ProcessPoolExecutor,
+}
+
+
+def _scan_root_worker(walk, out, rules, batch_size, incremental, start_from, kwargs):
+    """Walk one root, or nested roots together, for the writer behind ``out``.
+
+    ``walk`` is a list of ``(root_id, path)`` pairs, the outermost root
+    first; messages about the whole walk carry that root's id. Runs on a
+    pool worker and never writes to the DB itself. A full scan sends
+    ``('start', root_id, None)`` and waits on ``start_from`` for the
+    frontier to start from (None for the top, False to give up). It then
+    sends each root's ``files`` messages of ``(batch, frontier)``, and
+    ``complete`` once the walk has finished. The final
+    ``('done', root_id, seconds)`` message is always sent, even on error,
+    so the writer knows to stop waiting for this walk.
+    """
+    start = time.perf_counter()
+    metrics = get_metrics()
+    root_id, root_path = walk[0]
+    try:
+        with metrics.profile_thread(), metrics.phase('walk'):
+            if incremental:
+                # Imported here: incremental builds on this module
+                from .incremental import plan_rescan
+
+                for changes in plan_rescan(root_id, root_path, rules, batch_size):
+                    out.put(('changes', root_id, changes))
+                return
+
+            out.put(('start', root_id, None))
+            frontier = start_from.get()
+            if frontier is False:
+                return
+            if len(walk) > 1:
+                # Imported here: shared builds on this module
+                from .shared import iter_shared_batches
+
+                for batches, checkpoint in iter_shared_batches(
+                    walk, rules, batch_size, frontier
+                ):
+                    for member_id, batch in batches.items():
+                        out.put(('files', member_id, (batch, None)))
+                    if checkpoint is not None:
+                        # After every batch before it, for each root's session
+                        for member_id, _ in walk:
+                            out.put(('files', member_id, ([], checkpoint)))
+            else:
+                if kwargs.get('walker', 'scandir') == 'scandir':
+                    batches = iter_checkpointed_batches(
+                        root_path, rules, batch_size, frontier
+                    )
+                else:
+                    # Only the serial walker has a frontier to checkpoint
+                    batches = (
+                        (batch, None) for batch in iter_file_batches(
+                            root_path, batch_size, rules=rules, **kwargs
+                        )
+                    )
+                for batch in batches:
+                    out.put(('files', root_id, batch))
+            out.put(('complete', root_id, None))
+    finally:
+        out.put(('done', root_id, time.perf_counter() - start))
+
+
+def _frontier_fits(frontier, member_ids):
+    """Whether a stored frontier has the shape this walk's walker expects.
+
+    A walk of one root stores paths; a shared walk stores ``[path, ids]``
+    pairs, which must only name roots that are still part of the walk.
+    """
+    if not isinstance(frontier, list):
+        return False
+    if len(member_ids) == 1:
+        return all(isinstance(item, str) for item in frontier)
+    return all(
+        isinstance(item, list) and len(item) == 2 and set(item[1]) <= set(member_ids)
+        for item in frontier
+    )
+
+
+def _start_sessions(member_ids, options, resume, sessions):
+    """Open the sessions of one walk's roots and pick where it starts.
+
+    The walk resumes only if every root's interrupted session stopped at
+    the same usable frontier. Otherwise the roots that did resume are
+    restarted, so that all of them start from the top.
+    """
+    frontiers = {}
+    for member_id in member_ids:
+        sessions[member_id], frontiers[member_id] = ScanSessionManager.start(
+            member_id, options, resume
+        )
+    first = frontiers[member_ids[0]]
+    if first is not None and _frontier_fits(first, member_ids) and all(
+        frontier == first for frontier in frontiers.values()
+    ):
+        return first
+    for member_id, frontier in frontiers.items():
+        if frontier is not None:
+            sessions[member_id], _ = ScanSessionManager.start(
+                member_id, options, resume=False
+            )
+    return None
 
 
 def scan_all_roots(
+    batch_size=INGEST_BATCH_SIZE,
+    incremental=False,
+    concurrency=1,
+    executor='thread',
+    progress=None,
+    resume=True,
     **kwargs
 ):
+    """Scan every registered root and bring its rows in the DB up to date.
+
+    Up to ``concurrency`` roots are walked at once on a thread or process
+    pool, while the calling thread is the single writer: every DB write
+    goes through it, so SQLite never sees competing writers.
+
+    A full scan replaces each root's ``root_files`` rows and yields an
+    ingest report per root. Its ``root_folders`` rows are kept, so folder
+    ids stay the same from scan to scan, and new directories are added as
+    files turn up in them. With ``incremental=True`` only directories whose
+    mtime changed since the last incremental scan are re-listed, and a sync
+    report per root is produced instead. Reports are returned in root order;
+    ``progress(root, report)`` is called as each root finishes.
+
+    In a full scan with the ``scandir`` walker, roots nested inside another
+    registered root are walked together with it (see ``shared``): every
+    directory is listed, and every file stat'ed, once for all of them.
+
+    Full scans run as scan sessions (see ``dl_cli.scan_sessions``). With
+    the default ``scandir`` walker they checkpoint as they go, and with
+    ``resume=True`` a root whose last full scan was interrupted continues
+    from its last checkpoint, as long as the filter options are the same.
+    Each completed full scan leaves a snapshot of its root's files (see
+    ``dl_cli.snapshots``) to diff later scans against.
+    """
     if 'path' in kwargs:
         raise ValueError(
             "The 'path' argument is not supported for scan_all_roots. Use scan_user_directory instead."
         )
+    if executor not in EXECUTORS:
+        raise ValueError(
+            f"Unknown executor '{executor}'. Choose one of: {', '.join(EXECUTORS)}."
+        )
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1.")
+    # Checked before any root is cleared or any session opened
+    check_walker(kwargs.get('walker', 'scandir'), kwargs.get('workers'))
+
+    # Compiled once and shared by every root. A checkpoint only resumes a
+    # walk with the same options; prebuilt rules cannot be compared
+    rules = kwargs.pop('rules', None)
+    if rules is None:
+        options = {
+            'use_special_includes': kwargs.pop('use_special_includes', False),
+            'extra_includes': sorted(kwargs.pop('extra_includes', None) or ()),
+        }
+        rules = build_filter_rules(
+            options['use_special_includes'], options['extra_includes'] or None
+        )
+    else:
+        options = None
 
     roots = root_db.list_roots()
-    all_files = []
-
-    for root in roots:
-        files = scan_user_directory(root.path, **kwargs)
-        all_files.extend(files)
-
-    return all_files
+    if not roots:
+        return []
+    if incremental or kwargs.get('walker', 'scandir') != 'scandir':
+        walks = [[root] for root in roots]
+    else:
+        # Imported here: shared builds on this module
+        from .shared import plan_walks
+
+        walks = plan_walks(roots)
+    # Root ids of each walk, keyed by its outermost root
+    members = {walk[0].id: [root.id for root in walk] for walk in walks}
+    metrics = get_metrics()
+    by_id = {root.id: root for root in roots}
+    reports = {}
+    # Files written so far for each root in a full scan: [rows, batches, seconds]
+    written = {root.id: [0, 0, 0.0] for root in roots}
+    # Full scans: the root's session, its resumed flag and rows written
+    # since its last checkpoint
+    sessions = {}
+    resumed = {}
+    unsaved = dict.fromkeys(by_id, 0)
+    # Full scans: the snapshot each root's completed scan left
+    snapshots = {}
+    # Each root's root_folders rows, read on its first batch and kept
+    # current by add_files as it adds directories
+    folders = {}
+
+    # Bounded so fast walkers cannot run far ahead of the writer
+    maxsize = 4 * concurrency
+    manager = multiprocessing.Manager() if executor == 'process' else None
+    out = manager.Queue(maxsize) if manager else queue.Queue(maxsize)
+    # Where each walk starts, sent (and removed) once its sessions are open
+    starts = {
+        walk_id: manager.Queue(1) if manager else queue.Queue(1) for walk_id in members
+    }
+
+    try:
+        with EXECUTORS[executor](max_workers=concurrency) as pool:
+            futures = [
+                pool.submit(
+                    _scan_root_worker,
+                    [(root.id, root.path) for root in walk],
+                    out, rules, batch_size, incremental, starts[walk[0].id], kwargs,
+                )
+                for walk in walks
+            ]
+
+            pending = len(walks)
+            try:
+                while pending:
+                    kind, root_id, payload = out.get()
+                    if kind == 'start':
+                        with metrics.phase('db.clear'):
+                            frontier = _start_sessions(
+                                members[root_id], options, resume, sessions
+                            )
+                        for member_id in members[root_id]:
+                            resumed[member_id] = frontier is not None
+                        starts.pop(root_id).put(frontier)
+                    elif kind == 'files':
+                        batch, frontier = payload
+                        if batch:
+                            with metrics.phase('db.write'):
+                                if root_id not in folders:
+                                    folders[root_id] = root_db.folder_tree(root_id)
+                                report = root_db.add_files(
+                                    root_id, batch, batch_size, folders[root_id]
+                                )
+                            totals = written[root_id]
+                            totals[0] += report.rows
+                            totals[1] += report.batches
+                            totals[2] += report.elapsed
+                            unsaved[root_id] += report.rows
+                        if frontier is not None:
+                            ScanSessionManager.checkpoint(
+                                sessions[root_id], frontier, unsaved[root_id]
+                            )
+                            unsaved[root_id] = 0
+                    elif kind == 'complete':
+                        for member_id in members[root_id]:
+                            ScanSessionManager.finish(
+                                sessions[member_id], unsaved[member_id]
+                            )
+                            unsaved[member_id] = 0
+                            snapshots[member_id] = SnapshotManager.take(
+                                member_id, sessions[member_id]
+                            )
+                    elif kind == 'changes':
+                        with metrics.phase('db.write'):
+                            if root_id not in folders:
+                                folders[root_id] = root_db.folder_tree(root_id)
+                            reports[root_id] = root_db.apply_changes(
+                                payload,
+                                batch_size=batch_size,
+                                folders=folders[root_id],
+                                report=reports.get(root_id),
+                            )
+                    elif kind == 'done':
+                        pending -= 1
+                        for member_id in members[root_id]:
+                            if member_id not in reports:
+                                rows, batches, elapsed = written[member_id]
+                                reports[member_id] = IngestReportSchema(
+                                    root_id=member_id,
+                                    rows=rows,
+                                    batches=batches,
+                                    batch_size=batch_size,
+                                    elapsed=elapsed,
+                                    resumed=resumed.get(member_id, False),
+                                    snapshot_id=snapshots.get(member_id),
+                                )
+                            # A shared walk's time is reported for each root
+                            reports[member_id].scan_elapsed = payload
+                            if progress:
+                                progress(by_id[member_id], reports[member_id])
+            except BaseException:
+                # The writer failed: stop roots that have not started and
+                # drain the queue so running walkers are not left blocked
+                pending -= sum(future.cancel() for future in futures)
+                for start_from in starts.values():
+                    start_from.put(False)
+                while pending:
+                    if out.get()[0] == 'done':
+                        pending -= 1
+                raise
+
+            # Surface the first walker error, if any
+            for future in futures:
+                future.result()
+    finally:
+        if manager:
+            manager.shutdown()
+
+    return [reports[root.id] for root in roots]
@@ -0,0 +1,182 @@
+import os
+import time
+
+from dl_cli.config import INGEST_BATCH_SIZE, SCAN_CHECKPOINT_INTERVAL
+from dl_cli.instrumentation import get_metrics
+from dl_cli.records import FileRecord
+from dl_cli.root_tree import RootTree
+from .scanner import (
+    MAX_FILE_SIZE,
+    _relative,
+    count_directory,
+    select_files,
+    split_entries,
+)
+
+
+def plan_walks(roots):
+    """Group roots into walks: each outermost root with the roots inside it.
+
+    Returns one list of roots per walk, the outermost root first. A root
+    nested in another is listed and stat'ed as part of its outer root's
+    walk instead of on its own.
+    """
+    tree = RootTree((root.id, root.path) for root in roots)
+    by_id = {root.id: root for root in roots}
+    walks = {}
+    for root in roots:
+        outer = tree.containing(root.path)[0]
+        walk = walks.setdefault(outer, [by_id[outer]])
+        if root.id != outer:
+            walk.append(root)
+    return list(walks.values())
+
+
+def list_shared_directory(path, rules, active, tops, tree, scandir=os.scandir):
+    """List one directory once on behalf of every root in ``active``.
+
+    Each root filters the listing with paths relative to its own top, so
+    it gets exactly the subdirectories and files a walk of that root alone
+    would; files wanted by several roots are stat'ed once. Returns
+    ``(subdirs, files)``. ``subdirs`` holds ``(path, root_ids)`` pairs, the
+    roots that descend into each, and includes roots of ``tree`` whose
+    path the active roots prune or skip. ``files`` maps each root id to its
+    records. Raises ``OSError`` if the directory cannot be listed.
+    """
+    metrics = get_metrics()
+    try:
+        with scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        metrics.count('dir_errors')
+        raise
+
+    descend = {}
+    candidates = {}
+    chosen = {}
+    tallies = None
+    for root_id in active:
+        rel = _relative(path, tops[root_id])
+        subdirs, file_entries, pruned = split_entries(entries, rules, rel)
+        for subdir in subdirs:
+            descend.setdefault(subdir, []).append(root_id)
+        names = chosen[root_id] = []
+        rejected = (0, 0)
+        if file_entries:
+            selected, *rejected = select_files(file_entries, rules, path, rel)
+            for entry, ext in selected:
+                names.append(entry.name)
+                candidates.setdefault(entry.name, (entry, ext))
+        if tallies is None:
+            tallies = (pruned, len(file_entries), *rejected)
+
+    # Nested roots start where the walk reaches them, even below a
+    # directory every active root prunes
+    for root_id in tree.below(path, nearest=True):
+        root_path = tree.path(root_id)
+        rel = root_path[len(path):].lstrip(os.sep)
+        child = os.path.join(path, rel.split(os.sep, 1)[0])
+        if child == root_path or child not in descend:
+            descend.setdefault(root_path, []).append(root_id)
+
+    parent = str(path)
+    records = {}
+    stat_errors = 0
+    for name, (entry, ext) in candidates.items():
+        try:
+            stat = entry.stat()
+        except OSError:
+            stat_errors += 1
+            continue
+        if stat.st_size < MAX_FILE_SIZE:
+            records[name] = FileRecord(
+                entry.path,
+                name,
+                stat.st_size,
+                stat.st_mtime,
+                stat.st_ctime,
+                ext,
+                parent,
+            )
+    files = {
+        root_id: [records[name] for name in names if name in records]
+        for root_id, names in chosen.items()
+    }
+
+    if metrics.enabled:
+        # Rejections as the outermost active root saw them
+        pruned, seen, rejected_name, rejected_include = tallies
+        count_directory(
+            metrics, pruned, seen, rejected_name, rejected_include,
+            len(candidates), stat_errors, len(records),
+        )
+        if len(active) > 1:
+            metrics.count('dirs_shared')
+    return [(subdir, tuple(ids)) for subdir, ids in descend.items()], files
+
+
+def iter_shared_batches(
+        walk,
+        rules,
+        batch_size=INGEST_BATCH_SIZE,
+        frontier=None,
+        interval=SCAN_CHECKPOINT_INTERVAL,
+        scandir=os.scandir,
+):
+    """Walk nested roots together, like ``iter_checkpointed_batches``.
+
+    ``walk`` is a list of ``(root_id, path)`` pairs, the outermost root
+    first. Yields ``(batches, frontier)``: ``batches`` maps root ids to
+    lists of records, each root's batch ending at a directory boundary.
+    ``frontier``, at most once every ``interval`` seconds, is a list of
+    ``[path, root_ids]`` pairs still to list. All records up to that point
+    have been yielded, so a walk given that frontier yields exactly the
+    rest.
+    """
+    tops = dict(walk)
+    tree = RootTree(walk)
+    outer_id, outer_path = walk[0]
+    if frontier is None:
+        stack = [(os.fspath(outer_path), (outer_id,))]
+    else:
+        stack = [(path, tuple(ids)) for path, ids in frontier]
+    buffers = {root_id: [] for root_id in tops}
+    last = time.monotonic()
+
+    while stack:
+        path, active = stack.pop()
+        try:
+            subdirs, files = list_shared_directory(
+                path, rules, active, tops, tree, scandir
+            )
+        except OSError:
+            # Roots below an unreadable directory are still walked
+            subdirs = [
+                (tree.path(root_id), (root_id,))
+                for root_id in tree.below(path, nearest=True)
+            ]
+            files = {}
+        stack.extend(reversed(subdirs))
+        for root_id, records in files.items():
+            buffers[root_id].extend(records)
+
+        now = time.monotonic()
+        if now - last >= interval:
+            last = now
+            yield (
+                {root_id: batch for root_id, batch in buffers.items() if batch},
+                [[path, list(ids)] for path, ids in stack],
+            )
+            buffers = {root_id: [] for root_id in tops}
+        else:
+            full = {
+                root_id: batch for root_id, batch in buffers.items()
+                if len(batch) >= batch_size
+            }
+            if full:
+                yield full, None
+                buffers.update((root_id, []) for root_id in full)
+
+    rest = {root_id: batch for root_id, batch in buffers.items() if batch}
+    if rest:
+        yield rest, None
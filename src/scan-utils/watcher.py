@@ -0,0 +1,279 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from collections import defaultdict
+
+from dl_cli.config import INGEST_BATCH_SIZE
+from dl_cli.root_manager import RootDbManager as root_db
+from .incremental import plan_directories, plan_rescan
+from .scanner import build_filter_rules
+
+# Quiet period after the last event before a batch is written, in seconds
+WATCH_DEBOUNCE = 1.0
+# Upper bound on how long a busy tree can hold a batch back
+WATCH_MAX_DELAY = 10.0
+# Seconds between directory stat passes of the polling watcher
+WATCH_POLL_INTERVAL = 5.0
+
+# From <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+_EVENT = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+class InotifyWatcher:
+    """Directory watcher on Linux inotify, through ``ctypes``.
+
+    One watch per directory; ``read`` turns events into the set of
+    ``(root_id, directory)`` pairs whose entries changed. A queue overflow
+    is reported as ``(root_id, None)`` for every root, meaning "rescan".
+    """
+
+    name = 'inotify'
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c')
+        if not sys.platform.startswith('linux') or not libc_name:
+            raise OSError(errno.ENOSYS, 'inotify is only available on Linux')
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        # wd -> [(root_id, path)]; overlapping roots share a watch
+        self._watches = defaultdict(list)
+        self._roots = set()
+
+    def add(self, root_id, path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                return
+            hint = ''
+            if err == errno.ENOSPC:
+                hint = ' (raise fs.inotify.max_user_watches or use polling)'
+            raise OSError(err, f'{os.strerror(err)}{hint}', path)
+        if (root_id, path) not in self._watches[wd]:
+            self._watches[wd].append((root_id, path))
+        self._roots.add(root_id)
+
+    def read(self, timeout):
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                changed.update((root_id, None) for root_id in self._roots)
+                continue
+            if mask & IN_IGNORED:
+                # Watch removed by the kernel: the directory is gone
+                self._watches.pop(wd, None)
+                continue
+            for root_id, path in self._watches.get(wd, ()):
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    changed.add((root_id, os.path.dirname(path)))
+                else:
+                    changed.add((root_id, path))
+            if mask & IN_MOVE_SELF:
+                # The old path is stale; the parent re-adds it if it moved
+                # within the tree
+                self._libc.inotify_rm_watch(self._fd, wd)
+                self._watches.pop(wd, None)
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """Portable watcher that stats every watched directory on an interval.
+
+    A directory is reported when its mtime changes or it disappears (then
+    its parent is reported). Directory mtimes only move when entries are
+    added, removed or renamed, so in-place edits of existing files go
+    unnoticed until their directory changes or a full scan runs.
+    ``poll`` does one pass without waiting, for tests and callers that
+    drive their own schedule.
+    """
+
+    name = 'polling'
+
+    def __init__(self, interval=WATCH_POLL_INTERVAL, clock=time.monotonic):
+        self.interval = interval
+        self._clock = clock
+        self._next = clock()
+        # path -> (root_ids, mtime_ns)
+        self._known = {}
+
+    def add(self, root_id, path):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return
+        roots, _ = self._known.get(path, (set(), None))
+        roots.add(root_id)
+        self._known[path] = (roots, mtime)
+
+    def poll(self):
+        changed = set()
+        for path, (roots, mtime) in list(self._known.items()):
+            try:
+                current = os.stat(path).st_mtime_ns
+            except OSError:
+                del self._known[path]
+                changed.update((root_id, os.path.dirname(path)) for root_id in roots)
+                continue
+            if current != mtime:
+                self._known[path] = (roots, current)
+                changed.update((root_id, path) for root_id in roots)
+        return changed
+
+    def read(self, timeout):
+        wait = self._next - self._clock()
+        if timeout is not None and wait > timeout:
+            time.sleep(timeout)
+            return set()
+        if wait > 0:
+            time.sleep(wait)
+        self._next = self._clock() + self.interval
+        return self.poll()
+
+    def close(self):
+        self._known.clear()
+
+
+def open_watcher(polling=False, poll_interval=WATCH_POLL_INTERVAL):
+    """inotify where available, else (or when asked) the polling watcher."""
+    if not polling:
+        try:
+            return InotifyWatcher()
+        except OSError:
+            pass
+    return PollingWatcher(poll_interval)
+
+
+def _sync(root, rules, dirs, batch_size, watcher):
+    """Apply one root's pending changes and watch any new directories."""
+    start = time.perf_counter()
+    if dirs is None:
+        parts = plan_rescan(root.id, root.path, rules, batch_size)
+    else:
+        parts = [plan_directories(root.id, root.path, rules, dirs)]
+    folders = root_db.folder_tree(root.id)
+    report = None
+    for changes in parts:
+        report = root_db.apply_changes(
+            changes, batch_size=batch_size, folders=folders, report=report
+        )
+        for record in changes.folders_added:
+            watcher.add(root.id, record['path'])
+    # Planning and writing alternate: the rest of the time was the walk
+    report.scan_elapsed = time.perf_counter() - start - report.elapsed
+    return report
+
+
+def watch_roots(
+    debounce=WATCH_DEBOUNCE,
+    max_delay=WATCH_MAX_DELAY,
+    polling=False,
+    poll_interval=WATCH_POLL_INTERVAL,
+    batch_size=INGEST_BATCH_SIZE,
+    progress=None,
+    stop=None,
+    on_ready=None,
+    **kwargs
+):
+    """Keep every registered root's rows in sync until ``stop`` is set.
+
+    Every stored folder is watched and each root is brought up to date with
+    an incremental rescan first. After that, changed directories are
+    collected until no event arrived for ``debounce`` seconds (or
+    ``max_delay`` passed since the first one) and then re-listed and written
+    as one batch per root, with the same filter rules as a scan.
+    ``progress(root, report)`` is called after every write and
+    ``on_ready(watcher)`` once the initial sync is done.
+    """
+    if debounce < 0 or max_delay < debounce:
+        raise ValueError('Need 0 <= debounce <= max_delay.')
+
+    rules = kwargs.pop('rules', None) or build_filter_rules(
+        kwargs.pop('use_special_includes', False),
+        kwargs.pop('extra_includes', None),
+    )
+    roots = {root.id: root for root in root_db.list_roots()}
+    if not roots:
+        return
+
+    watcher = open_watcher(polling, poll_interval)
+    try:
+        # Watch before the first sync, so nothing changes unseen in between
+        for root in roots.values():
+            watcher.add(root.id, root.path)
+            for path in root_db.get_folder_states(root.id):
+                watcher.add(root.id, path)
+        for root in roots.values():
+            report = _sync(root, rules, None, batch_size, watcher)
+            if progress:
+                progress(root, report)
+        if on_ready:
+            on_ready(watcher)
+
+        # root_id -> set of directories, or None for a full rescan
+        pending = {}
+        first = last = None
+        while stop is None or not stop.is_set():
+            if pending:
+                timeout = max(0.0, min(last + debounce, first + max_delay) - time.monotonic())
+            else:
+                # Wake up now and then to notice ``stop``
+                timeout = 1.0
+            for root_id, path in watcher.read(timeout):
+                if path is None:
+                    pending[root_id] = None
+                elif pending.get(root_id, ()) is not None:
+                    pending.setdefault(root_id, set()).add(path)
+                last = time.monotonic()
+                first = first or last
+
+            now = time.monotonic()
+            if pending and (now - last >= debounce or now - first >= max_delay):
+                batch, pending = pending, {}
+                first = last = None
+                for root_id, dirs in batch.items():
+                    report = _sync(roots[root_id], rules, dirs, batch_size, watcher)
+                    if progress:
+                        progress(roots[root_id], report)
+    finally:
+        watcher.close()
@@ -0,0 +1,12 @@
+import pytest
+
+from dl_cli import database
+
+
+@pytest.fixture
+def scratch_db(tmp_path):
+    """Point the engine at an empty database under ``tmp_path``."""
+    previous = database.DB_PATH
+    database.use_database(str(tmp_path / "db"))
+    yield database.get_engine()
+    database.use_database(previous)
@@ -0,0 +1,62 @@
+import importlib
+
+import pytest
+
+from dl_cli.conversion import construct_rows
+from dl_cli.root_manager import RootDbManager
+from dl_cli.schemas import RootFileSchema, RootFolderSchema
+
+scanner = importlib.import_module("src.scan-utils.scanner")
+
+
+@pytest.fixture
+def root(scratch_db, tmp_path):
+    tree = tmp_path / "tree"
+    (tree / "pkg").mkdir(parents=True)
+    (tree / "a.txt").write_text("a")
+    (tree / "pkg" / "b.py").write_text("print('b')")
+    root = RootDbManager.create_root(str(tree), "tree")
+    scanner.scan_all_roots()
+    return root
+
+
+# Every schema construct_rows is used with, and how its rows are read
+ITERATORS = {
+    RootFileSchema: RootDbManager.iter_files,
+    RootFolderSchema: RootDbManager.iter_folders,
+}
+
+
+@pytest.mark.parametrize("schema", list(ITERATORS))
+def test_construct_rows_matches_model_validate(root, schema):
+    constructed = [row for batch in ITERATORS[schema](root.id) for row in batch]
+    assert constructed
+    for instance in constructed:
+        assert type(instance) is schema
+        validated = schema.model_validate(instance.model_dump())
+        # The whole pydantic state: fields, fields set, extra and private
+        assert instance.__getstate__() == validated.__getstate__()
+        assert instance.model_dump_json() == validated.model_dump_json()
+
+
+@pytest.mark.parametrize("schema", list(ITERATORS))
+def test_construct_rows_matches_validate_rows(root, schema):
+    constructed = [row for batch in ITERATORS[schema](root.id) for row in batch]
+    validated = [
+        row for batch in ITERATORS[schema](root.id, validate=True) for row in batch
+    ]
+    assert [row.__getstate__() for row in constructed] == [
+        row.__getstate__() for row in validated
+    ]
+
+
+class _Row:
+    def __init__(self, **values):
+        self._mapping = values
+
+
+def test_construct_rows_with_other_columns_uses_model_construct():
+    [instance] = construct_rows(RootFolderSchema, [_Row(id=1, name="x")])
+    assert instance.__getstate__() == (
+        RootFolderSchema.model_construct(id=1, name="x").__getstate__()
+    )
@@ -0,0 +1,185 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from dl_cli import client, daemon, database
+
+
+# Runs a daemon in a process of its own: commands it forks must not
+# inherit this process's ends of their pipes and sockets
+SERVE = """
+import os, sys
+from dl_cli import daemon, database
+
+db_path, socket_path, mode = sys.argv[1:]
+database.use_database(db_path)
+if mode == "blocking":
+    def run(self, argv, cwd, stdin_fd, stdout_fd, *rest):
+        # A command that says it started, then runs until fed a byte
+        os.write(stdout_fd, b"started")
+        return 3 if os.read(stdin_fd, 1) else 4
+
+    daemon.CommandDaemon._run = run
+elif mode == "stranger":
+    daemon.peer_uid = lambda connection: os.getuid() + 1
+daemon.CommandDaemon(socket_path).serve_forever(
+    on_ready=lambda server: print(server.db_path, flush=True)
+)
+"""
+
+
+class Server:
+    def __init__(self, socket_path, mode):
+        self.socket_path = socket_path
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        self.process = subprocess.Popen(
+            [sys.executable, "-c", SERVE, database.DB_PATH, socket_path, mode],
+            stdout=subprocess.PIPE,
+            env=env,
+        )
+        self.db_path = self.process.stdout.readline().decode().strip()
+        assert self.db_path
+
+    def close(self):
+        if self.process.poll() is None:
+            try:
+                daemon._request("stop", self.socket_path)
+            except (OSError, ValueError):
+                # Stopped by the test already, or dropping our requests
+                self.process.terminate()
+            self.process.wait(10)
+        self.process.stdout.close()
+
+
+@pytest.fixture
+def serve(scratch_db, tmp_path):
+    """Start a daemon; ``serve("blocking")`` runs stub commands."""
+    started = []
+
+    def start(mode=""):
+        server = Server(str(tmp_path / "run" / "d.sock"), mode)
+        started.append(server)
+        return server
+
+    yield start
+    for server in started:
+        server.close()
+
+
+class Caller:
+    """One ``run`` request, speaking the protocol the client uses."""
+
+    def __init__(self, server, argv, db_path=None):
+        self.stdin_r, self.stdin = os.pipe()
+        self.stdout, stdout_w = os.pipe()
+        self.stderr, stderr_w = os.pipe()
+        fields = ["run", db_path or server.db_path, os.getcwd(), "", *argv]
+        self.connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.connection.connect(server.socket_path)
+        socket.send_fds(
+            self.connection,
+            [b"\0".join(os.fsencode(field) for field in fields)],
+            [self.stdin_r, stdout_w, stderr_w],
+        )
+        self.connection.shutdown(socket.SHUT_WR)
+        for fd in (self.stdin_r, stdout_w, stderr_w):
+            os.close(fd)
+
+    def reply(self):
+        chunks = []
+        with self.connection:
+            while chunk := self.connection.recv(4096):
+                chunks.append(chunk)
+        os.close(self.stdin)
+        return b"".join(chunks).decode()
+
+    def output(self, fd):
+        with os.fdopen(fd, "rb") as stream:
+            return stream.read().decode()
+
+
+def test_peer_uid_of_a_socket_pair():
+    left, right = socket.socketpair(socket.AF_UNIX)
+    with left, right:
+        assert client.peer_uid(left) in (None, os.getuid())
+
+
+def test_exit_codes_and_streams(serve, tmp_path):
+    server = serve()
+    caller = Caller(server, ["root", "list"])
+    assert caller.reply() == "exit 0"
+    caller = Caller(server, ["root", "get", "--name", "missing"])
+    assert caller.reply() == "exit 1"
+    assert "not found" in caller.output(caller.stderr)
+    assert daemon._request("status", server.socket_path)["requests"] == 2
+
+
+def test_declined_for_another_database(serve, tmp_path):
+    server = serve()
+    caller = Caller(server, ["root", "list"], db_path=str(tmp_path / "other.db"))
+    assert caller.reply() == "declined"
+
+
+def test_busy_daemon_answers_status_and_declines_commands(serve):
+    server = serve("blocking")
+    running = Caller(server, ["content", "index"])
+    status = daemon._request("status", server.socket_path)
+    assert status["running"] == ["content", "index"]
+    # Another command is declined, so its client runs it itself
+    assert Caller(server, ["root", "list"]).reply() == "declined"
+    os.write(running.stdin, b"x")
+    assert running.reply() == "exit 3"
+    status = daemon._request("status", server.socket_path)
+    assert status["running"] is None and status["requests"] == 1
+
+
+def test_hang_up_interrupts_the_command(serve):
+    server = serve("blocking")
+    caller = Caller(server, ["content", "index"])
+    # A SIGINT that arrives while the child is still being forked is lost
+    # (and the command killed after the grace period instead)
+    assert os.read(caller.stdout, 7) == b"started"
+    caller.connection.close()
+    deadline = time.monotonic() + daemon.CANCEL_GRACE
+    while daemon._request("status", server.socket_path)["running"]:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert daemon._request("status", server.socket_path)["requests"] == 1
+    os.close(caller.stdin)
+
+
+def test_stop_waits_for_the_running_command(serve):
+    server = serve("blocking")
+    running = Caller(server, ["content", "index"])
+    reply = daemon._request("stop", server.socket_path)
+    assert reply["running"] == ["content", "index"]
+    # Still answering until the command is done
+    assert Caller(server, ["root", "list"]).reply() == "declined"
+    os.write(running.stdin, b"x")
+    assert running.reply() == "exit 3"
+    assert server.process.wait(10) == 0
+    assert not os.path.exists(server.socket_path)
+
+
+def test_requests_from_another_user_are_dropped(serve):
+    server = serve("stranger")
+    with pytest.raises((OSError, ValueError)):
+        daemon._request("status", server.socket_path)
+
+
+def test_client_falls_back_unless_the_daemon_runs_it(serve, monkeypatch, tmp_path):
+    server = serve()
+    for name in ("stdin", "stdout", "stderr"):
+        monkeypatch.setattr(f"sys.{name}", open(os.devnull, "r" if name == "stdin" else "w"))
+    monkeypatch.setattr(client, "DB_PATH", database.DB_PATH)
+    assert client._forward(["root", "get", "--name", "missing"], server.socket_path) == 1
+    monkeypatch.setattr(client, "DB_PATH", str(tmp_path / "other.db"))
+    assert client._forward(["root", "list"], server.socket_path) is None
+    monkeypatch.setattr(client, "DB_PATH", database.DB_PATH)
+    monkeypatch.setattr(client, "peer_uid", lambda connection: os.getuid() + 1)
+    assert client._forward(["root", "list"], server.socket_path) is None
+    assert daemon._request("status", server.socket_path)["requests"] == 1
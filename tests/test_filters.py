@@ -0,0 +1,148 @@
+import importlib
+import os
+
+import pytest
+
+filters = importlib.import_module("src.scan-utils.filters")
+scanner = importlib.import_module("src.scan-utils.scanner")
+
+
+def _rules(ignore_dirs=(), includes=None):
+    return filters.FilterRules(
+        ignore_dirs, {".log"}, {".py", ".md", ".txt"}, {"makefile"},
+        [includes] if includes else [],
+    )
+
+
+def _walk(top, rules):
+    return {
+        os.path.relpath(record.path, top).replace(os.sep, "/")
+        for record in scanner.WALKERS["scandir"](str(top), rules)
+    }
+
+
+def _touch(top, *paths):
+    for path in paths:
+        path = top / path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x")
+
+
+def test_unanchored_dir_pattern_matches_at_any_depth():
+    rules = _rules(["build"])
+    assert rules.ignore_dir("build")
+    assert rules.ignore_dir("Build", "src/app")
+    assert not rules.ignore_dir("builds", "src")
+
+
+def test_anchored_dir_patterns_match_from_the_scan_root():
+    rules = _rules(["/out", "Documents/My Music"])
+    assert rules.ignore_dir("out")
+    assert not rules.ignore_dir("out", "src")
+    assert rules.ignore_dir("My Music", "Documents")
+    assert not rules.ignore_dir("My Music", "backup/Documents")
+    assert not rules.ignore_dir("My Music")
+
+
+def test_anchored_include_pattern_matches_from_the_scan_root():
+    rules = _rules(includes=["/src/*.py", "/lib/p*"])
+    assert rules.include_path("src/a.py")
+    assert not rules.include_path("src/a.md")
+    assert not rules.include_path("app/src/a.py")
+    # A matching directory takes everything below it
+    assert rules.include_path("lib/pkg/b.md")
+    assert not rules.include_path("app/lib/pkg/b.md")
+
+
+def test_dir_only_rules():
+    assert _rules(["logs/"]).ignore_dir("logs", "app")
+    rules = _rules(includes=["docs/"])
+    assert rules.include_path("docs/a.md")
+    assert rules.include_path("src/docs/guide/b.md")
+    # A file named like the directory is not one
+    assert not rules.include_path("docs")
+    assert not rules.include_path("src/docs")
+
+
+def test_double_star():
+    rules = _rules(includes=["a/**/z.md"])
+    assert rules.include_path("a/z.md")
+    assert rules.include_path("a/b/c/z.md")
+    assert not rules.include_path("b/a/z.md")
+    rules = _rules(includes=["src/**"])
+    assert rules.include_path("src/a/b.py")
+    assert not rules.include_path("lib/a.py")
+    # * never crosses a /
+    assert not _rules(includes=["/*.md"]).include_path("a/b.md")
+    assert _rules(["*.egg-info"]).ignore_dir("pkg.EGG-INFO", "src")
+
+
+def test_negation_last_match_wins():
+    rules = _rules(["packages", "!packages", "cache", "/keep/**/cache", "!/keep/cache"])
+    assert not rules.ignore_dir("packages", "x")
+    assert rules.ignore_dir("cache", "x")
+    assert not rules.ignore_dir("cache", "keep")
+    assert rules.ignore_dir("cache", "keep/deep")
+    rules = _rules(includes=["src/", "!src/generated/", "src/generated/keep.py"])
+    assert rules.include_path("src/a.py")
+    assert not rules.include_path("src/generated/b.py")
+    assert rules.include_path("src/generated/keep.py")
+    assert _rules(includes=["\\!important.md"]).include_path("!important.md")
+
+
+def test_negated_files_inside_an_included_directory(tmp_path):
+    _touch(tmp_path, "src/a.py", "src/README.md", "src/sub/b.md", "lib/c.py")
+    rules = _rules(includes=["src/", "!*.md"])
+    assert _walk(tmp_path, rules) == {"src/a.py"}
+
+
+def test_ignored_directories_are_pruned(tmp_path):
+    _touch(
+        tmp_path, "a.py", "node/keep.py", "build/x.py", "build/deep/y.py",
+        "src/build/z.py", "src/out/w.py", "out/v.py",
+    )
+    listed = []
+
+    def scandir(path):
+        listed.append(os.path.relpath(path, tmp_path).replace(os.sep, "/"))
+        return os.scandir(path)
+
+    rules = _rules(["build", "/out"])
+    records = scanner.WALKERS["scandir"](str(tmp_path), rules, scandir=scandir)
+    found = {os.path.relpath(r.path, tmp_path).replace(os.sep, "/") for r in records}
+    assert found == {"a.py", "node/keep.py", "src/out/w.py"}
+    # Pruned directories are never listed at all
+    assert sorted(listed) == [".", "node", "src", "src/out"]
+
+
+@pytest.fixture
+def mixed_tree(tmp_path):
+    _touch(
+        tmp_path,
+        "app/main.py", "app/notes.md", "app/clip.mp4", "app/debug.log",
+        "app/Makefile", "app/Dockerfile", "app/LICENSE", "app/.env",
+        "app/.gitignore", "app/node_modules/lib/index.js",
+        "app/__pycache__/main.cpython-312.pyc", "app/.git/config",
+        "app/Cache/blob.json", "app/my.cache/keep.json",
+        "tools/.dev/versions/tool", "tools/.dev/versions/tool.sh",
+        "tools/.dev/other", "data/table.CSV", "data/archive.tar.gz",
+    )
+    return tmp_path
+
+
+def test_default_rules_match_the_baseline_functions(mixed_tree):
+    expected = set()
+    for root, dirs, names in os.walk(mixed_tree):
+        dirs[:] = [
+            d for d in dirs
+            if not scanner.should_ignore_dir(d, scanner.IGNORE_DIRS)
+        ]
+        for name in names:
+            path = os.path.join(root, name)
+            if scanner.should_include_file(
+                path, scanner.TARGET_EXTENSIONS, scanner.IGNORE_EXTENSIONS
+            ):
+                expected.add(os.path.relpath(path, mixed_tree).replace(os.sep, "/"))
+
+    assert "app/main.py" in expected and "app/clip.mp4" not in expected
+    assert _walk(mixed_tree, scanner.build_filter_rules()) == expected
@@ -0,0 +1,154 @@
+import sqlite3
+
+import pytest
+
+from dl_cli import database
+from dl_cli.root_manager import RootDbManager
+
+# The schema as first released, before any user_version was set
+BASELINE = """
+CREATE TABLE roots (
+    id INTEGER NOT NULL, name VARCHAR NOT NULL, path VARCHAR NOT NULL,
+    created_at DATETIME, updated_at DATETIME,
+    PRIMARY KEY (id), UNIQUE (name), UNIQUE (path)
+);
+CREATE TABLE root_files (
+    id INTEGER NOT NULL, root_id INTEGER NOT NULL, full_path VARCHAR NOT NULL,
+    name VARCHAR NOT NULL, extension VARCHAR NOT NULL, size INTEGER NOT NULL,
+    file_last_modified DATETIME NOT NULL, file_created_at DATETIME NOT NULL,
+    created_at DATETIME, updated_at DATETIME,
+    PRIMARY KEY (id), FOREIGN KEY(root_id) REFERENCES roots (id)
+);
+CREATE TABLE root_folders (
+    id INTEGER NOT NULL, root_id INTEGER NOT NULL, full_path VARCHAR NOT NULL,
+    name VARCHAR NOT NULL, size INTEGER NOT NULL,
+    folder_last_modified DATETIME NOT NULL, folder_created_at DATETIME NOT NULL,
+    created_at DATETIME, updated_at DATETIME,
+    PRIMARY KEY (id), FOREIGN KEY(root_id) REFERENCES roots (id)
+);
+"""
+
+# Schema version 5: indexed full paths, hashes, the content index and scan
+# sessions, before paths were normalized into folders
+VERSION_5 = BASELINE + """
+CREATE UNIQUE INDEX ux_root_files_root_path ON root_files (root_id, full_path);
+CREATE INDEX ix_root_files_size ON root_files (size);
+CREATE UNIQUE INDEX ux_root_folders_root_path ON root_folders (root_id, full_path);
+CREATE TABLE file_hashes (
+    id INTEGER NOT NULL, full_path VARCHAR NOT NULL, size INTEGER NOT NULL,
+    file_last_modified DATETIME NOT NULL, partial_hash VARCHAR NOT NULL,
+    full_hash VARCHAR, PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ux_file_hashes_path ON file_hashes (full_path);
+CREATE TABLE file_contents_state (
+    file_id INTEGER NOT NULL, full_path VARCHAR NOT NULL, size INTEGER NOT NULL,
+    file_last_modified DATETIME NOT NULL, "indexed" INTEGER NOT NULL,
+    PRIMARY KEY (file_id)
+);
+CREATE TABLE scan_sessions (
+    id INTEGER NOT NULL, root_id INTEGER NOT NULL, status VARCHAR NOT NULL,
+    options VARCHAR, frontier TEXT, pending_dirs INTEGER NOT NULL,
+    last_file_id INTEGER NOT NULL, rows_written INTEGER NOT NULL,
+    checkpoints INTEGER NOT NULL, resumes INTEGER NOT NULL,
+    started_at DATETIME NOT NULL, updated_at DATETIME NOT NULL,
+    finished_at DATETIME,
+    PRIMARY KEY (id), FOREIGN KEY(root_id) REFERENCES roots (id)
+);
+CREATE INDEX ix_scan_sessions_root_status ON scan_sessions (root_id, status);
+CREATE VIRTUAL TABLE file_contents USING fts5(content, tokenize = 'unicode61');
+PRAGMA user_version = 5;
+"""
+
+STAMP = "2024-01-02 03:04:05.000000"
+FILES = [
+    (1, "/data/a.txt", "a.txt", ".txt", 10),
+    (2, "/data/sub/b.py", "b.py", ".py", 20),
+    (3, "/data/sub/deep/c.md", "c.md", ".md", 30),
+]
+
+
+def _legacy_db(path, schema):
+    connection = sqlite3.connect(path)
+    connection.executescript(schema)
+    connection.execute(
+        "INSERT INTO roots VALUES (1, 'data', '/data', ?, ?)", (STAMP, STAMP)
+    )
+    connection.executemany(
+        "INSERT INTO root_files VALUES (?, 1, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(*file, STAMP, STAMP, STAMP, STAMP) for file in FILES],
+    )
+    connection.execute(
+        "INSERT INTO root_folders VALUES (1, 1, '/data/sub', 'sub', 4096, ?, ?, ?, ?)",
+        (STAMP, STAMP, STAMP, STAMP),
+    )
+    return connection
+
+
+@pytest.fixture
+def upgrade(tmp_path):
+    """Open a legacy database with the current code, migrating it."""
+    previous = database.DB_PATH
+    path = str(tmp_path / "db")
+
+    def upgrade(schema, fill=None):
+        connection = _legacy_db(path, schema)
+        if fill:
+            fill(connection)
+        connection.commit()
+        connection.close()
+        database.use_database(path)
+        database.get_engine()
+        return sqlite3.connect(path)
+
+    yield upgrade
+    database.use_database(previous)
+
+
+def _check_rows(connection):
+    assert connection.execute("PRAGMA user_version").fetchone()[0] == (
+        database.SCHEMA_VERSION
+    )
+    files = [
+        (row.id, row.full_path, row.name, row.size)
+        for batch in RootDbManager.iter_files(1)
+        for row in batch
+    ]
+    assert files == [(id_, path, name, size) for id_, path, name, _, size in FILES]
+    folders = {
+        row.full_path: row for batch in RootDbManager.iter_folders(1) for row in batch
+    }
+    assert set(folders) == {"/data", "/data/sub", "/data/sub/deep"}
+    # Stats of folders that had a row are kept
+    assert folders["/data/sub"].size == 4096
+    tables = {
+        name
+        for (name,) in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )
+    }
+    assert not {name for name in tables if name.startswith("legacy_")}
+
+
+def test_upgrade_from_baseline(upgrade):
+    connection = upgrade(BASELINE)
+    _check_rows(connection)
+    assert connection.execute("SELECT count(*) FROM file_contents_state").fetchone() == (0,)
+
+
+def test_upgrade_from_version_5(upgrade):
+    def fill(connection):
+        connection.execute(
+            "INSERT INTO file_contents_state VALUES (2, '/data/sub/b.py', 20, ?, 1)",
+            (STAMP,),
+        )
+        connection.execute(
+            "INSERT INTO file_contents (rowid, content) VALUES (2, 'import os')"
+        )
+
+    connection = upgrade(VERSION_5, fill)
+    _check_rows(connection)
+    # The content index entry still belongs to its file
+    assert connection.execute(
+        "SELECT s.id, s.name, c.content FROM file_contents_state AS s "
+        "JOIN file_contents AS c ON c.rowid = s.id"
+    ).fetchall() == [(2, "b.py", "import os")]
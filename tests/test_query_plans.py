@@ -0,0 +1,51 @@
+import importlib
+
+import pytest
+
+from dl_cli.database import explain_query_plan
+
+query_plans = importlib.import_module("src.scan-utils.benchmarks.query_plans")
+
+# The index each query should be answered from, one per table it reads
+EXPECTED = {
+    "files by root": ["ix_root_files_root_extension_size"],
+    "file by name": ["ux_root_files_folder_name"],
+    "files of a folder": ["ux_root_files_folder_name"],
+    "files by extension": ["ix_root_files_root_extension_size"],
+    "extension totals by root": ["ix_root_files_root_extension_size"],
+    "largest files": ["ix_root_files_size"],
+    "modified since": ["ix_root_files_last_modified"],
+    "folder by name": ["ux_root_folders_parent_name"],
+    "top folder": ["ux_root_folders_parent_name"],
+    "folders by tree path": ["ix_root_folders_root_tree_path"],
+    "files in a subtree": [
+        "ix_root_folders_root_tree_path",
+        "ux_root_files_folder_name",
+    ],
+    "interrupted scan session": ["ix_scan_sessions_root_status"],
+    "snapshots of a root": ["ix_snapshots_root"],
+    "snapshot files in path order": ["PRIMARY KEY", "PRIMARY KEY"],
+}
+
+
+def test_every_query_has_an_expected_plan():
+    assert EXPECTED.keys() == query_plans.QUERIES.keys()
+
+
+@pytest.mark.parametrize("name", list(query_plans.QUERIES))
+def test_query_is_indexed(scratch_db, name):
+    with scratch_db.connect() as connection:
+        plan = explain_query_plan(query_plans.QUERIES[name], connection)
+    assert query_plans.unindexed(plan) == []
+    assert len(plan) == len(EXPECTED[name])
+    for line, index in zip(plan, EXPECTED[name]):
+        assert index in line
+
+
+def test_unindexed_flags_scans_and_temp_sorts():
+    plan = [
+        "SCAN root_files",
+        "SCAN root_files USING COVERING INDEX ix_root_files_size",
+        "USE TEMP B-TREE FOR ORDER BY",
+    ]
+    assert query_plans.unindexed(plan) == [plan[0], plan[2]]
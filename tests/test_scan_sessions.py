@@ -0,0 +1,104 @@
+import functools
+import importlib
+
+import pytest
+
+from dl_cli.records import FileRecord
+from dl_cli.root_manager import RootDbManager
+from dl_cli.scan_sessions import ScanSessionManager
+
+scanner = importlib.import_module("src.scan-utils.scanner")
+
+
+@pytest.fixture
+def roots(scratch_db, tmp_path):
+    for name in ("d1", "d2", "d3", "d4"):
+        folder = tmp_path / "a" / name
+        folder.mkdir(parents=True)
+        for file in ("x.txt", "y.txt"):
+            (folder / file).write_text(name + file)
+    (tmp_path / "b").mkdir()
+    a = RootDbManager.create_root(str(tmp_path / "a"), "a")
+    b = RootDbManager.create_root(str(tmp_path / "b"), "b")
+    return a, b
+
+
+def _other_rows(root, count):
+    return [
+        FileRecord(f"{root.path}/f{i}.txt", f"f{i}.txt", 1, 0.0, 0.0, ".txt", root.path)
+        for i in range(count)
+    ]
+
+
+def _paths(root):
+    return sorted(row.full_path for batch in RootDbManager.iter_files(root.id) for row in batch)
+
+
+def test_resume_after_ids_above_the_checkpoint_were_freed(roots, monkeypatch):
+    a, b = roots
+    # A checkpoint after every directory
+    monkeypatch.setattr(
+        scanner,
+        "iter_checkpointed_batches",
+        functools.partial(scanner.iter_checkpointed_batches, interval=0),
+    )
+    add_files = RootDbManager.add_files
+    calls = []
+
+    def interleaved(root_id, *args, **kwargs):
+        if root_id == a.id:
+            calls.append(root_id)
+            if len(calls) == 2:
+                # Another root's rows, the newest at the last checkpoint, go
+                RootDbManager.clear_files(b.id)
+        report = add_files(root_id, *args, **kwargs)
+        if root_id == a.id and len(calls) == 1:
+            # ... written by another root's scan before that checkpoint
+            add_files(b.id, _other_rows(b, 5))
+        elif len(calls) == 2:
+            raise RuntimeError("interrupted")
+        return report
+
+    monkeypatch.setattr(RootDbManager, "add_files", staticmethod(interleaved))
+    with pytest.raises(RuntimeError, match="interrupted"):
+        scanner.scan_all_roots(batch_size=1)
+    [session] = ScanSessionManager.list_sessions(a.id)
+    assert session.status == "running"
+    assert session.checkpoints >= 1
+
+    monkeypatch.undo()
+    [report, _] = scanner.scan_all_roots(batch_size=1)
+    assert report.resumed
+    expected = sorted(record.path for record in scanner.scan_user_directory(a.path))
+    assert _paths(a) == expected
+    [session] = ScanSessionManager.list_sessions(a.id)
+    assert (session.status, session.resumes) == ("completed", 1)
+
+
+def test_resume_continues_from_the_checkpoint(roots, monkeypatch):
+    a, _ = roots
+    monkeypatch.setattr(
+        scanner,
+        "iter_checkpointed_batches",
+        functools.partial(scanner.iter_checkpointed_batches, interval=0),
+    )
+    add_files = RootDbManager.add_files
+    calls = []
+
+    def crashing(root_id, *args, **kwargs):
+        calls.append(root_id)
+        if len(calls) == 3:
+            raise RuntimeError("interrupted")
+        return add_files(root_id, *args, **kwargs)
+
+    monkeypatch.setattr(RootDbManager, "add_files", staticmethod(crashing))
+    with pytest.raises(RuntimeError, match="interrupted"):
+        scanner.scan_all_roots(batch_size=1)
+    monkeypatch.undo()
+
+    [report, _] = scanner.scan_all_roots(batch_size=1)
+    assert report.resumed
+    # Only the directories after the checkpoint were written again
+    assert report.rows == 4
+    expected = sorted(record.path for record in scanner.scan_user_directory(a.path))
+    assert _paths(a) == expected
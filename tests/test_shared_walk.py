@@ -0,0 +1,95 @@
+import importlib
+import os
+
+import pytest
+
+from dl_cli.root_manager import RootDbManager
+from dl_cli.root_tree import RootTree
+
+scanner = importlib.import_module("src.scan-utils.scanner")
+shared = importlib.import_module("src.scan-utils.shared")
+filters = importlib.import_module("src.scan-utils.filters")
+
+
+def test_root_tree():
+    tree = RootTree([
+        (1, "/data"), (2, "/data/projects"), (3, "/data/projects/app"),
+        (4, "/data/pro"), (5, "/other"),
+    ])
+    assert tree.containing("/data/projects/app/src") == [1, 2, 3]
+    # Whole components only: /data/pro does not contain /data/projects
+    assert tree.containing("/data/projects2") == [1]
+    assert tree.containing("/elsewhere") == []
+    assert tree.below("/data") == [2, 3, 4]
+    assert tree.below("/data", nearest=True) == [2, 4]
+    assert tree.below("/data/projects/app") == []
+    assert tree.root_at("/data/projects/") == 2
+    assert tree.root_at("/data/projects/app/src") is None
+    assert tree.outermost() == [1, 5]
+    with pytest.raises(ValueError):
+        tree.add(6, "/data/pro")
+
+
+@pytest.fixture
+def nested(tmp_path):
+    for rel in (
+        "a.py", "notes.md", "skip.mp4", "other/d.py",
+        "inner/b.py", "inner/sub/c.py", "inner/build/x.py",
+    ):
+        path = tmp_path / "outer" / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel)
+    return tmp_path / "outer", tmp_path / "outer" / "inner"
+
+
+def _rules(*ignore_dirs):
+    return filters.FilterRules(
+        ignore_dirs, scanner.IGNORE_EXTENSIONS, scanner.TARGET_EXTENSIONS,
+        scanner.EXTENSIONLESS_INCLUDES,
+    )
+
+
+def _shared_walk(walk, rules):
+    found = {root_id: set() for root_id, _ in walk}
+    for batches, _ in shared.iter_shared_batches(walk, rules, batch_size=1):
+        for root_id, records in batches.items():
+            found[root_id].update(record.path for record in records)
+    return found
+
+
+def _alone(path, rules):
+    return {record.path for record in scanner.WALKERS["scandir"](str(path), rules)}
+
+
+@pytest.mark.parametrize("ignore_dirs", [("build",), ("build", "/inner")])
+def test_shared_walk_matches_separate_walks(nested, ignore_dirs):
+    outer, inner = nested
+    rules = _rules(*ignore_dirs)
+    found = _shared_walk([(1, str(outer)), (2, str(inner))], rules)
+    assert found == {1: _alone(outer, rules), 2: _alone(inner, rules)}
+    # The inner root is walked either way; /inner only prunes it for the outer
+    assert found[2] == {str(inner / "b.py"), str(inner / "sub" / "c.py")}
+    assert (str(inner / "b.py") in found[1]) == ("/inner" not in ignore_dirs)
+
+
+def test_scan_all_roots_with_a_nested_root(scratch_db, nested):
+    outer, inner = nested
+    outer_root = RootDbManager.create_root(str(outer), "outer")
+    inner_root = RootDbManager.create_root(str(inner), "inner")
+
+    reports = scanner.scan_all_roots(rules=_rules("build", "/inner"))
+
+    def full_paths(root):
+        return sorted(
+            row.full_path
+            for batch in RootDbManager.iter_files(root.id)
+            for row in batch
+        )
+
+    assert full_paths(outer_root) == sorted(
+        os.path.join(outer, rel) for rel in ("a.py", "notes.md", "other/d.py")
+    )
+    assert full_paths(inner_root) == sorted(
+        os.path.join(inner, rel) for rel in ("b.py", "sub/c.py")
+    )
+    assert [report.rows for report in reports] == [3, 2]
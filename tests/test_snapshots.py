@@ -0,0 +1,120 @@
+import json
+import os
+
+import pytest
+
+from dl_cli import snapshots
+from dl_cli.records import FileRecord
+from dl_cli.root_manager import RootDbManager
+from dl_cli.snapshots import SnapshotManager
+
+
+@pytest.fixture
+def root(scratch_db, tmp_path):
+    return RootDbManager.create_root(str(tmp_path), "r")
+
+
+def _take(root, files):
+    """Replace the root's files with ``{relative path: (size, mtime)}``."""
+    RootDbManager.clear_files(root.id)
+    records = []
+    for rel, (size, mtime) in files.items():
+        path = os.path.join(root.path, rel)
+        parent, name = os.path.split(path)
+        records.append(FileRecord(path, name, size, mtime, mtime, ".txt", parent))
+    RootDbManager.add_files(root.id, records)
+    return SnapshotManager.take(root.id)
+
+
+def _changes(old_id, new_id, chunk_size, counts=None):
+    return [
+        row
+        for chunk in SnapshotManager.iter_changes(old_id, new_id, chunk_size, counts)
+        for row in chunk
+    ]
+
+
+BEFORE = {
+    "a.txt": (1, 100.0),
+    "gone.txt": (2, 100.0),
+    "sub/same.txt": (3, 100.0),
+    "sub/grown.txt": (4, 100.0),
+    "sub/touched.txt": (5, 100.0),
+}
+AFTER = {
+    "a.txt": (1, 100.0),
+    "new.txt": (6, 100.0),
+    "sub/same.txt": (3, 100.0),
+    "sub/grown.txt": (40, 100.0),
+    "sub/touched.txt": (5, 200.0),
+    "sub/deeper/added.txt": (7, 100.0),
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, snapshots.SNAPSHOT_DIFF_CHUNK_SIZE])
+def test_added_removed_and_changed_files(root, chunk_size):
+    old_id = _take(root, BEFORE)
+    new_id = _take(root, AFTER)
+    counts = {}
+    # Chunks of one row put a boundary between every pair of matching keys
+    changes = _changes(old_id, new_id, chunk_size, counts)
+
+    def path(rel):
+        return os.path.join(root.path, rel)
+
+    assert {(row[0], row[1]) for row in changes} == {
+        ("removed", path("gone.txt")),
+        ("added", path("new.txt")),
+        ("resized", path("sub/grown.txt")),
+        ("touched", path("sub/touched.txt")),
+        ("added", path("sub/deeper/added.txt")),
+    }
+    assert counts == {
+        "added": 2, "removed": 1, "resized": 1, "touched": 1, "unchanged": 2,
+    }
+    resized = next(row for row in changes if row[0] == "resized")
+    assert (resized[2], resized[3]) == (4, 40)
+    removed = next(row for row in changes if row[0] == "removed")
+    assert (removed[2], removed[3]) == (2, None)
+
+
+def test_identical_snapshots_have_no_changes(root):
+    old_id = _take(root, BEFORE)
+    new_id = _take(root, BEFORE)
+    counts = {}
+    assert _changes(old_id, new_id, 1, counts) == []
+    assert counts["unchanged"] == len(BEFORE)
+
+
+def test_diff_writes_the_changes(root, tmp_path):
+    old_id = _take(root, BEFORE)
+    new_id = _take(root, AFTER)
+    out = tmp_path / "changes.ndjson"
+    report = SnapshotManager.diff(old_id, new_id, str(out), chunk_size=1)
+    rows = [json.loads(line) for line in out.read_text().splitlines()]
+    assert len(rows) == report.added + report.removed + report.resized + report.touched == 5
+    assert set(rows[0]) == set(snapshots.CHANGE_COLUMNS)
+    with pytest.raises(ValueError):
+        SnapshotManager.diff(old_id, new_id, str(out), chunk_size=0)
+
+
+def test_retention_keeps_the_newest_snapshots(root, scratch_db, monkeypatch):
+    monkeypatch.setattr(snapshots, "SNAPSHOT_RETENTION", 2)
+    taken = [_take(root, {"a.txt": (i, 100.0)}) for i in range(4)]
+    kept = [snapshot.id for snapshot in SnapshotManager.list_snapshots(root.id)]
+    assert kept == taken[:1:-1]
+    with scratch_db.connect() as connection:
+        left = connection.exec_driver_sql(
+            "SELECT DISTINCT snapshot_id FROM snapshot_files "
+            "UNION SELECT DISTINCT snapshot_id FROM snapshot_folders"
+        ).scalars().all()
+    assert sorted(left) == taken[2:]
+    assert SnapshotManager.resolve(root.id) == (taken[2], taken[3])
+    with pytest.raises(ValueError):
+        SnapshotManager.resolve(root.id, old_id=taken[0])
+
+
+def test_no_retention_takes_nothing(root, monkeypatch):
+    monkeypatch.setattr(snapshots, "SNAPSHOT_RETENTION", 0)
+    assert _take(root, BEFORE) is None
+    assert SnapshotManager.list_snapshots(root.id) == []
@@ -0,0 +1,63 @@
+import asyncio
+import contextlib
+import importlib
+import os
+
+import pytest
+
+asyncscan = importlib.import_module("src.scan-utils.asyncscan")
+network = importlib.import_module("src.scan-utils.benchmarks.network")
+scanner = importlib.import_module("src.scan-utils.scanner")
+treegen = importlib.import_module("src.scan-utils.benchmarks.treegen")
+
+
+@pytest.fixture(scope="module")
+def tree(tmp_path_factory):
+    path = tmp_path_factory.mktemp("tree")
+    treegen.generate_tree(str(path), files=400, depth=3, fanout=4)
+    return path
+
+
+def _walk(walker, tree, **kwargs):
+    fs = network.LatencyFS(latency=0.0005, jitter=0.0005)
+    records = list(scanner.WALKERS[walker](
+        str(tree), scanner.build_filter_rules(), scandir=fs.scandir, **kwargs
+    ))
+    return {record.path for record in records}, {record.parent for record in records}
+
+
+def test_async_walker_matches_scandir_over_slow_mount(tree):
+    files, folders = _walk("scandir", tree)
+    assert files
+    assert len(folders) > 1
+    assert _walk("async", tree, workers=8) == (files, folders)
+
+
+def test_async_walker_stops_listing_for_slow_consumer(tmp_path):
+    for i in range(20):
+        (tmp_path / f"d{i}").mkdir()
+        (tmp_path / f"d{i}" / "a.txt").write_text("a")
+    listed = []
+
+    @contextlib.contextmanager
+    def scandir(path):
+        listed.append(path)
+        with os.scandir(path) as it:
+            yield list(it)
+
+    async def consume_one_and_wait():
+        walker = asyncscan.AsyncWalker(
+            scanner.build_filter_rules(), concurrency=1, scandir=scandir
+        )
+        walk = walker.walk(str(tmp_path))
+        try:
+            await anext(walk)
+            # Give every runnable task time to list what it may
+            for _ in range(50):
+                await asyncio.sleep(0.001)
+            return len(listed)
+        finally:
+            await walk.aclose()
+
+    # The top directory, plus the four slots and the one just consumed
+    assert asyncio.run(consume_one_and_wait()) <= 1 + 4 + 1
@@ -0,0 +1,74 @@
+import importlib
+import os
+
+import pytest
+
+watcher = importlib.import_module("src.scan-utils.watcher")
+
+
+def _age(path):
+    """Backdate ``path``'s mtime so the next change to it always shows."""
+    os.utime(path, ns=(0, 0))
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "a.txt").write_text("a")
+    for path in (tmp_path, tmp_path / "sub"):
+        _age(path)
+    return tmp_path
+
+
+@pytest.fixture
+def polling(tree):
+    polling = watcher.PollingWatcher()
+    polling.add(1, str(tree))
+    polling.add(1, str(tree / "sub"))
+    yield polling
+    polling.close()
+
+
+def test_nothing_changed(polling):
+    assert polling.poll() == set()
+
+
+def test_created_file(tree, polling):
+    (tree / "sub" / "b.txt").write_text("b")
+    assert polling.poll() == {(1, str(tree / "sub"))}
+    # Reported once, until the directory changes again
+    assert polling.poll() == set()
+
+
+def test_modified_file_in_place_is_not_reported(tree, polling):
+    (tree / "sub" / "a.txt").write_text("changed")
+    assert polling.poll() == set()
+
+
+def test_renamed_file(tree, polling):
+    (tree / "sub" / "a.txt").rename(tree / "sub" / "c.txt")
+    assert polling.poll() == {(1, str(tree / "sub"))}
+
+
+def test_removed_file(tree, polling):
+    (tree / "sub" / "a.txt").unlink()
+    assert polling.poll() == {(1, str(tree / "sub"))}
+
+
+def test_removed_directory_reports_its_parent(tree, polling):
+    (tree / "sub" / "a.txt").unlink()
+    (tree / "sub").rmdir()
+    assert polling.poll() == {(1, str(tree))}
+    # The removed directory is no longer watched
+    assert polling.poll() == set()
+
+
+def test_directory_of_several_roots(tree, polling):
+    polling.add(2, str(tree / "sub"))
+    (tree / "sub" / "b.txt").write_text("b")
+    assert polling.poll() == {(1, str(tree / "sub")), (2, str(tree / "sub"))}
+
+
+def test_missing_directory_is_not_watched(tree, polling):
+    polling.add(1, str(tree / "missing"))
+    assert polling.poll() == set()